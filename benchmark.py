@@ -0,0 +1,159 @@
+"""
+ZOOT代理指挥离线性能测试
+录制游戏画面，或在没有图形界面的环境中回放录制画面，测量识别速度和各模块流程的耗时
+
+用法:
+    录制画面:   python benchmark.py record <录制目录> --seconds 60 --rate 5
+    回放测试:   python benchmark.py replay <录制目录> --flow detector|recruit|combat|base [--realtime] [--speed 1.0]
+"""
+import argparse
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core import Detector, ScreenCapture, FrameRecorder, ReplayCapture, VirtualClock, NullController, LatencyModel
+from core.exceptions import ReplayFinishedError
+from utils.logger import logger
+
+# 支持回放测试的流程
+FLOWS = ('detector', 'recruit', 'combat', 'base')
+
+
+def record(path, seconds, rate, chunk_size):
+    """
+    按固定频率录制整个屏幕
+
+    Args:
+        path (str): 录制目录
+        seconds (float): 录制时长(秒)
+        rate (float): 每秒录制帧数
+        chunk_size (int): 每个块文件保存的帧数
+    """
+    session = ScreenCapture()
+    recorder = FrameRecorder(path, chunk_size=chunk_size, monitor=session.monitor())
+    interval = 1.0 / rate
+    logger.info(f"开始录制画面，时长: {seconds}秒，频率: {rate}帧/秒")
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            recorder.record(session.grab(), started)
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        logger.info("录制已手动停止")
+    finally:
+        recorder.close()
+        session.close()
+
+
+def _all_templates(detector):
+    """列出模板目录下的所有模板"""
+    names = []
+    for root, _, files in os.walk(detector.template_dir):
+        for filename in files:
+            if filename.lower().endswith('.png'):
+                names.append(os.path.relpath(os.path.join(root, filename), detector.template_dir))
+    return sorted(names)
+
+
+def _run_flow(flow, controller, detector):
+    """执行指定的流程"""
+    if flow == 'detector':
+        # 在每一帧上查找所有模板
+        names = _all_templates(detector)
+        while True:
+            detector.find_templates(detector.capture_screen(), names)
+    elif flow == 'recruit':
+        from modules.recruit import RecruitModule
+        module = RecruitModule(controller=controller, detector=detector)
+        module.navigate_to_recruit()
+        module.enter_recruit_slots()
+    elif flow == 'combat':
+        from modules.combat import CombatModule
+        CombatModule(controller=controller, detector=detector).combat_only_flow(cycles=1)
+    elif flow == 'base':
+        from modules.base_management import BaseManagementModule
+        module = BaseManagementModule(controller=controller, detector=detector)
+        module.navigate_to_base()
+        module.complete_tasks()
+        module.exit_from_base()
+
+
+def _is_replay_finished(error):
+    """判断异常是否由录制画面回放完毕引起"""
+    while error is not None:
+        if isinstance(error, ReplayFinishedError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def replay(path, flow, realtime, speed):
+    """
+    回放录制画面并执行指定的流程，输出耗时统计
+
+    Args:
+        path (str): 录制目录
+        flow (str): 流程名称
+        realtime (bool): 是否按录制时的时间间隔回放
+        speed (float): 按时间回放时的播放速度倍数
+    """
+    source = ReplayCapture(path, realtime=realtime, speed=speed)
+    # 逐帧回放时所有等待只拨动虚拟时钟，耗时只反映识别本身；回放中的耗时不计入本机的界面响应时间记录
+    clock = None if realtime else VirtualClock()
+    detector = Detector(capture_session=source, clock=clock, latency_model=LatencyModel(path=None))
+    controller = NullController(clock=clock)
+    cache = detector.template_cache
+    logger.info(f"开始回放测试，流程: {flow}，录制帧数: {source.frame_count}，"
+                f"回放方式: {'按时间' if realtime else '逐帧'}")
+
+    outcome = "完成"
+    started = time.perf_counter()
+    try:
+        _run_flow(flow, controller, detector)
+    except Exception as e:
+        outcome = "回放结束" if _is_replay_finished(e) else f"失败: {str(e)}"
+    finally:
+        elapsed = time.perf_counter() - started
+        detector.close()
+
+    frames = source.frames_served
+    logger.info(f"回放测试{outcome}，耗时: {elapsed:.3f}秒")
+    if clock is not None:
+        logger.info(f"跳过的等待时间: {clock.slept:.1f}秒")
+    logger.info(f"截图次数: {frames}，平均每帧: {elapsed / max(1, frames) * 1000:.2f}毫秒，"
+                f"吞吐量: {frames / elapsed if elapsed > 0 else 0:.1f}帧/秒")
+    logger.info(f"模拟操作次数: {len(controller.actions)}，匹配结果复用次数: {detector.reuse_hits}，"
+                f"模板缓存命中/未命中: {cache.hits}/{cache.misses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZOOT代理指挥离线性能测试")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help="录制屏幕画面")
+    record_parser.add_argument('path', help="录制目录")
+    record_parser.add_argument('--seconds', type=float, default=60.0, help="录制时长(秒)")
+    record_parser.add_argument('--rate', type=float, default=5.0, help="每秒录制帧数")
+    record_parser.add_argument('--chunk-size', type=int, default=32, help="每个块文件保存的帧数")
+
+    replay_parser = subparsers.add_parser('replay', help="回放录制画面并执行流程")
+    replay_parser.add_argument('path', help="录制目录")
+    replay_parser.add_argument('--flow', choices=FLOWS, default='detector', help="要执行的流程")
+    replay_parser.add_argument('--realtime', action='store_true', help="按录制时的时间间隔回放")
+    replay_parser.add_argument('--speed', type=float, default=1.0, help="按时间回放时的播放速度倍数")
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.path, args.seconds, args.rate, args.chunk_size)
+    else:
+        replay(args.path, args.flow, args.realtime, args.speed)
+
+
+if __name__ == "__main__":
+    main()
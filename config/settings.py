@@ -6,9 +6,78 @@ class Settings:
     LOG_WINDOW_OPACITY = 0.7
     LOG_WINDOW_WIDTH = 929     # 日志窗口宽度
     LOG_WINDOW_HEIGHT = 300    # 日志窗口高度
+    LOG_WINDOW_MAX_LINES = 1000    # 日志窗口最多保留的行数，超出时删除最早的行
+    LOG_WINDOW_FLUSH_INTERVAL = 200    # 日志窗口批量刷新的间隔(毫秒)
+
+    # 日志文件设置
+    LOG_FILE_MAX_MB = 10    # 单个日志文件的大小上限(MB)，超出或跨天时轮转，为0时只按日期轮转
+    LOG_FILE_BACKUP_COUNT = 30    # 保留的轮转日志文件数量，为0时不删除旧文件
+    LOG_FILE_COMPRESS = True    # 是否将轮转后的日志文件压缩为gzip
+    LOG_JSON_ENABLED = False    # 是否同时输出JSON格式的日志(日期.jsonl)，便于程序分析
     
     # 截图存储设置
     SAVE_SCREENSHOTS = False    # 是否保存截图用于调试
+    SCREENSHOT_FORMAT = 'jpg'    # 调试截图格式: 'jpg'、'png'或'webp'
+    SCREENSHOT_QUALITY = 85    # jpg和webp调试截图的编码质量 (1-100)
+    SCREENSHOT_QUEUE_SIZE = 16    # 等待后台写入的调试截图数量上限，队列已满时丢弃新的截图
+    SCREENSHOT_DISK_BUDGET_MB = 200    # 调试截图占用磁盘空间的上限(MB)，超出时删除最早的截图，为0时不限制
+
+    # 飞行记录器设置
+    FLIGHT_RECORDER_ENABLED = True    # 是否在内存中记录最近的画面、匹配结果和操作，流程失败时写入logs/flight
+    FLIGHT_RECORDER_FRAMES = 30    # 保留的最近画面数量
+    FLIGHT_RECORDER_SCALE = 0.25    # 记录画面的缩放比例
+    FLIGHT_RECORDER_INTERVAL = 0.5    # 两次记录画面之间的最短间隔(秒)
+
+    # 耗时追踪设置
+    TRACE_ENABLED = False    # 是否记录各步骤的耗时，每个任务结束后导出为Chrome trace格式(logs/trace_*.json)
+    TRACE_MAX_EVENTS = 200000    # 内存中保留的耗时事件数量上限
+
+    # 图像识别设置
+    TEMPLATE_CACHE_SIZE = 64    # 内存中缓存的已解码模板数量上限
+    MATCH_MODE = 'full'    # 模板匹配模式: 'full'为全分辨率匹配，'pyramid'为由粗到精的金字塔匹配
+    PYRAMID_SCALE = 0.5    # 金字塔匹配粗匹配阶段的缩放比例
+    PYRAMID_MARGIN = 0.15    # 粗匹配阈值相对匹配阈值的放宽量
+    PYRAMID_CANDIDATES = 3    # 粗匹配阶段保留的候选位置数量
+    ROI_INDEX_ENABLED = True    # 是否优先在模板历史出现位置附近搜索
+    ROI_PADDING = 40    # 历史位置搜索区域四周扩展的像素数
+    ROI_HISTORY_SIZE = 8    # 每个模板保留的最近命中位置数量，搜索区域为这些位置的包围框
+    ROI_RECORD_MARGIN = 0.05    # 匹配值至少超过阈值该值时才记录命中位置，避免误匹配污染索引
+    ROI_FALLBACK_INTERVAL = 2.0    # 界面识别只在历史位置搜索且未识别出界面时，全图重新搜索的最短间隔(秒)
+    MATCH_WORKERS = 0    # 并发模板匹配线程数，0表示使用CPU核心数
+    OPENCV_THREADS = -1    # OpenCV内部线程数，-1表示使用OpenCV默认值，0表示禁用内部多线程
+    FRAME_DIFF_TOLERANCE = 6.0    # 画面指纹各单元格像素差均不超过该值时视为画面未变化
+    CAPTURE_BUFFER_COUNT = 3    # 截图环形缓冲区数量，截图在之后的(该值-1)次截图内保持有效
+    FRAME_GRABBER_ENABLED = False    # 是否启用后台截图服务（全屏截图直接取最新一帧）
+    CAPTURE_RATE_ACTIVE = 10.0    # 菜单操作阶段的后台截图频率(帧/秒)
+    CAPTURE_RATE_IDLE = 0.5    # 等待战斗结束阶段的后台截图频率(帧/秒)
+    GAME_WINDOW_CAPTURE = True    # 是否只捕获游戏窗口所在区域（截图坐标以窗口左上角为原点，固定的屏幕坐标裁剪区域需用frame_region换算）
+    GAME_WINDOW_TITLE = '明日方舟'    # 游戏窗口标题
+    GAME_WINDOW_RECHECK_INTERVAL = 2.0    # 重新校验游戏窗口位置的间隔(秒)
+
+    # 界面等待设置
+    WAIT_TIMEOUT = 10.0    # 等待界面元素出现的默认最长时间(秒)
+    WAIT_POLL_MIN = 0.05    # 操作后首次检测界面元素的间隔(秒)
+    WAIT_POLL_MAX = 1.0    # 检测界面元素的最长间隔(秒)
+    WAIT_POLL_BACKOFF = 1.5    # 每次未检测到元素后检测间隔的增长倍数
+    WAIT_SETTLE_TIMEOUT = 1.0    # 操作后等待画面离开操作前样子的最长时间(秒)，画面变化前不查找界面元素
+    LATENCY_MODEL_ENABLED = True    # 是否记录各界面切换的耗时，并据此自动调整等待超时和首次检测延迟
+    LATENCY_MIN_SAMPLES = 5    # 记录达到该次数后才按历史耗时调整等待
+    LATENCY_TIMEOUT_FACTOR = 3.0    # 等待超时为历史95分位耗时的倍数，可短于调用方给出的超时，最多延长到调用方超时的该倍数
+    LATENCY_MIN_TIMEOUT = 2.0    # 按历史耗时推算的等待超时下限(秒)
+
+    # 操作校验设置
+    VERIFY_ACTIONS = False    # 是否校验操作结果（操作后画面变化立即继续，没有变化时重试），代替固定的操作延迟
+    VERIFY_TIMEOUT = 1.5    # 等待操作后画面变化的最长时间(秒)
+    VERIFY_RETRIES = 1    # 操作后画面没有变化时的重试次数（只对调用时声明可以重复执行的操作生效）
+    VERIFY_REGION_RADIUS = 80    # 校验操作位置附近区域的半径(像素)
+    VERIFY_POLL_INTERVAL = 0.03    # 校验操作结果时的截图间隔(秒)
+
+    # 战斗时长估计设置
+    BATTLE_ESTIMATE_ENABLED = True    # 是否按各关卡的历史战斗时长，在战斗的大部分时间内停止截图
+    BATTLE_IDLE_PERCENTILE = 5.0    # 停止截图的时长为历史战斗时长的该分位数
+    BATTLE_IDLE_MARGIN = 10.0    # 比预计最短战斗时长提前恢复截图的时间(秒)
+    BATTLE_WINDOW_PERCENTILE = 95.0    # 预计战斗结束时间段的终点为历史战斗时长的该分位数
+    BATTLE_POLL_INTERVAL = 0.5    # 预计战斗结束时间段内检测战斗结束的间隔(秒)
 
 # 创建设置实例
 settings = Settings()
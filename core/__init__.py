@@ -10,12 +10,25 @@ from .exceptions import (
     ElementNotFoundError,
     OperationFailedError,
     GameNotRunningError,
-    ConfigurationError
+    ConfigurationError,
+    ReplayFinishedError,
+    OperationCancelledError
 )
 
 # 导出控制器和检测器类
 from .controller import Controller
 from .detector import Detector
+from .template_cache import TemplateCache
+from .roi_index import RoiIndex
+from .latency import LatencyModel
+from .screenshot_writer import ScreenshotWriter
+from .flight_recorder import FlightRecorder
+from .tracing import Tracer
+from .digits import DigitRecognizer
+from .navigation import Navigator
+from .capture import ScreenCapture, FrameGrabber
+from .window import GameWindow
+from .replay import FrameRecorder, RecordingCapture, ReplayCapture, VirtualClock, NullController
 
 # 定义公共API
 __all__ = [
@@ -26,7 +39,25 @@ __all__ = [
     'OperationFailedError',
     'GameNotRunningError',
     'ConfigurationError',
+    'ReplayFinishedError',
+    'OperationCancelledError',
     # 核心类
     'Controller',
-    'Detector'
+    'Detector',
+    'TemplateCache',
+    'RoiIndex',
+    'LatencyModel',
+    'ScreenshotWriter',
+    'FlightRecorder',
+    'Tracer',
+    'DigitRecognizer',
+    'Navigator',
+    'ScreenCapture',
+    'FrameGrabber',
+    'GameWindow',
+    'FrameRecorder',
+    'RecordingCapture',
+    'ReplayCapture',
+    'VirtualClock',
+    'NullController'
 ]
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+屏幕捕获模块
+提供长期复用的屏幕捕获会话，避免每次截图都重新创建捕获句柄和分配图像内存，
+以及在后台线程中持续截图、只保留最新一帧的截图服务
+"""
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+from utils.logger import logger
+
+# 支持的截图颜色格式
+COLOR_BGR = 'bgr'
+COLOR_BGRA = 'bgra'
+COLOR_GRAY = 'gray'
+
+
+class ScreenCapture:
+    """
+    屏幕捕获会话类
+
+    每个线程复用自己的mss句柄（mss句柄不能跨线程使用），BGR和灰度截图写入预先分配的环形缓冲区。
+    返回的图像在之后buffer_count-1次同尺寸截图内保持有效，需要长期保留时请调用copy()
+    """
+
+    def __init__(self, buffer_count=3, monitor_index=1, max_shapes=4):
+        """
+        初始化屏幕捕获会话
+
+        Args:
+            buffer_count (int): 每种尺寸轮流使用的缓冲区数量
+            monitor_index (int): 捕获的显示器序号，1为主显示器
+            max_shapes (int): 最多保留多少种尺寸的缓冲区
+        """
+        self.buffer_count = max(1, int(buffer_count))
+        self.monitor_index = monitor_index
+        self.max_shapes = max_shapes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._handles = []
+        # {图像形状: [缓冲区列表, 下一个使用的序号]}
+        self._buffers = OrderedDict()
+
+    def _get_handle(self):
+        """获取当前线程的mss句柄，首次使用时创建"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            import mss
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._handles.append(sct)
+        return sct
+
+    def _next_buffer(self, shape):
+        """按环形顺序取出指定形状的缓冲区"""
+        with self._lock:
+            entry = self._buffers.get(shape)
+            if entry is None:
+                entry = [[np.empty(shape, dtype=np.uint8) for _ in range(self.buffer_count)], 0]
+                self._buffers[shape] = entry
+                while len(self._buffers) > self.max_shapes:
+                    self._buffers.popitem(last=False)
+            else:
+                self._buffers.move_to_end(shape)
+            buffers, index = entry
+            entry[1] = (index + 1) % len(buffers)
+            return buffers[index]
+
+    def monitor(self):
+        """
+        获取捕获的显示器区域
+
+        Returns:
+            dict: 显示器区域 {'left', 'top', 'width', 'height'}
+        """
+        return dict(self._get_handle().monitors[self.monitor_index])
+
+    def grab(self, region=None, color=COLOR_BGR):
+        """
+        捕获屏幕图像
+
+        Args:
+            region (tuple): 捕获区域 (x, y, width, height)，为None时捕获整个显示器
+            color (str): 返回的颜色格式，'bgr'、'gray'或'bgra'（'bgra'直接引用截图数据，不做任何复制）
+
+        Returns:
+            numpy.ndarray: 捕获的图像
+        """
+        sct = self._get_handle()
+        if region:
+            monitor = {
+                "top": region[1],
+                "left": region[0],
+                "width": region[2],
+                "height": region[3],
+                "mon": self.monitor_index,
+            }
+        else:
+            monitor = sct.monitors[self.monitor_index]
+
+        screenshot = sct.grab(monitor)
+        # 直接引用截图的原始BGRA数据，不复制
+        bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(screenshot.height, screenshot.width, 4)
+        if color == COLOR_BGRA:
+            return bgra
+        if color == COLOR_BGR:
+            return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=self._next_buffer(bgra.shape[:2] + (3,)))
+        if color == COLOR_GRAY:
+            return cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=self._next_buffer(bgra.shape[:2]))
+        raise ValueError(f"不支持的颜色格式: {color}")
+
+    def close(self):
+        """释放所有线程创建的mss句柄和缓冲区"""
+        with self._lock:
+            handles, self._handles = self._handles, []
+            self._buffers.clear()
+        for sct in handles:
+            try:
+                sct.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+
+class FrameGrabber:
+    """
+    后台截图服务类
+
+    在独立线程中按设定频率持续截图，只保留最新的一帧，使用者可随时以O(1)代价取得最新画面。
+    每一帧都是独立分配的图像，不会被之后的截图覆盖
+    """
+
+    def __init__(self, session, rate=10.0, region_provider=None):
+        """
+        初始化后台截图服务
+
+        Args:
+            session (ScreenCapture): 屏幕捕获会话
+            rate (float): 每秒截图次数
+            region_provider (callable): 每次截图前调用，返回捕获区域 (x, y, width, height)，返回None时捕获整个显示器
+        """
+        self.session = session
+        self.region_provider = region_provider
+        self._rate = float(rate)
+        self._condition = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._origin = (0, 0)
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.frame_count = 0
+        self.last_error = None
+
+    @property
+    def running(self):
+        """后台线程是否正在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def rate(self):
+        """当前每秒截图次数"""
+        return self._rate
+
+    def start(self):
+        """启动后台截图线程"""
+        if self.running:
+            return
+        # 重新启动时丢弃停止前的旧画面
+        with self._condition:
+            self._frame = None
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='ZOOTFrameGrabber', daemon=True)
+        self._thread.start()
+        logger.debug(f"后台截图服务已启动，频率: {self._rate}帧/秒")
+
+    def stop(self, timeout=2.0):
+        """
+        停止后台截图线程
+
+        Args:
+            timeout (float): 等待线程结束的最长时间(秒)
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+        logger.debug("后台截图服务已停止")
+
+    def set_rate(self, rate):
+        """
+        调整截图频率，立即生效
+
+        Args:
+            rate (float): 每秒截图次数
+        """
+        if rate <= 0:
+            raise ValueError(f"截图频率必须大于0: {rate}")
+        self._rate = float(rate)
+        self._wakeup.set()
+
+    def latest(self, timeout=None, min_time=None):
+        """
+        获取最新一帧
+
+        Args:
+            timeout (float): 尚无符合要求的画面时最多等待的时间(秒)
+            min_time (float): 只接受在该时刻(time.monotonic())之后开始截取的画面，
+                              用于保证取到的画面已经反映了最近一次操作；为None时接受任意画面
+
+        Returns:
+            tuple: (图像, 截图时间戳time.monotonic(), 图像左上角的屏幕坐标)，没有符合要求的画面时图像为None
+        """
+        def ready():
+            return self._frame is not None and (min_time is None or self._timestamp > min_time)
+
+        with self._condition:
+            if not ready() and self.running:
+                # 低频截图时下一帧可能要等很久，立即唤醒后台线程截图
+                self._wakeup.set()
+                self._condition.wait_for(lambda: ready() or self._stopped.is_set(), timeout)
+            if not ready():
+                return None, self._timestamp, self._origin
+            return self._frame, self._timestamp, self._origin
+
+    def _run(self):
+        """后台线程主循环"""
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                region = self.region_provider() if self.region_provider else None
+                bgra = self.session.grab(region, color=COLOR_BGRA)
+                # 每帧使用新分配的图像，使用者持有的旧帧不会被覆盖
+                frame = cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR)
+                with self._condition:
+                    self._frame = frame
+                    # 记录开始截图的时间，画面内容一定不早于该时刻
+                    self._timestamp = started
+                    self._origin = (region[0], region[1]) if region else (0, 0)
+                    self.frame_count += 1
+                    self._condition.notify_all()
+                self.last_error = None
+            except Exception as e:
+                if self.last_error is None:
+                    logger.warning(f"后台截图失败: {str(e)}")
+                self.last_error = e
+
+            # 等待下一次截图，频率调整或停止时立即唤醒
+            interval = 1.0 / self._rate
+            self._wakeup.wait(max(0.0, interval - (time.monotonic() - started)))
+            self._wakeup.clear()
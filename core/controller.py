@@ -3,25 +3,134 @@
 负责处理与游戏的交互，包括鼠标点击、键盘按键和鼠标拖动等操作
 """
 import time
-import pyautogui
-from .exceptions import OperationFailedError
+from .exceptions import OperationFailedError, OperationCancelledError
+from . import frame_diff
+from .tracing import tracer
+from utils.logger import logger
+from config.settings import settings
+
+try:
+    import pyautogui
+except Exception:
+    # 没有图形界面的环境（如离线回放测试）中pyautogui无法导入，此时只能使用不操作鼠标键盘的控制器
+    pyautogui = None
+
+# 操作位置附近区域的指纹尺寸 (宽, 高)
+REGION_FINGERPRINT_SIZE = (16, 16)
 
 
 class Controller:
     """控制器类，提供与游戏交互的各种方法"""
 
-    def __init__(self, delay=0.5):
+    def __init__(self, delay=0.5, detector=None, verify=None, move_duration=0.2):
         """
         初始化控制器
 
         Args:
             delay (float): 操作之间的延迟时间(秒)
+            detector (Detector): 检测器实例，校验操作结果时用于截图
+            verify (bool): 是否校验操作结果（操作后画面发生变化立即返回，没有变化时重试），
+                           默认使用配置中的VERIFY_ACTIONS，未提供检测器时不校验
+            move_duration (float): 鼠标移动到目标位置的动画时间(秒)
         """
         self.delay = delay
+        self.detector = detector
+        self.verify = settings.VERIFY_ACTIONS if verify is None else verify
+        self.move_duration = move_duration
+        if pyautogui is None:
+            raise OperationFailedError("初始化控制器", "pyautogui不可用，无法控制鼠标和键盘")
         # 设置pyautogui的失败安全措施
         pyautogui.FAILSAFE = True
 
-    def click(self, x, y, clicks=1, interval=0.2):
+    def _snapshot(self, point):
+        """
+        记录当前画面的指纹
+
+        Args:
+            point (tuple): 操作位置的屏幕坐标 (x, y)，为None时只记录整个画面
+
+        Returns:
+            tuple: (整个画面的指纹, 操作位置附近区域的指纹)
+        """
+        frame = self.detector.capture_screen()
+        whole = self.detector.frame_fingerprint(frame)
+        if point is None:
+            return whole, None
+        x, y = self.detector.frame_point(frame, point[0], point[1])
+        radius = settings.VERIFY_REGION_RADIUS
+        height, width = frame.shape[:2]
+        x1, y1 = max(0, int(x) - radius), max(0, int(y) - radius)
+        x2, y2 = min(width, int(x) + radius), min(height, int(y) + radius)
+        if x2 <= x1 or y2 <= y1:
+            return whole, None
+        return whole, frame_diff.fingerprint(frame[y1:y2, x1:x2], REGION_FINGERPRINT_SIZE)
+
+    @tracer.traced('verify', 'wait')
+    def _wait_changed(self, point, before, timeout):
+        """等待操作位置附近或整个画面发生变化，发生变化返回True，超时返回False"""
+        deadline = self.detector.monotonic() + timeout
+        tolerance = settings.FRAME_DIFF_TOLERANCE
+        while True:
+            whole, region = self._snapshot(point)
+            if frame_diff.is_changed(whole, before[0], tolerance):
+                return True
+            if region is not None and frame_diff.is_changed(region, before[1], tolerance):
+                return True
+            remaining = deadline - self.detector.monotonic()
+            if remaining <= 0:
+                return False
+            self.detector.sleep(min(settings.VERIFY_POLL_INTERVAL, remaining))
+
+    def _perform(self, action, description, point=None, verify=None, retry=False):
+        """
+        执行操作，并按设置等待固定延迟或校验操作结果
+
+        Args:
+            action (callable): 执行实际操作的函数
+            description (str): 操作描述，用于日志
+            point (tuple): 操作位置的屏幕坐标 (x, y)，为None时只校验整个画面
+            verify (bool): 是否校验操作结果，为None时使用控制器的设置
+            retry (bool): 校验模式下画面没有变化时是否重新执行操作。只有重复执行也不会产生额外效果的操作
+                          （如切换到某个标签页）才能重试；界面响应慢于VERIFY_TIMEOUT时，
+                          重试会让领取、确认、返回等操作执行两次
+
+        Returns:
+            bool: 操作完成返回True；校验模式下（重试后）画面仍没有变化返回False
+
+        Raises:
+            OperationCancelledError: 检测器已被取消时抛出，不再执行操作
+        """
+        if self.detector is not None:
+            self.detector.check_cancelled()
+            self.detector.flight_recorder.record_action(description, point)
+        if verify is None:
+            verify = self.verify
+        if not verify or self.detector is None:
+            with tracer.span('action', 'input', action=description):
+                action()
+            if self.detector is None:
+                with tracer.span('delay', 'sleep', seconds=self.delay):
+                    time.sleep(self.delay)
+                return True
+            self.detector.mark_action()
+            # 通过检测器等待，可被取消，回放时使用虚拟时钟
+            self.detector.sleep(self.delay)
+            return True
+
+        retries = settings.VERIFY_RETRIES if retry else 0
+        for attempt in range(retries + 1):
+            before = self._snapshot(point)
+            with tracer.span('action', 'input', action=description):
+                action()
+            self.detector.mark_action()
+            if self._wait_changed(point, before, settings.VERIFY_TIMEOUT):
+                return True
+            if attempt < retries:
+                logger.warning(f"{description}后画面没有变化，重试第 {attempt + 1} 次")
+        logger.warning(f"{description}后画面始终没有变化")
+        return False
+
+    def click(self, x, y, clicks=1, interval=0.2, verify=None, retry=False):
         """
         在指定坐标点击鼠标
 
@@ -30,22 +139,29 @@ class Controller:
             y (int): 纵坐标
             clicks (int): 点击次数
             interval (float): 多次点击之间的间隔时间
+            verify (bool): 是否校验点击结果，为None时使用控制器的设置
+            retry (bool): 校验模式下画面没有变化时是否重新执行，只能用于重复执行也没有额外效果的操作
+
+        Returns:
+            bool: 点击完成返回True；校验模式下（重试后）画面仍没有变化返回False
 
         Raises:
             OperationFailedError: 点击操作失败时抛出
         """
-        try:
+        def action():
             # 移动鼠标到指定位置
-            pyautogui.moveTo(x, y, duration=0.2)
+            pyautogui.moveTo(x, y, duration=self.move_duration)
             # 点击鼠标
             pyautogui.click(clicks=clicks, interval=interval)
-            # 添加延迟
-            time.sleep(self.delay)
-            return True
+
+        try:
+            return self._perform(action, f"点击({x}, {y})", (x, y), verify, retry)
+        except OperationCancelledError:
+            raise
         except Exception as e:
             raise OperationFailedError("鼠标点击") from e
 
-    def press_key(self, key, presses=1, interval=0.2):
+    def press_key(self, key, presses=1, interval=0.2, verify=None, retry=False):
         """
         按下指定的键盘按键
 
@@ -53,20 +169,27 @@ class Controller:
             key (str): 要按下的键
             presses (int): 按下次数
             interval (float): 多次按下之间的间隔时间
+            verify (bool): 是否校验按键结果，为None时使用控制器的设置
+            retry (bool): 校验模式下画面没有变化时是否重新执行，只能用于重复执行也没有额外效果的操作
+
+        Returns:
+            bool: 按键完成返回True；校验模式下（重试后）画面仍没有变化返回False
 
         Raises:
             OperationFailedError: 按键操作失败时抛出
         """
-        try:
+        def action():
             # 按下键
             pyautogui.press(key, presses=presses, interval=interval)
-            # 添加延迟
-            time.sleep(self.delay)
-            return True
+
+        try:
+            return self._perform(action, f"按下键 {key}", None, verify, retry)
+        except OperationCancelledError:
+            raise
         except Exception as e:
             raise OperationFailedError(f"按下键 {key}") from e
 
-    def drag(self, start_x, start_y, end_x, end_y, duration=1.0):
+    def drag(self, start_x, start_y, end_x, end_y, duration=1.0, verify=None, retry=False):
         """
         从起始坐标拖动鼠标到结束坐标
 
@@ -76,26 +199,33 @@ class Controller:
             end_x (int): 结束横坐标
             end_y (int): 结束纵坐标
             duration (float): 拖动持续时间
+            verify (bool): 是否校验拖动结果，为None时使用控制器的设置
+            retry (bool): 校验模式下画面没有变化时是否重新执行，只能用于重复执行也没有额外效果的操作
+
+        Returns:
+            bool: 拖动完成返回True；校验模式下（重试后）画面仍没有变化返回False
 
         Raises:
             OperationFailedError: 拖动操作失败时抛出
         """
-        try:
+        def action():
             # 移动鼠标到起始位置
-            pyautogui.moveTo(start_x, start_y, duration=0.2)
+            pyautogui.moveTo(start_x, start_y, duration=self.move_duration)
             # 按下鼠标左键
             pyautogui.mouseDown()
             # 拖动鼠标到结束位置
             pyautogui.moveTo(end_x, end_y, duration=duration)
             # 释放鼠标左键
             pyautogui.mouseUp()
-            # 添加延迟
-            time.sleep(self.delay)
-            return True
+
+        try:
+            return self._perform(action, "鼠标拖动", (start_x, start_y), verify, retry)
+        except OperationCancelledError:
+            raise
         except Exception as e:
             raise OperationFailedError("鼠标拖动") from e
 
-    def scroll(self, clicks, x=None, y=None):
+    def scroll(self, clicks, x=None, y=None, verify=None, retry=False):
         """
         滚动鼠标滚轮
 
@@ -103,17 +233,25 @@ class Controller:
             clicks (int): 滚动的格数，正数向上，负数向下
             x (int): 鼠标位置的横坐标
             y (int): 鼠标位置的纵坐标
+            verify (bool): 是否校验滚动结果，为None时使用控制器的设置
+            retry (bool): 校验模式下画面没有变化时是否重新执行，只能用于重复执行也没有额外效果的操作
+
+        Returns:
+            bool: 滚动完成返回True；校验模式下（重试后）画面仍没有变化返回False
 
         Raises:
             OperationFailedError: 滚动操作失败时抛出
         """
-        try:
+        def action():
             if x is not None and y is not None:
-                pyautogui.moveTo(x, y, duration=0.2)
+                pyautogui.moveTo(x, y, duration=self.move_duration)
             # 滚动鼠标
             pyautogui.scroll(clicks)
-            # 添加延迟
-            time.sleep(self.delay)
-            return True
+
+        point = (x, y) if x is not None and y is not None else None
+        try:
+            return self._perform(action, "鼠标滚动", point, verify, retry)
+        except OperationCancelledError:
+            raise
         except Exception as e:
-            raise OperationFailedError("鼠标滚动") from e
\ No newline at end of file
+            raise OperationFailedError("鼠标滚动") from e
@@ -6,22 +6,94 @@ import cv2
 import numpy as np
 import subprocess
 import tempfile
+import time
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from PIL import Image
 import os
-from .exceptions import ImageRecognitionError, ElementNotFoundError
+from .exceptions import ImageRecognitionError, ElementNotFoundError, ReplayFinishedError, OperationCancelledError
+from .template_cache import template_cache as shared_template_cache
+from .roi_index import roi_index as shared_roi_index
+from .latency import latency_model as shared_latency_model
+from .screenshot_writer import screenshot_writer as shared_screenshot_writer
+from .flight_recorder import flight_recorder as shared_flight_recorder
+from .tracing import tracer
+from . import frame_diff
+from .capture import ScreenCapture, FrameGrabber, COLOR_BGR
+from .window import GameWindow
+from .screens import SCREEN_SIGNATURES
 from utils.logger import logger
+from config.settings import settings
+
+# 支持的模板匹配模式
+MATCH_MODE_FULL = 'full'        # 全分辨率彩色图像直接匹配
+MATCH_MODE_PYRAMID = 'pyramid'  # 先在缩小的灰度图上粗匹配，再在原图小窗口内精匹配
+
+# 所有检测器共享的模板匹配线程池
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def configure_opencv_threads(num_threads=None):
+    """
+    设置OpenCV内部使用的线程数
+
+    Args:
+        num_threads (int): 线程数，为None时使用配置中的OPENCV_THREADS；负数表示使用OpenCV默认值，
+                           0表示禁用OpenCV内部多线程
+    """
+    if num_threads is None:
+        num_threads = settings.OPENCV_THREADS
+    cv2.setNumThreads(int(num_threads))
+    logger.debug(f"OpenCV线程数已设置为: {cv2.getNumThreads()}")
+
+
+def get_match_executor():
+    """
+    获取所有检测器共享的模板匹配线程池（首次使用时按配置创建）
+
+    cv2.matchTemplate执行期间会释放GIL，因此多个模板的匹配可以在多个核心上并行
+
+    Returns:
+        ThreadPoolExecutor: 共享线程池
+    """
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            workers = settings.MATCH_WORKERS or (os.cpu_count() or 1)
+            _shared_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ZOOTMatch')
+            logger.debug(f"模板匹配线程池已创建，线程数: {workers}")
+        return _shared_executor
+
+
+configure_opencv_threads()
 
 
 class Detector:
     """检测器类，提供图像识别和文字识别的功能"""
 
-    def __init__(self, template_dir=None, use_easy_ocr=None):
+    def __init__(self, template_dir=None, use_easy_ocr=None, template_cache=None, match_mode=None,
+                 roi_index=None, max_workers=None, capture_session=None, latency_model=None,
+                 screenshot_writer=None, flight_recorder=None, clock=None):
         """
         初始化检测器
 
         Args:
             template_dir (str): 模板图像所在目录
             use_easy_ocr (bool): 是否优先使用EasyOCR（如果可用），默认为True
+            template_cache (TemplateCache): 模板缓存，默认使用所有模块共享的缓存
+            match_mode (str): 模板匹配模式（'full'或'pyramid'），默认使用配置中的MATCH_MODE
+            roi_index (RoiIndex): 模板位置索引，默认使用所有模块共享的索引
+            max_workers (int): 并发匹配线程数，指定时使用独立线程池，默认使用共享线程池
+            capture_session (ScreenCapture): 屏幕捕获会话，默认创建检测器专用的会话；
+                                             也可以传入ReplayCapture等实现了相同接口的画面来源
+            latency_model (LatencyModel): 界面响应时间模型，默认使用所有模块共享的模型
+            screenshot_writer (ScreenshotWriter): 调试截图写入器，默认使用所有模块共享的写入器
+            flight_recorder (FlightRecorder): 飞行记录器，默认使用所有模块共享的记录器
+            clock (VirtualClock): 提供monotonic()和sleep()的时钟，逐帧回放时传入虚拟时钟，
+                                  等待不再实际休眠；默认使用真实时间
         """
         # 延迟初始化OCR读取器
         self.reader = None
@@ -37,7 +109,107 @@ class Detector:
         if not os.path.exists(self.template_dir):
             raise FileNotFoundError(f"模板目录不存在: {self.template_dir}")
 
+        # 已解码模板的缓存，默认在所有检测器之间共享
+        self.template_cache = template_cache or shared_template_cache
+
+        # 模板匹配模式
+        self.match_mode = match_mode or settings.MATCH_MODE
+        if self.match_mode not in (MATCH_MODE_FULL, MATCH_MODE_PYRAMID):
+            raise ValueError(f"不支持的模板匹配模式: {self.match_mode}")
+        # 最近一次金字塔匹配所用的截图及其缩小灰度图，同一截图多次匹配时复用
+        self._pyramid_cache = (None, None)
+
+        # 长期复用的屏幕捕获会话
+        self.capture_session = capture_session or ScreenCapture(buffer_count=settings.CAPTURE_BUFFER_COUNT)
+        # 可选的后台截图服务（启用后全屏截图直接取最新一帧）
+        self.frame_grabber = None
+        # 游戏窗口，找到窗口时截图只捕获窗口区域（只用于实时截图，自定义画面来源按原样返回画面）
+        self.game_window = GameWindow(settings.GAME_WINDOW_TITLE, settings.GAME_WINDOW_RECHECK_INTERVAL) \
+            if settings.GAME_WINDOW_CAPTURE and capture_session is None else None
+
+        # 模板历史位置索引，匹配时优先搜索历史位置附近的区域
+        self.roi_index = roi_index or shared_roi_index
+        # 最近一次捕获的全屏截图及其左上角的屏幕坐标
+        self._last_capture = None
+        self._last_origin = (0, 0)
+        # 全屏截图的序号，每次截图加1；截图缓冲区会被复用，不能按图像对象判断是否为同一帧
+        self._capture_seq = 0
+        # 仍在使用中的全屏截图的信息 {id(图像): (图像弱引用, 截图序号, 截图左上角的屏幕坐标)}，
+        # 缓冲区写入新画面时覆盖对应的记录，图像被释放时自动删除记录
+        self._frames = {}
+        # 最近一次鼠标键盘操作完成的时间，后台截图服务只返回在此之后截取的画面
+        self._last_action_time = None
+        # 最近一次操作前画面的指纹及操作完成的时间，等待模板时先等待画面离开操作前的样子
+        self._action_print = None
+        self._action_clock = 0.0
+
+        # 界面切换耗时记录，用于推算等待超时和首次检测延迟
+        self.latency_model = latency_model or shared_latency_model
+
+        # 在后台线程中保存调试截图
+        self.screenshot_writer = screenshot_writer or shared_screenshot_writer
+
+        # 在内存中保存最近的画面和匹配结果，流程失败时写入磁盘
+        self.flight_recorder = flight_recorder or shared_flight_recorder
+
+        # 画面未变化时复用的匹配结果 {(模板, 阈值, 模式, 图像尺寸, 仅历史位置, 裁剪区域): (画面指纹, 匹配结果)}
+        self._reuse_memo = {}
+        self._fingerprint_cache = (None, None)
+        self.reuse_hits = 0
+
+        # 并发匹配使用的线程池（延迟创建）
+        self.max_workers = max_workers
+        self._executor = None
+
+        # 取消标志，设置后截图和等待都会抛出OperationCancelledError，用于从其他线程中止正在执行的流程
+        self.cancel_event = threading.Event()
+
+        # 等待和超时使用的时钟，为None时使用真实时间
+        self.clock = clock
+
+        # 上一次界面识别在整个画面中重新查找的时间
+        self._last_full_identify = None
+
+    def load_template(self, template_name):
+        """
+        加载模板图像，优先从缓存中读取
+
+        Args:
+            template_name (str): 模板图像名称或完整路径
+
+        Returns:
+            numpy.ndarray: BGR格式的模板图像（只读）
+
+        Raises:
+            FileNotFoundError: 模板文件不存在时抛出
+            ImageRecognitionError: 模板图像加载失败时抛出
+        """
+        template_path = os.path.normpath(os.path.join(self.template_dir, template_name))
+        return self.template_cache.get(template_path, self._decode_template)
+
+    @tracer.traced('load_template', 'template')
+    def _decode_template(self, template_path):
+        """
+        从磁盘读取并解码模板图像
+
+        Args:
+            template_path (str): 模板图像的完整路径
+
+        Returns:
+            numpy.ndarray: BGR格式的模板图像
+        """
+        # 检查模板文件是否存在
+        if not os.path.exists(template_path):
+            raise FileNotFoundError(f"模板文件不存在: {template_path}")
+        logger.debug(f"加载模板文件: {template_path}")
 
+        # 使用PIL库加载模板图像，以解决中文路径问题
+        try:
+            pil_image = Image.open(template_path)
+            # 转换为OpenCV格式
+            return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+        except Exception as e:
+            raise ImageRecognitionError(f"无法加载模板图像: {template_path}") from e
 
     def crop_image(self, image, region):
         """
@@ -64,45 +236,297 @@ class Detector:
         except Exception as e:
             raise ImageRecognitionError("图像裁剪失败") from e
 
-    def capture_screen(self, region=None):
+    @tracer.traced('capture', 'capture')
+    def capture_screen(self, region=None, color=COLOR_BGR):
         """
         捕获屏幕图像
 
+        截图写入捕获会话的环形缓冲区，在之后的几次截图内保持有效，需要长期保留时请调用copy()。
+        未指定区域且找到了游戏窗口时只捕获游戏窗口，在该截图上查找到的坐标会自动换算回屏幕坐标；
+        但截图本身以窗口左上角为原点，按屏幕坐标写死的裁剪区域需先用frame_region()换算
+
         Args:
-            region (tuple): 捕获区域 (x, y, width, height)
+            region (tuple): 捕获区域 (x, y, width, height)，为None时捕获游戏窗口或整个屏幕
+            color (str): 颜色格式，'bgr'（默认）、'gray'或'bgra'（不做任何复制）
 
         Returns:
             numpy.ndarray: 捕获的图像
 
         Raises:
             ImageRecognitionError: 屏幕捕获失败时抛出
+            ReplayFinishedError: 画面来源为录制回放且已回放完毕时抛出
+            OperationCancelledError: 检测器已被取消时抛出
         """
+        self.check_cancelled()
         try:
-            import mss
-            import mss.tools
-
-            with mss.mss() as sct:
-                monitor = sct.monitors[1]  # 主显示器
-                if region:
-                    monitor = {
-                        "top": region[1],
-                        "left": region[0],
-                        "width": region[2],
-                        "height": region[3],
-                        "mon": 1,
-                    }
-
-                screenshot = sct.grab(monitor)
-                # 转换为OpenCV格式
-                img = np.array(screenshot)
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                return img
+            # 后台截图服务运行时，全屏截图直接取最新一帧
+            if not region and color == COLOR_BGR:
+                if self.frame_grabber is None and settings.FRAME_GRABBER_ENABLED:
+                    self.start_frame_grabber()
+                if self.frame_grabber is not None and self.frame_grabber.running:
+                    frame, _, origin = self.frame_grabber.latest(timeout=1.0, min_time=self._last_action_time)
+                    if frame is not None:
+                        self._register_frame(frame, origin)
+                        return frame
+
+            window_region = None if region else self._game_window_region()
+            img = self.capture_session.grab(region or window_region, color)
+            # 缓冲区被复用，清除指向它的旧缓存
+            self._release_frame_caches(img)
+            if not region and color == COLOR_BGR:
+                self._register_frame(img, window_region[:2] if window_region else (0, 0))
+            return img
+        except ReplayFinishedError:
+            raise
         except ImportError:
             raise ImageRecognitionError("需要安装mss库: pip install mss")
         except Exception as e:
             raise ImageRecognitionError("屏幕捕获失败") from e
 
-    def find_template(self, screenshot, template_name, threshold=0.8):
+    def _game_window_region(self):
+        """获取游戏窗口所在的屏幕区域，未启用或找不到窗口时返回None"""
+        if self.game_window is None:
+            return None
+        return self.game_window.region(self.capture_session.monitor())
+
+    def _register_frame(self, frame, origin):
+        """记录新捕获的全屏截图的序号和左上角的屏幕坐标"""
+        self._capture_seq += 1
+        self._last_capture = frame
+        self._last_origin = tuple(origin)
+        key = id(frame)
+        frames = self._frames
+
+        def forget(ref):
+            # 图像被释放后id可能被新对象复用，只删除仍指向该图像的记录
+            if frames.get(key, (None,))[0] is ref:
+                frames.pop(key, None)
+
+        self._frames[key] = (weakref.ref(frame, forget), self._capture_seq, self._last_origin)
+
+    def _frame_info(self, screenshot):
+        """
+        获取全屏截图的序号和左上角的屏幕坐标
+
+        Args:
+            screenshot (numpy.ndarray): 屏幕截图
+
+        Returns:
+            tuple: (截图序号, (x, y))，不是由该检测器捕获的全屏截图（包括其副本和裁剪）返回None
+        """
+        info = self._frames.get(id(screenshot))
+        if info is None or info[0]() is not screenshot:
+            return None
+        return info[1], info[2]
+
+    def _frame_origin(self, screenshot):
+        """
+        获取截图左上角的屏幕坐标
+
+        Raises:
+            ImageRecognitionError: 正在只捕获游戏窗口时传入了不是由该检测器捕获的全屏截图，无法换算坐标
+        """
+        info = self._frame_info(screenshot)
+        if info is not None:
+            return info[1]
+        if self._last_origin != (0, 0):
+            raise ImageRecognitionError("无法换算坐标：图像不是该检测器捕获的全屏截图（截图的副本和裁剪不保留窗口位置）")
+        # 截图以屏幕左上角为原点时，调用方传入的图像按屏幕坐标处理
+        return 0, 0
+
+    def _to_screen(self, screenshot, x, y):
+        """将截图中的坐标换算为屏幕坐标"""
+        origin_x, origin_y = self._frame_origin(screenshot)
+        return x + origin_x, y + origin_y
+
+    def frame_point(self, screenshot, x, y):
+        """
+        将屏幕坐标换算为截图中的坐标
+
+        Args:
+            screenshot (numpy.ndarray): 屏幕截图
+            x (int): 屏幕横坐标
+            y (int): 屏幕纵坐标
+
+        Returns:
+            tuple: 截图中的坐标 (x, y)
+
+        Raises:
+            ImageRecognitionError: 正在只捕获游戏窗口时传入了不是由该检测器捕获的全屏截图
+        """
+        origin_x, origin_y = self._frame_origin(screenshot)
+        return x - origin_x, y - origin_y
+
+    def frame_region(self, screenshot, region):
+        """
+        将屏幕坐标的区域换算为截图中的区域，用于裁剪按屏幕坐标给出的固定区域
+
+        Args:
+            screenshot (numpy.ndarray): 屏幕截图
+            region (tuple): 屏幕坐标的区域 (x1, y1, x2, y2)
+
+        Returns:
+            tuple: 截图中的区域 (x1, y1, x2, y2)
+
+        Raises:
+            ImageRecognitionError: 正在只捕获游戏窗口时传入了不是由该检测器捕获的全屏截图
+        """
+        x1, y1 = self.frame_point(screenshot, region[0], region[1])
+        x2, y2 = self.frame_point(screenshot, region[2], region[3])
+        return x1, y1, x2, y2
+
+    def mark_action(self):
+        """
+        记录一次鼠标键盘操作已完成，之后的截图不会返回操作前截取的画面，
+        等待模板时也会先等待画面离开操作前的样子
+        """
+        self._last_action_time = time.monotonic()
+        self._action_clock = self.monotonic()
+        previous = self._last_capture
+        self._action_print = self.frame_fingerprint(previous) if previous is not None else None
+
+    def frame_id(self, screenshot):
+        """
+        获取截图的序号，用于判断两次匹配是否在同一帧上进行
+
+        Args:
+            screenshot (numpy.ndarray): 屏幕截图
+
+        Returns:
+            int: 全屏截图的序号，不是由该检测器捕获的图像返回None
+        """
+        info = self._frame_info(screenshot)
+        return info[0] if info is not None else None
+
+    def _release_frame_caches(self, frame):
+        """清除以该图像对象为键的缓存（图像对象所在的缓冲区已写入新画面）"""
+        if self._pyramid_cache[0] is frame:
+            self._pyramid_cache = (None, None)
+        if self._fingerprint_cache[0] is frame:
+            self._fingerprint_cache = (None, None)
+
+    def start_frame_grabber(self, rate=None):
+        """
+        启动后台截图服务，之后的全屏截图直接返回最新一帧
+
+        Args:
+            rate (float): 每秒截图次数，默认使用配置中的CAPTURE_RATE_ACTIVE
+        """
+        if self.frame_grabber is None:
+            self.frame_grabber = FrameGrabber(self.capture_session, rate or settings.CAPTURE_RATE_ACTIVE,
+                                              region_provider=self._game_window_region)
+        elif rate:
+            self.frame_grabber.set_rate(rate)
+        self.frame_grabber.start()
+
+    def stop_frame_grabber(self):
+        """停止后台截图服务，之后的截图恢复为同步截图"""
+        if self.frame_grabber is not None:
+            self.frame_grabber.stop()
+            self.frame_grabber = None
+
+    def set_capture_rate(self, rate):
+        """
+        调整后台截图服务的截图频率，未启动截图服务时不做任何操作
+
+        Args:
+            rate (float): 每秒截图次数
+
+        Returns:
+            float: 调整前的截图频率，未启动截图服务时返回None
+        """
+        if self.frame_grabber is None:
+            return None
+        previous = self.frame_grabber.rate
+        self.frame_grabber.set_rate(rate)
+        return previous
+
+    @contextmanager
+    def capture_rate(self, rate):
+        """
+        在with块内临时调整后台截图频率，退出时恢复
+
+        Args:
+            rate (float): 每秒截图次数
+        """
+        previous = self.set_capture_rate(rate)
+        try:
+            yield
+        finally:
+            if previous is not None:
+                self.set_capture_rate(previous)
+
+    @contextmanager
+    def capture_paused(self):
+        """在with块内暂停后台截图服务，退出时恢复，未启动截图服务时不做任何操作"""
+        grabber = self.frame_grabber
+        paused = grabber is not None and grabber.running
+        if paused:
+            grabber.stop()
+        try:
+            yield
+        finally:
+            if paused:
+                grabber.start()
+
+    def cancel(self):
+        """取消正在使用该检测器的流程（可在任意线程调用），之后的截图和等待都会抛出OperationCancelledError"""
+        self.cancel_event.set()
+
+    def reset_cancel(self):
+        """清除取消标志，开始新的流程前调用"""
+        self.cancel_event.clear()
+
+    @property
+    def cancelled(self):
+        """检测器是否已被取消"""
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """
+        检查检测器是否已被取消
+
+        Raises:
+            OperationCancelledError: 已被取消时抛出
+        """
+        if self.cancel_event.is_set():
+            raise OperationCancelledError()
+
+    def monotonic(self):
+        """
+        当前时间，所有等待的超时都按该时间计算
+
+        Returns:
+            float: 使用虚拟时钟时返回虚拟时间，否则返回time.monotonic()
+        """
+        return self.clock.monotonic() if self.clock is not None else time.monotonic()
+
+    def sleep(self, seconds):
+        """
+        可被取消的等待，等待期间调用cancel()会立即结束；使用虚拟时钟时只拨动虚拟时间
+
+        Args:
+            seconds (float): 等待时间(秒)
+
+        Raises:
+            OperationCancelledError: 已被取消或等待期间被取消时抛出
+        """
+        if self.clock is not None:
+            self.check_cancelled()
+            self.clock.sleep(seconds)
+            return
+        with tracer.span('sleep', 'sleep', seconds=round(seconds, 3)):
+            cancelled = self.cancel_event.wait(max(0.0, seconds))
+        if cancelled:
+            raise OperationCancelledError()
+
+    def close(self):
+        """释放检测器占用的屏幕捕获资源"""
+        self.stop_frame_grabber()
+        self.capture_session.close()
+
+    @tracer.traced('find_template', 'match')
+    def find_template(self, screenshot, template_name, threshold=0.8, mode=None, reuse=False):
         """
         在屏幕截图中查找模板图像
 
@@ -110,6 +534,8 @@ class Detector:
             screenshot (numpy.ndarray): 屏幕截图
             template_name (str): 模板图像名称
             threshold (float): 匹配阈值
+            mode (str): 匹配模式（'full'或'pyramid'），默认使用检测器的match_mode
+            reuse (bool): 画面与上次匹配该模板时相比没有明显变化时，直接复用上次的匹配结果
 
         Returns:
             tuple: (x, y, width, height) 匹配区域的坐标和大小
@@ -119,98 +545,531 @@ class Detector:
             ImageRecognitionError: 图像识别失败时抛出
         """
         try:
-            # 构建模板路径
-            template_path = os.path.join(self.template_dir, template_name)
-
-            # 检查模板文件是否存在
-            if not os.path.exists(template_path):
-                raise FileNotFoundError(f"模板文件不存在: {template_path}")
-            logger.debug(f"模板文件存在: {template_path}")
-
-            # 使用PIL库加载模板图像，以解决中文路径问题
-            try:
-                from PIL import Image
-                pil_image = Image.open(template_path)
-                # 转换为OpenCV格式
-                template = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            except ImportError:
-                raise ImageRecognitionError("需要安装PIL库: pip install pillow")
-            except Exception as e:
-                raise ImageRecognitionError(f"无法加载模板图像: {template_path}") from e
-
-            # 获取模板的宽度和高度
-            template_height, template_width = template.shape[:2]
-
-            # 进行模板匹配
-            result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            max_val, top_left, template_width, template_height = self._match_template(
+                screenshot, template_name, threshold, mode, reuse)
 
             # 检查匹配结果是否超过阈值
             if max_val >= threshold:
                 # 计算匹配区域的中心坐标
-                top_left = max_loc
                 x = top_left[0] + template_width // 2
                 y = top_left[1] + template_height // 2
+                x, y = self._to_screen(screenshot, x, y)
+                self.flight_recorder.record_matches(screenshot, {template_name: (max_val, (x, y))},
+                                                    self.frame_id(screenshot))
                 return (x, y, template_width, template_height)
             else:
+                self.flight_recorder.record_matches(screenshot, {template_name: (max_val, None)},
+                                                    self.frame_id(screenshot))
                 raise ElementNotFoundError(template_name, f"未找到匹配的模板: {template_name}, 最大匹配值: {max_val}")
         except ElementNotFoundError:
             raise
         except Exception as e:
             raise ImageRecognitionError(f"模板匹配失败: {template_name}") from e
 
-    def save_image(self, image, filename=None, directory=None):
+    @tracer.traced('find_templates', 'match')
+    def find_templates(self, screenshot, template_names, threshold=0.8, region=None, mode=None, reuse=False,
+                       roi_only=False, reuse_misses=True):
         """
-        保存图像到指定目录
+        在同一张截图中一次性查找多个模板
+
+        截图只裁剪和预处理一次，各模板的匹配并发执行
 
         Args:
-            image (numpy.ndarray): 要保存的图像
-            filename (str): 图像文件名，如果为None则使用时间戳
-            directory (str): 保存目录，如果为None则保存到项目根目录下的logs文件夹
+            screenshot (numpy.ndarray): 屏幕截图
+            template_names (list): 模板图像名称列表
+            threshold (float): 匹配阈值
+            region (tuple): 只在该区域内查找 (x1, y1, x2, y2)，返回的坐标仍相对于完整截图
+            mode (str): 匹配模式（'full'或'pyramid'），默认使用检测器的match_mode
+            reuse (bool): 画面与上次匹配时相比没有明显变化时，直接复用上次的匹配结果
+            roi_only (bool): 有历史位置的模板只在历史位置附近搜索，未命中时不再进行全图匹配
+            reuse_misses (bool): 是否按画面变化容差复用未找到的结果；为False时未找到的结果只在画面完全相同时复用，
+                                 画面有任何变化都重新匹配，避免容差内的细微变化一直沿用旧的未找到结果
 
         Returns:
-            str: 保存的文件路径
+            dict: {模板名称: (x, y, width, height)}，未找到或模板文件不存在的模板对应None，
+                  顺序与template_names一致
 
         Raises:
-            ImageRecognitionError: 图像保存失败时抛出
+            ImageRecognitionError: 图像识别失败时抛出
         """
+        names = list(dict.fromkeys(template_names))
         try:
-            import time
-            import os
+            # 所有模板共享同一次裁剪和预处理
+            if region:
+                image = self.crop_image(screenshot, region)
+                offset_x, offset_y = region[0], region[1]
+            else:
+                image = screenshot
+                offset_x, offset_y = 0, 0
+            if (mode or self.match_mode) == MATCH_MODE_PYRAMID:
+                self._get_pyramid_image(image, settings.PYRAMID_SCALE)
+            if reuse:
+                self.frame_fingerprint(image)
 
-            # 设置保存目录
-            if directory:
-                save_dir = directory
+            def match_one(template_name):
+                try:
+                    with tracer.span('match_template', 'match', template=template_name):
+                        return self._match_template(image, template_name, threshold, mode, reuse, roi_only,
+                                                    reuse_misses, region)
+                except FileNotFoundError as e:
+                    logger.warning(str(e))
+                    return None
+
+            # 已在匹配线程中（嵌套调用）或只有一个模板时直接顺序执行，避免线程池自我等待
+            if len(names) <= 1 or threading.current_thread().name.startswith('ZOOTMatch'):
+                outcomes = [match_one(name) for name in names]
             else:
-                project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                save_dir = os.path.join(project_root, 'logs')
+                outcomes = list(self._get_executor().map(match_one, names))
+        except Exception as e:
+            raise ImageRecognitionError(f"批量模板匹配失败: {names}") from e
 
-            # 确保保存目录存在
-            if not os.path.exists(save_dir):
-                os.makedirs(save_dir)
+        results = {}
+        scores = {}
+        for template_name, outcome in zip(names, outcomes):
+            scores[template_name] = (outcome[0] if outcome else None, None)
+            if outcome is None or outcome[0] < threshold:
+                results[template_name] = None
+                continue
+            _, top_left, template_width, template_height = outcome
+            x = offset_x + top_left[0] + template_width // 2
+            y = offset_y + top_left[1] + template_height // 2
+            x, y = self._to_screen(screenshot, x, y)
+            results[template_name] = (x, y, template_width, template_height)
+            scores[template_name] = (outcome[0], (x, y))
+        self.flight_recorder.record_matches(screenshot, scores, self.frame_id(screenshot))
+        return results
 
-            # 设置文件名
-            if filename:
-                # 确保文件名包含扩展名
-                if not (filename.endswith('.png') or filename.endswith('.jpg') or filename.endswith('.jpeg')):
-                    filename += '.png'
+    def wait_for(self, template_name, timeout=None, threshold=0.8, region=None, transition=None):
+        """
+        等待模板出现在屏幕上，出现后立即返回
+
+        刚开始时密集截图检测，之后逐渐拉长检测间隔，界面响应快时不会白白等待
+
+        Args:
+            template_name (str): 模板图像名称
+            timeout (float): 最长等待时间(秒)，默认使用配置中的WAIT_TIMEOUT
+            threshold (float): 匹配阈值
+            region (tuple): 只在该区域内查找 (x1, y1, x2, y2)
+            transition (str): 界面切换名称，指定时记录本次等待的耗时，
+                              并在记录足够后按历史耗时推算超时和首次检测延迟
+
+        Returns:
+            tuple: (x, y, width, height) 匹配区域的坐标和大小
+
+        Raises:
+            ElementNotFoundError: 超时仍未找到模板时抛出
+            ImageRecognitionError: 图像识别失败时抛出
+        """
+        return self.wait_any([template_name], timeout, threshold, region, transition)[1]
+
+    @tracer.traced('wait_any', 'wait')
+    def wait_any(self, template_names, timeout=None, threshold=0.8, region=None, transition=None, interval=None):
+        """
+        等待多个模板中的任意一个出现在屏幕上，出现后立即返回
+
+        Args:
+            template_names (list): 模板图像名称列表，同时出现多个时按列表顺序优先返回靠前的模板
+            timeout (float): 最长等待时间(秒)，默认使用配置中的WAIT_TIMEOUT
+            threshold (float): 匹配阈值
+            region (tuple): 只在该区域内查找 (x1, y1, x2, y2)
+            transition (str): 界面切换名称，指定时记录本次等待的耗时，
+                              并在记录足够后按历史耗时推算超时和首次检测延迟
+            interval (float): 固定的检测间隔(秒)，为None时从WAIT_POLL_MIN开始逐渐拉长到WAIT_POLL_MAX
+
+        Returns:
+            tuple: (模板名称, (x, y, width, height))
+
+        Raises:
+            ElementNotFoundError: 超时仍未找到任何模板时抛出
+            ImageRecognitionError: 图像识别失败时抛出
+            OperationCancelledError: 等待期间检测器被取消时抛出
+        """
+        if timeout is None:
+            timeout = settings.WAIT_TIMEOUT
+        names = list(template_names)
+        started = self.monotonic()
+        use_model = transition is not None and settings.LATENCY_MODEL_ENABLED
+        if use_model:
+            # 按本机记录的耗时调整超时，并跳过界面不可能完成切换的最初一段时间
+            timeout = self.latency_model.timeout(transition, timeout)
+            delay = self.latency_model.initial_delay(transition)
+            if delay > 0:
+                self.sleep(min(delay, timeout))
+        deadline = started + timeout
+        backoff = interval is None
+        if backoff:
+            interval = settings.WAIT_POLL_MIN
+        while True:
+            screenshot = self.capture_screen()
+            # 操作后画面还没有变化时，找到的只会是操作前界面上的模板，先等待画面变化
+            if not self._settling(screenshot):
+                # 画面没有变化时复用上次找到的结果；未找到的结果只在画面完全相同时复用，
+                # 避免画面在容差内逐步变化时一直沿用旧的未找到结果
+                results = self.find_templates(screenshot, names, threshold=threshold, region=region, reuse=True,
+                                              reuse_misses=False)
+                for name in names:
+                    if results[name]:
+                        if use_model:
+                            self.latency_model.record(transition, self.monotonic() - started)
+                        return name, results[name]
+
+            remaining = deadline - self.monotonic()
+            if remaining <= 0:
+                if use_model:
+                    # 超时也说明了界面切换至少需要多久，记录下来让超时可以随之延长
+                    self.latency_model.record_timeout(transition, self.monotonic() - started)
+                raise ElementNotFoundError(names[0] if len(names) == 1 else ', '.join(names),
+                                           f"等待{timeout}秒后仍未找到模板: {', '.join(names)}")
+            self.sleep(min(interval, remaining))
+            # 逐渐拉长检测间隔
+            if backoff:
+                interval = min(interval * settings.WAIT_POLL_BACKOFF, settings.WAIT_POLL_MAX)
+
+    def _settling(self, screenshot):
+        """
+        判断画面是否仍停留在最近一次操作之前的样子
+
+        最近一次操作后画面已发生变化或已超过WAIT_SETTLE_TIMEOUT秒时返回False，之后不再检查，
+        操作本身没有引起画面变化时最多只会多等待WAIT_SETTLE_TIMEOUT秒
+        """
+        if self._action_print is None:
+            return False
+        if self.frame_changed(screenshot, self._action_print) \
+                or self.monotonic() - self._action_clock >= settings.WAIT_SETTLE_TIMEOUT:
+            self._action_print = None
+            return False
+        return True
+
+    @tracer.traced('identify_screen', 'match')
+    def identify_screen(self, frame=None, threshold=0.8, signatures=None):
+        """
+        识别当前所在的游戏界面
+
+        所有界面的特征模板在同一帧上一次性匹配。出现过的特征模板只在其历史位置附近的小区域内匹配，
+        从未出现过的模板使用金字塔匹配在整个画面中查找，画面没有变化时直接复用上次的结果；
+        无法识别时每隔ROI_FALLBACK_INTERVAL秒在整个画面中重新查找一次，以发现位置发生变化的模板
+
+        Args:
+            frame (numpy.ndarray): 屏幕截图，为None时重新截图
+            threshold (float): 匹配阈值
+            signatures (dict): {界面名称: 特征模板列表}，按识别优先级排列，默认使用SCREEN_SIGNATURES
+
+        Returns:
+            str: 界面名称，无法识别时返回None
+
+        Raises:
+            ImageRecognitionError: 图像识别失败时抛出
+        """
+        if frame is None:
+            frame = self.capture_screen()
+        if signatures is None:
+            signatures = SCREEN_SIGNATURES
+        names = [name for templates in signatures.values() for name in templates]
+        results = self.find_templates(frame, names, threshold=threshold, mode=MATCH_MODE_PYRAMID,
+                                      reuse=True, roi_only=True)
+        screen = self._match_signatures(signatures, results)
+        now = self.monotonic()
+        if screen is None and (self._last_full_identify is None
+                               or now - self._last_full_identify >= settings.ROI_FALLBACK_INTERVAL):
+            self._last_full_identify = now
+            results = self.find_templates(frame, names, threshold=threshold, mode=MATCH_MODE_PYRAMID,
+                                          reuse=True)
+            screen = self._match_signatures(signatures, results)
+        logger.debug(f"当前界面: {screen}" if screen else "无法识别当前界面")
+        return screen
+
+    @staticmethod
+    def _match_signatures(signatures, results):
+        """返回所有特征模板都已找到的第一个界面，没有时返回None"""
+        for screen, templates in signatures.items():
+            if all(results.get(name) for name in templates):
+                return screen
+        return None
+
+    def _get_executor(self):
+        """获取用于并发模板匹配的线程池，未指定线程数时使用共享线程池"""
+        if self._executor is None:
+            if self.max_workers:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ZOOTMatch')
             else:
+                self._executor = get_match_executor()
+        return self._executor
+
+    def submit(self, func, *args, **kwargs):
+        """
+        将独立的识别任务提交到检测器的线程池
+
+        Args:
+            func (callable): 要执行的函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            concurrent.futures.Future: 任务的Future对象
+        """
+        return self._get_executor().submit(func, *args, **kwargs)
+
+    def frame_fingerprint(self, frame):
+        """
+        获取画面指纹，同一帧只计算一次
+
+        Args:
+            frame (numpy.ndarray): 屏幕截图
+
+        Returns:
+            numpy.ndarray: 画面指纹
+        """
+        source, value = self._fingerprint_cache
+        if source is not frame:
+            value = frame_diff.fingerprint(frame)
+            self._fingerprint_cache = (frame, value)
+        return value
+
+    def frame_changed(self, frame, reference):
+        """
+        判断画面相对参考画面是否发生了明显变化
+
+        Args:
+            frame (numpy.ndarray): 当前屏幕截图
+            reference (numpy.ndarray): 参考截图或其画面指纹
+
+        Returns:
+            bool: 任一单元格像素差超过FRAME_DIFF_TOLERANCE时返回True
+        """
+        if reference is None:
+            return True
+        if reference.shape != frame_diff.FINGERPRINT_SIZE[::-1]:
+            reference = frame_diff.fingerprint(reference)
+        return frame_diff.is_changed(self.frame_fingerprint(frame), reference, settings.FRAME_DIFF_TOLERANCE)
+
+    def _match_template(self, screenshot, template_name, threshold, mode=None, reuse=False, roi_only=False,
+                        reuse_misses=True, region=None):
+        """
+        在截图中匹配单个模板，不判断是否超过阈值
+
+        roi_only为True时，有历史位置的模板在历史位置附近未命中即返回，不再进行全图匹配；
+        reuse_misses为False时，未超过阈值的结果只在画面指纹完全相同时复用；
+        screenshot为裁剪后的图像时需传入裁剪区域region，尺寸相同的不同区域不会共用复用结果
+
+        Returns:
+            tuple: (最大匹配值, 最佳匹配左上角坐标, 模板宽度, 模板高度)
+        """
+        # 画面与上次匹配该模板时几乎相同，直接复用上次结果
+        memo_key = None
+        if reuse:
+            current_print = self.frame_fingerprint(screenshot)
+            memo_key = (self._template_key(template_name), threshold, mode or self.match_mode, screenshot.shape, roi_only,
+                        tuple(region) if region else None)
+            memo = self._reuse_memo.get(memo_key)
+            tolerance = settings.FRAME_DIFF_TOLERANCE if reuse_misses or (memo and memo[1][0] >= threshold) else 0
+            if memo and not frame_diff.is_changed(memo[0], current_print, tolerance):
+                self.reuse_hits += 1
+                return memo[1]
+
+        # 从缓存加载模板（首次使用时才读取磁盘并解码）
+        template = self.load_template(template_name)
+
+        # 获取模板的宽度和高度
+        template_height, template_width = template.shape[:2]
+
+        # 完整屏幕截图优先在模板历史位置附近搜索
+        max_val, max_loc = -1.0, (0, 0)
+        index_key = None
+        roi = None
+        if settings.ROI_INDEX_ENABLED and self._frame_info(screenshot) is not None:
+            index_key = self._template_key(template_name)
+            resolution = (screenshot.shape[1], screenshot.shape[0])
+            roi = self.roi_index.lookup(index_key, resolution, (template_width, template_height),
+                                        settings.ROI_PADDING)
+            if roi:
+                x1, y1, x2, y2 = roi
+                max_val, roi_loc = self._match_full(screenshot[y1:y2, x1:x2], template)
+                max_loc = (x1 + roi_loc[0], y1 + roi_loc[1])
+
+        # 历史区域内未命中时进行全图匹配
+        if max_val < threshold and not (roi_only and roi):
+            if (mode or self.match_mode) == MATCH_MODE_PYRAMID:
+                max_val, max_loc = self._match_pyramid(screenshot, template_name, template, threshold)
+            else:
+                max_val, max_loc = self._match_full(screenshot, template)
+
+        # 只记录明显超过阈值的命中，勉强过阈值的可能是误匹配
+        if index_key and max_val >= min(threshold + settings.ROI_RECORD_MARGIN, 0.99):
+            self.roi_index.record(index_key, resolution, max_loc)
+        outcome = (max_val, max_loc, template_width, template_height)
+        if memo_key:
+            self._reuse_memo[memo_key] = (current_print, outcome)
+        return outcome
+
+    def _template_key(self, template_name):
+        """获取模板在位置索引中的名称（相对模板目录的路径）"""
+        template_path = os.path.normpath(os.path.join(self.template_dir, template_name))
+        return os.path.relpath(template_path, self.template_dir).replace(os.sep, '/')
+
+    def _match_full(self, screenshot, template):
+        """
+        在全分辨率彩色截图上进行模板匹配
+
+        Returns:
+            tuple: (最大匹配值, 最佳匹配左上角坐标)
+        """
+        result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(result)
+        return max_val, max_loc
+
+    def _match_pyramid(self, screenshot, template_name, template, threshold):
+        """
+        由粗到精的金字塔模板匹配
+
+        先在缩小的灰度截图上找出若干候选位置，再在原始彩色截图中候选位置附近的小窗口内
+        用原模板精确匹配，因此返回的匹配值与全分辨率匹配的含义一致
+
+        Returns:
+            tuple: (最大匹配值, 最佳匹配左上角坐标)
+        """
+        scale = settings.PYRAMID_SCALE
+        template_height, template_width = template.shape[:2]
+        small_template = self._get_pyramid_template(template_name, template, scale)
+        # 模板缩小后过小时粗匹配没有意义，直接使用全分辨率匹配
+        if min(small_template.shape[:2]) < 8:
+            return self._match_full(screenshot, template)
+
+        small_screen = self._get_pyramid_image(screenshot, scale)
+        coarse = cv2.matchTemplate(small_screen, small_template, cv2.TM_CCOEFF_NORMED)
+
+        # 粗匹配阈值适当放宽，避免缩放损失导致漏检
+        coarse_threshold = threshold - settings.PYRAMID_MARGIN
+        pad = int(np.ceil(2 / scale)) + 2
+        screen_height, screen_width = screenshot.shape[:2]
+        suppress_w = max(1, small_template.shape[1] // 2)
+        suppress_h = max(1, small_template.shape[0] // 2)
+
+        best_val, best_loc = -1.0, (0, 0)
+        for _ in range(settings.PYRAMID_CANDIDATES):
+            _, coarse_val, _, coarse_loc = cv2.minMaxLoc(coarse)
+            if coarse_val < coarse_threshold:
+                # 没有任何候选时返回粗匹配值，仅用于错误信息
+                if best_val < 0:
+                    best_val = coarse_val
+                    best_loc = (int(coarse_loc[0] / scale), int(coarse_loc[1] / scale))
+                break
+
+            # 在原图中候选位置附近的小窗口内精匹配
+            full_x = int(round(coarse_loc[0] / scale))
+            full_y = int(round(coarse_loc[1] / scale))
+            x1 = max(0, full_x - pad)
+            y1 = max(0, full_y - pad)
+            x2 = min(screen_width, full_x + template_width + pad)
+            y2 = min(screen_height, full_y + template_height + pad)
+            if x2 - x1 >= template_width and y2 - y1 >= template_height:
+                window = screenshot[y1:y2, x1:x2]
+                fine_val, fine_loc = self._match_full(window, template)
+                if fine_val > best_val:
+                    best_val = fine_val
+                    best_loc = (x1 + fine_loc[0], y1 + fine_loc[1])
+
+            # 抑制该候选附近的粗匹配结果，继续寻找下一个候选
+            cx, cy = coarse_loc
+            coarse[max(0, cy - suppress_h):cy + suppress_h + 1, max(0, cx - suppress_w):cx + suppress_w + 1] = -1.0
+
+        return best_val, best_loc
+
+    def _get_pyramid_template(self, template_name, template, scale):
+        """获取缩小后的灰度模板（缓存在模板缓存中）"""
+        template_path = os.path.normpath(os.path.join(self.template_dir, template_name))
+        return self.template_cache.get(
+            (template_path, 'pyramid', scale),
+            lambda _: self._downscale_gray(template, scale)
+        )
+
+    def _get_pyramid_image(self, screenshot, scale):
+        """获取缩小后的灰度截图，同一截图只转换一次"""
+        source, image = self._pyramid_cache
+        if source is not screenshot:
+            image = self._downscale_gray(screenshot, scale)
+            self._pyramid_cache = (screenshot, image)
+        return image
+
+    @staticmethod
+    def _downscale_gray(image, scale):
+        """将彩色图像转换为灰度并按比例缩小"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    def compare_match_modes(self, screenshot, template_name, threshold=0.8):
+        """
+        分别使用全分辨率匹配和金字塔匹配查找同一模板，对比两者的结果与耗时
+
+        Args:
+            screenshot (numpy.ndarray): 屏幕截图
+            template_name (str): 模板图像名称
+            threshold (float): 匹配阈值
+
+        Returns:
+            dict: 每种模式的结果，格式为 {模式: {'position': 坐标或None, 'elapsed': 耗时(秒)}}，
+                  以及两种模式中心点的像素偏差 'offset'（任一模式未找到时为None）
+        """
+        report = {}
+        for mode in (MATCH_MODE_FULL, MATCH_MODE_PYRAMID):
+            start = time.perf_counter()
+            try:
+                position = self.find_template(screenshot, template_name, threshold=threshold, mode=mode)
+            except ElementNotFoundError:
+                position = None
+            report[mode] = {'position': position, 'elapsed': time.perf_counter() - start}
+
+        full_pos = report[MATCH_MODE_FULL]['position']
+        pyramid_pos = report[MATCH_MODE_PYRAMID]['position']
+        if full_pos and pyramid_pos:
+            report['offset'] = max(abs(full_pos[0] - pyramid_pos[0]), abs(full_pos[1] - pyramid_pos[1]))
+        else:
+            report['offset'] = None
+
+        logger.info(
+            f"匹配模式对比 {template_name}: "
+            f"full={full_pos} ({report[MATCH_MODE_FULL]['elapsed'] * 1000:.1f}ms), "
+            f"pyramid={pyramid_pos} ({report[MATCH_MODE_PYRAMID]['elapsed'] * 1000:.1f}ms), "
+            f"偏差={report['offset']}"
+        )
+        return report
+
+    def save_image(self, image, filename=None, directory=None, wait=False):
+        """
+        保存图像到指定目录
+
+        图像交给后台写入线程编码保存，调用立即返回；格式和质量使用配置中的SCREENSHOT_FORMAT和SCREENSHOT_QUALITY
+
+        Args:
+            image (numpy.ndarray): 要保存的图像
+            filename (str): 图像文件名，如果为None则使用时间戳，扩展名会替换为配置的图像格式
+            directory (str): 保存目录，如果为None则保存到项目根目录下的logs文件夹
+            wait (bool): 是否等待图像写入磁盘后再返回
+
+        Returns:
+            str: 保存的文件路径，写入队列已满、图像被丢弃时返回None
+
+        Raises:
+            ImageRecognitionError: 图像保存失败时抛出
+        """
+        try:
+            # 设置文件名
+            if not filename:
                 # 使用时间戳作为文件名
                 timestamp = time.strftime('%Y%m%d%H%M%S')
-                filename = f'debug_{timestamp}.png'
+                filename = f'debug_{timestamp}'
 
             # 构建保存路径
-            save_path = os.path.join(save_dir, filename)
+            save_path = self.screenshot_writer.resolve_path(filename, directory)
 
             # 保存图像
-            cv2.imwrite(save_path, image)
-            logger.info(f"图像已保存到: {save_path}")
+            if not self.screenshot_writer.submit(image, save_path):
+                return None
+            if wait:
+                self.screenshot_writer.flush()
             return save_path
         except Exception as e:
             raise ImageRecognitionError(f"图像保存失败: {str(e)}") from e
 
-
-
     def find_color(self, screenshot, target_color, threshold=30):
         """
         在屏幕截图中查找指定颜色
@@ -249,7 +1108,7 @@ class Detector:
                     if M['m00'] > 0:
                         cx = int(M['m10'] / M['m00'])
                         cy = int(M['m01'] / M['m00'])
-                        centers.append((cx, cy))
+                        centers.append(self._to_screen(screenshot, cx, cy))
 
             return centers
         except Exception as e:
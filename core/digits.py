@@ -0,0 +1,240 @@
+"""
+数字识别模块
+使用缓存的数字字形图集在进程内识别游戏界面上的数字（如理智值），不依赖OCR和外部程序
+"""
+import os
+import threading
+import cv2
+import numpy as np
+from PIL import Image
+from utils.logger import logger
+
+# 获取项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 数字字形图片目录，文件名为字符本身（0.png-9.png），斜杠使用slash.png
+DIGITS_DIR = os.path.join(PROJECT_ROOT, 'templates', 'digits')
+# 字形统一缩放到的尺寸 (宽, 高)
+GLYPH_SIZE = (12, 18)
+# 图集中的字符及对应的文件名
+GLYPH_FILES = {str(digit): f'{digit}.png' for digit in range(10)}
+GLYPH_FILES['/'] = 'slash.png'
+
+
+class DigitRecognizer:
+    """
+    数字识别类
+
+    将图像二值化后按连通区域切分出单个字符，缩放到统一尺寸后与字形图集逐一计算归一化相关系数，
+    取最相似的字形作为识别结果。图集在首次使用时加载并缓存，之后每次识别只需几毫秒
+    """
+
+    def __init__(self, glyph_dir=DIGITS_DIR, min_score=0.6, min_height_ratio=0.6):
+        """
+        初始化数字识别器
+
+        Args:
+            glyph_dir (str): 数字字形图片目录，缺少的字形使用内置字体生成
+            min_score (float): 字符被接受的最低相似度，低于该值的区域（图标、符号等）会被忽略
+            min_height_ratio (float): 字符高度相对于最高区域的最小比例，用于过滤减号、小数点等干扰
+        """
+        self.glyph_dir = glyph_dir
+        self.min_score = min_score
+        self.min_height_ratio = min_height_ratio
+        self._lock = threading.Lock()
+        self._chars = None
+        self._atlas = None
+        self._generated = []
+
+    def _load(self):
+        """首次使用时加载字形图集（调用方需持有锁）"""
+        if self._atlas is not None:
+            return
+        chars, vectors, generated = [], [], []
+        for char, filename in GLYPH_FILES.items():
+            path = os.path.join(self.glyph_dir, filename) if self.glyph_dir else None
+            glyph = None
+            if path and os.path.exists(path):
+                try:
+                    # 使用PIL读取图片，以解决中文路径问题
+                    glyph = self._extract_glyph(np.array(Image.open(path).convert('L')))
+                except Exception as e:
+                    logger.warning(f"数字字形加载失败: {path}, {str(e)}")
+            if glyph is None:
+                glyph = self._render_glyph(char)
+                generated.append(char)
+            chars.append(char)
+            vectors.append(self._normalize(glyph))
+        if generated:
+            logger.warning(f"缺少数字字形图片，使用内置字体代替（识别准确率可能下降）: {' '.join(generated)}")
+        self._chars = chars
+        self._atlas = np.stack(vectors)
+        self._generated = generated
+
+    def missing_glyphs(self):
+        """
+        列出缺少字形图片、使用内置字体代替的字符
+
+        内置字体与游戏字体差别较大，缺少字形图片时识别结果不可靠，
+        不能用于决定作战次数等会产生实际消耗的操作
+
+        Returns:
+            list: 缺少字形图片的字符，图集完整时为空列表
+        """
+        with self._lock:
+            self._load()
+            return list(self._generated)
+
+    def reload(self):
+        """丢弃已缓存的字形图集，下次识别时重新加载"""
+        with self._lock:
+            self._chars = None
+            self._atlas = None
+
+    @staticmethod
+    def _render_glyph(char):
+        """使用OpenCV内置字体生成字形"""
+        canvas = np.zeros((40, 30), dtype=np.uint8)
+        cv2.putText(canvas, char, (3, 32), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 255, 2, cv2.LINE_AA)
+        return DigitRecognizer._extract_glyph(canvas)
+
+    @staticmethod
+    def _binarize(image):
+        """将图像转换为字符为白色、背景为黑色的二值图像"""
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # 字符占少数像素，白色像素占多数时说明背景更亮，需要反转
+        if cv2.countNonZero(binary) > binary.size // 2:
+            binary = cv2.bitwise_not(binary)
+        return binary
+
+    @staticmethod
+    def _extract_glyph(image):
+        """裁剪出图像中所有字符像素所在的最小区域"""
+        binary = DigitRecognizer._binarize(image)
+        points = cv2.findNonZero(binary)
+        if points is None:
+            return None
+        x, y, width, height = cv2.boundingRect(points)
+        return binary[y:y + height, x:x + width]
+
+    @staticmethod
+    def _normalize(glyph):
+        """将字形缩放到统一尺寸并归一化，两个向量的点积即为归一化相关系数"""
+        vector = cv2.resize(glyph, GLYPH_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+        vector -= vector.mean()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def segment(self, image):
+        """
+        按连通区域切分出图像中的字符
+
+        Args:
+            image (numpy.ndarray): BGR或灰度图像
+
+        Returns:
+            list: 按从左到右排序的字符二值图像列表
+        """
+        binary = self._binarize(image)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        boxes = [tuple(stats[index][:4]) for index in range(1, count) if stats[index][cv2.CC_STAT_AREA] >= 4]
+        if not boxes:
+            return []
+        max_height = max(box[3] for box in boxes)
+        boxes = sorted(box for box in boxes if box[3] >= max_height * self.min_height_ratio)
+
+        # 横向重叠的区域属于同一个字符（断开的笔画）
+        merged = []
+        for x, y, width, height in boxes:
+            if merged and x < merged[-1][0] + merged[-1][2]:
+                px, py, pw, ph = merged[-1]
+                x2, y2 = max(px + pw, x + width), max(py + ph, y + height)
+                px, py = min(px, x), min(py, y)
+                merged[-1] = (px, py, x2 - px, y2 - py)
+            else:
+                merged.append((x, y, width, height))
+        return [binary[y:y + height, x:x + width] for x, y, width, height in merged]
+
+    def read(self, image):
+        """
+        识别图像中的数字字符
+
+        Args:
+            image (numpy.ndarray): 只包含数字区域的BGR或灰度图像
+
+        Returns:
+            str: 识别出的字符（数字和斜杠），没有识别出任何字符时返回空字符串
+        """
+        glyphs = self.segment(image)
+        if not glyphs:
+            return ''
+        with self._lock:
+            self._load()
+            chars, atlas = self._chars, self._atlas
+        # 所有字符一次性与整个图集计算相似度
+        scores = np.stack([self._normalize(glyph) for glyph in glyphs]) @ atlas.T
+        best = scores.argmax(axis=1)
+        text = ''.join(chars[index] for row, index in enumerate(best) if scores[row, index] >= self.min_score)
+        logger.debug(f"数字识别结果: {text}，相似度: {np.round(scores.max(axis=1), 2).tolist()}")
+        return text
+
+    def read_int(self, image):
+        """
+        识别图像中的整数
+
+        Args:
+            image (numpy.ndarray): 只包含数字区域的BGR或灰度图像
+
+        Returns:
+            int: 识别出的整数，识别失败时返回None
+        """
+        digits = self.read(image).replace('/', '')
+        return int(digits) if digits else None
+
+    def read_fraction(self, image):
+        """
+        识别"当前值/上限"格式的数字
+
+        Args:
+            image (numpy.ndarray): 只包含数字区域的BGR或灰度图像
+
+        Returns:
+            tuple: (当前值, 上限)，识别失败时返回None
+        """
+        parts = self.read(image).split('/')
+        if len(parts) != 2 or not parts[0] or not parts[1]:
+            return None
+        return int(parts[0]), int(parts[1])
+
+    def save_glyphs(self, image, text):
+        """
+        从已知内容的截图中切分字符并保存为字形图片，用于制作与游戏字体一致的字形图集
+
+        Args:
+            image (numpy.ndarray): 只包含数字区域的BGR或灰度图像
+            text (str): 图像中的字符（数字和斜杠），需要与切分出的字符一一对应
+
+        Returns:
+            int: 保存的字形数量
+
+        Raises:
+            ValueError: 切分出的字符数量与text不一致时抛出
+        """
+        glyphs = self.segment(image)
+        if len(glyphs) != len(text):
+            raise ValueError(f"切分出 {len(glyphs)} 个字符，与给定内容 '{text}' 的长度不一致")
+        os.makedirs(self.glyph_dir, exist_ok=True)
+        saved = 0
+        for char, glyph in zip(text, glyphs):
+            filename = GLYPH_FILES.get(char)
+            if filename is None:
+                continue
+            Image.fromarray(glyph).save(os.path.join(self.glyph_dir, filename))
+            saved += 1
+        self.reload()
+        return saved
+
+
+# 所有模块默认共享的数字识别器
+digit_recognizer = DigitRecognizer()
@@ -52,3 +52,17 @@ class ConfigurationError(ZOOTException):
         self.message = message or f"配置错误: {config_name}"
         super().__init__(self.message)
 
+
+
+class ReplayFinishedError(ZOOTException):
+    """录制画面已回放完毕"""
+    def __init__(self, message="录制画面已回放完毕"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class OperationCancelledError(ZOOTException):
+    """操作已被用户取消"""
+    def __init__(self, message="操作已被用户取消"):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,150 @@
+"""
+飞行记录器模块
+在内存中循环保存最近若干帧缩小后的画面及其匹配结果和操作，流程失败时才写入磁盘用于排查问题
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+import cv2
+from utils.logger import logger
+from config.settings import settings
+
+# 获取项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 记录默认保存目录
+FLIGHT_RECORDER_DIR = os.path.join(PROJECT_ROOT, 'logs', 'flight')
+
+
+class FlightRecorder:
+    """
+    飞行记录器类
+
+    每条记录包含一帧缩小后的画面、在该画面上匹配的各模板的最高匹配值和位置，以及之后执行的操作。
+    记录数量固定，新记录覆盖最早的记录，占用的内存不会随运行时间增长；
+    两次记录画面之间至少间隔min_interval秒，间隔内的匹配结果和操作合并到最近的一条记录中。
+    同一帧按截图序号识别，不保留原始画面的引用（截图缓冲区会被复用，图像对象相同不代表画面相同）
+    """
+
+    def __init__(self, capacity=None, scale=None, min_interval=None, directory=FLIGHT_RECORDER_DIR, enabled=None):
+        """
+        初始化飞行记录器
+
+        Args:
+            capacity (int): 保留的记录数量，默认使用配置中的FLIGHT_RECORDER_FRAMES
+            scale (float): 画面缩放比例，默认使用配置中的FLIGHT_RECORDER_SCALE
+            min_interval (float): 两次记录画面之间的最短间隔(秒)，默认使用配置中的FLIGHT_RECORDER_INTERVAL
+            directory (str): 记录写入磁盘时的保存目录
+            enabled (bool): 是否启用，默认使用配置中的FLIGHT_RECORDER_ENABLED
+        """
+        self.capacity = capacity or settings.FLIGHT_RECORDER_FRAMES
+        self.scale = scale or settings.FLIGHT_RECORDER_SCALE
+        self.min_interval = settings.FLIGHT_RECORDER_INTERVAL if min_interval is None else min_interval
+        self.directory = directory
+        self.enabled = settings.FLIGHT_RECORDER_ENABLED if enabled is None else enabled
+        self._entries = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        # 最近一次记录的画面的截图序号，同一帧上的多次匹配合并到同一条记录
+        self._last_frame_id = None
+        self._last_time = 0.0
+
+    def _entry_for(self, frame, frame_id=None):
+        """获取画面对应的记录，需要时缩小画面并新建一条记录（调用方需持有锁）"""
+        now = time.time()
+        if self._entries and (frame is None or (frame_id is not None and frame_id == self._last_frame_id)
+                              or time.monotonic() - self._last_time < self.min_interval):
+            return self._entries[-1]
+        small = None
+        if frame is not None:
+            # 线性插值的画质足够排查问题，耗时只有INTER_AREA的几分之一
+            small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_LINEAR)
+            self._last_frame_id = frame_id
+            self._last_time = time.monotonic()
+        entry = {'time': now, 'frame': small, 'matches': {}, 'actions': []}
+        self._entries.append(entry)
+        return entry
+
+    def record_matches(self, frame, matches, frame_id=None):
+        """
+        记录一帧画面上的模板匹配结果
+
+        Args:
+            frame (numpy.ndarray): 完整画面
+            matches (dict): {模板名称: (最高匹配值, (x, y))}，模板不存在时匹配值为None
+            frame_id (int): 画面的截图序号，与上一条记录相同时合并到上一条记录；为None时只按时间间隔合并
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entry_for(frame, frame_id)
+            entry['matches'].update(matches)
+
+    def record_action(self, description, point=None):
+        """
+        记录一次操作，合并到最近的一条记录中
+
+        Args:
+            description (str): 操作描述
+            point (tuple): 操作位置的屏幕坐标 (x, y)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entry_for(None)
+            entry['actions'].append({'time': time.time(), 'action': description,
+                                     'point': list(point) if point else None})
+
+    def clear(self):
+        """清空所有记录"""
+        with self._lock:
+            self._entries.clear()
+            self._last_frame_id = None
+
+    def dump(self, reason):
+        """
+        将当前所有记录写入磁盘，每条记录的画面保存为一张图片，匹配结果和操作保存在events.json中
+
+        Args:
+            reason (str): 写入原因（如失败的流程名称），用于目录名和events.json
+
+        Returns:
+            str: 写入的目录，没有任何记录或写入失败时返回None
+        """
+        with self._lock:
+            entries = list(self._entries)
+        if not entries:
+            return None
+        safe_reason = ''.join(c if c.isalnum() or c in '-_' else '_' for c in reason)[:40]
+        dump_dir = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}_{safe_reason}")
+        try:
+            os.makedirs(dump_dir, exist_ok=True)
+            events = []
+            for index, entry in enumerate(entries):
+                image_name = None
+                if entry['frame'] is not None:
+                    image_name = f'{index:03d}.jpg'
+                    ok, buffer = cv2.imencode('.jpg', entry['frame'], [cv2.IMWRITE_JPEG_QUALITY, 85])
+                    if ok:
+                        # 先编码再写入文件，避免cv2.imwrite无法处理中文路径
+                        with open(os.path.join(dump_dir, image_name), 'wb') as f:
+                            f.write(buffer.tobytes())
+                events.append({
+                    'time': time.strftime('%H:%M:%S', time.localtime(entry['time'])) + f"{entry['time'] % 1:.3f}"[1:],
+                    'frame': image_name,
+                    'matches': {name: {'score': None if score is None else round(float(score), 4),
+                                       'position': list(position) if position else None}
+                                for name, (score, position) in entry['matches'].items()},
+                    'actions': entry['actions'],
+                })
+            with open(os.path.join(dump_dir, 'events.json'), 'w', encoding='utf-8') as f:
+                json.dump({'reason': reason, 'scale': self.scale, 'events': events}, f, ensure_ascii=False, indent=2)
+            logger.info(f"飞行记录已保存到: {dump_dir}")
+            return dump_dir
+        except Exception as e:
+            logger.warning(f"飞行记录保存失败: {str(e)}")
+            return None
+
+
+# 所有检测器默认共享的飞行记录器
+flight_recorder = FlightRecorder()
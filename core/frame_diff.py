@@ -0,0 +1,64 @@
+"""
+画面变化检测模块
+通过缩小后的灰度指纹快速判断两帧画面是否发生了明显变化
+"""
+import cv2
+import numpy as np
+
+# 指纹尺寸 (宽, 高)，与常见16:9屏幕比例一致
+FINGERPRINT_SIZE = (64, 36)
+
+
+def fingerprint(image, size=FINGERPRINT_SIZE):
+    """
+    计算图像的画面指纹
+
+    Args:
+        image (numpy.ndarray): BGR、BGRA或灰度图像
+        size (tuple): 指纹尺寸 (宽, 高)
+
+    Returns:
+        numpy.ndarray: 缩小后的灰度图像 (int16)，用于快速比较
+    """
+    if image.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        # 先缩小再转灰度，转换的像素数量更少
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, code)
+    else:
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return small.astype(np.int16)
+
+
+def difference(fingerprint_a, fingerprint_b):
+    """
+    计算两个指纹之间的最大单元格差值
+
+    指纹的每个像素对应原画面中的一个小方格，取最大差值而不是平均差值，
+    这样即使只有一个按钮大小的区域发生变化也能被发现
+
+    Args:
+        fingerprint_a (numpy.ndarray): 指纹A
+        fingerprint_b (numpy.ndarray): 指纹B
+
+    Returns:
+        float: 最大单元格绝对差 (0-255)，尺寸不一致时返回255
+    """
+    if fingerprint_a is None or fingerprint_b is None or fingerprint_a.shape != fingerprint_b.shape:
+        return 255.0
+    return float(np.max(np.abs(fingerprint_a - fingerprint_b)))
+
+
+def is_changed(fingerprint_a, fingerprint_b, tolerance):
+    """
+    判断两个指纹对应的画面是否发生了明显变化
+
+    Args:
+        fingerprint_a (numpy.ndarray): 指纹A
+        fingerprint_b (numpy.ndarray): 指纹B
+        tolerance (float): 允许的单元格像素差，超过时认为画面已变化
+
+    Returns:
+        bool: 画面已变化返回True
+    """
+    return difference(fingerprint_a, fingerprint_b) > tolerance
@@ -0,0 +1,215 @@
+"""
+界面响应时间模型模块
+记录每种界面切换实际花费的时间，并据此推算等待超时和首次检测延迟
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import numpy as np
+from utils.logger import logger
+from config.settings import settings
+
+# 获取项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 响应时间记录文件路径
+LATENCY_MODEL_PATH = os.path.join(PROJECT_ROOT, 'data', 'latency.json')
+
+
+class LatencyModel:
+    """
+    界面响应时间模型类，按界面切换名称保存最近若干次的耗时并计算分位数
+
+    等待超时的次数单独记录为删失样本（实际耗时不短于记录值），推算超时时计入，
+    推算首次检测延迟时不计入
+    """
+
+    def __init__(self, path=LATENCY_MODEL_PATH, max_samples=50, save_interval=5.0):
+        """
+        初始化界面响应时间模型
+
+        Args:
+            path (str): 记录文件路径，为None时仅保存在内存中
+            max_samples (int): 每种界面切换保留的最近耗时数量
+            save_interval (float): 两次写入磁盘之间的最短间隔(秒)
+        """
+        self.path = path
+        self.max_samples = max_samples
+        self.save_interval = save_interval
+        self._samples = {}
+        self._timeouts = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._last_save = 0.0
+        atexit.register(self.save)
+
+    def _load(self):
+        """首次使用时从磁盘加载记录（调用方需持有锁）"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._samples = {name: [float(value) for value in values][-self.max_samples:]
+                             for name, values in data.get('transitions', {}).items()}
+            self._timeouts = {name: [float(value) for value in values][-self.max_samples:]
+                              for name, values in data.get('timeouts', {}).items()}
+        except Exception as e:
+            logger.warning(f"界面响应时间记录加载失败，将重新记录: {str(e)}")
+            self._samples = {}
+            self._timeouts = {}
+
+    def record(self, transition, seconds):
+        """
+        记录一次界面切换的耗时
+
+        Args:
+            transition (str): 界面切换名称
+            seconds (float): 耗时(秒)
+        """
+        self._append(self._samples, transition, seconds)
+
+    def record_timeout(self, transition, seconds):
+        """
+        记录一次等待超时，界面切换实际耗时不短于等待的时间
+
+        Args:
+            transition (str): 界面切换名称
+            seconds (float): 超时前已等待的时间(秒)
+        """
+        self._append(self._timeouts, transition, seconds)
+
+    def _append(self, records, transition, seconds):
+        """向记录中追加一个耗时，只保留最近max_samples个"""
+        with self._lock:
+            self._load()
+            samples = records.setdefault(transition, [])
+            samples.append(round(float(seconds), 4))
+            del samples[:-self.max_samples]
+            self._dirty = True
+            should_save = time.monotonic() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def percentile(self, transition, q, include_timeouts=False):
+        """
+        计算界面切换耗时的分位数
+
+        Args:
+            transition (str): 界面切换名称
+            q (float): 分位数 (0-100)
+            include_timeouts (bool): 是否计入超时记录（按已等待的时间计），计入后分位数只会偏大
+
+        Returns:
+            float: 耗时分位数(秒)，记录次数不足LATENCY_MIN_SAMPLES时返回None
+        """
+        with self._lock:
+            self._load()
+            samples = list(self._samples.get(transition, ()))
+            if include_timeouts:
+                samples += self._timeouts.get(transition, ())
+        if len(samples) < settings.LATENCY_MIN_SAMPLES:
+            return None
+        return float(np.percentile(samples, q))
+
+    def timeout(self, transition, default):
+        """
+        推算等待界面切换完成的超时时间
+
+        超时按95分位耗时推算，响应快的界面切换可以短于调用方给出的超时，但不短于LATENCY_MIN_TIMEOUT；
+        超时记录计入95分位耗时，经常超时的界面切换超时会逐渐延长，但不超过调用方超时的LATENCY_TIMEOUT_FACTOR倍
+
+        Args:
+            transition (str): 界面切换名称
+            default (float): 调用方给出的超时时间(秒)，记录不足时直接使用
+
+        Returns:
+            float: 超时时间(秒)，为95分位耗时乘以LATENCY_TIMEOUT_FACTOR，
+                   且在LATENCY_MIN_TIMEOUT与default的LATENCY_TIMEOUT_FACTOR倍之间
+        """
+        p95 = self.percentile(transition, 95, include_timeouts=True)
+        if p95 is None:
+            return default
+        learned = max(p95 * settings.LATENCY_TIMEOUT_FACTOR, settings.LATENCY_MIN_TIMEOUT)
+        return min(learned, default * settings.LATENCY_TIMEOUT_FACTOR)
+
+    def initial_delay(self, transition):
+        """
+        推算操作后首次检测前的等待时间，界面切换不可能比过去最快的几次更快完成
+
+        Args:
+            transition (str): 界面切换名称
+
+        Returns:
+            float: 首次检测前的等待时间(秒)，记录不足时返回0
+        """
+        p10 = self.percentile(transition, 10)
+        if p10 is None:
+            return 0.0
+        return p10 * 0.8
+
+    def summary(self):
+        """
+        获取所有界面切换的耗时统计
+
+        Returns:
+            dict: {界面切换名称: {'count': 次数, 'p50': 中位数, 'p95': 95分位数, 'timeouts': 超时次数}}
+        """
+        with self._lock:
+            self._load()
+            samples = {name: list(values) for name, values in self._samples.items()}
+            timeouts = {name: len(values) for name, values in self._timeouts.items()}
+        return {
+            name: {
+                'count': len(values),
+                'p50': float(np.percentile(values, 50)),
+                'p95': float(np.percentile(values, 95)),
+                'timeouts': timeouts.get(name, 0),
+            }
+            for name, values in samples.items() if values
+        }
+
+    def reset(self, transition=None):
+        """
+        清空耗时记录
+
+        Args:
+            transition (str): 要清空的界面切换名称，为None时清空全部
+        """
+        with self._lock:
+            self._loaded = True
+            if transition is None:
+                self._samples = {}
+                self._timeouts = {}
+            else:
+                self._samples.pop(transition, None)
+                self._timeouts.pop(transition, None)
+            self._dirty = True
+
+    def save(self):
+        """将记录写入磁盘"""
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            data = {'transitions': {name: list(values) for name, values in self._samples.items()},
+                    'timeouts': {name: list(values) for name, values in self._timeouts.items()}}
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # 先写入临时文件再替换，避免中途退出导致记录文件损坏
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"界面响应时间记录保存失败: {str(e)}")
+
+
+# 所有检测器默认共享的界面响应时间模型
+latency_model = LatencyModel()
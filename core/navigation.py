@@ -0,0 +1,171 @@
+"""
+界面导航模块
+根据声明式的界面导航图，从当前识别到的界面沿最短路径点击到目标界面
+"""
+import heapq
+import threading
+from .exceptions import ElementNotFoundError, OperationFailedError
+from .screens import NAVIGATION_EDGES, SCREEN_SIGNATURES, KEY_STEP_PREFIX
+from .tracing import tracer
+from utils.logger import logger
+from config.settings import settings
+
+
+class Navigator:
+    """界面导航类，计算并缓存界面之间的最短路径，逐步点击并在每一步后重新识别所在界面"""
+
+    def __init__(self, detector, controller, edges=None, signatures=None):
+        """
+        初始化界面导航
+
+        Args:
+            detector (Detector): 检测器实例
+            controller (Controller): 控制器实例
+            edges (dict): 界面导航图，默认使用NAVIGATION_EDGES
+            signatures (dict): 各界面的特征模板，默认使用SCREEN_SIGNATURES
+        """
+        self.detector = detector
+        self.controller = controller
+        self.edges = edges or NAVIGATION_EDGES
+        self.signatures = signatures or SCREEN_SIGNATURES
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _parse_step(step):
+        """将导航步骤统一为(模板名称, 横向偏移, 纵向偏移)"""
+        if isinstance(step, str):
+            return step, 0, 0
+        return step
+
+    def route(self, source, target):
+        """
+        计算两个界面之间点击步骤最少的路径，结果会被缓存
+
+        Args:
+            source (str): 起始界面
+            target (str): 目标界面
+
+        Returns:
+            list: 依次经过的界面（包含起始和目标界面），不可达时返回None
+        """
+        key = (source, target)
+        with self._lock:
+            if key in self._routes:
+                return self._routes[key]
+
+        # 图很小，直接使用Dijkstra算法
+        queue = [(0, source, [source])]
+        visited = set()
+        path = None
+        while queue:
+            cost, screen, screens = heapq.heappop(queue)
+            if screen == target:
+                path = screens
+                break
+            if screen in visited:
+                continue
+            visited.add(screen)
+            for neighbour, steps in self.edges.get(screen, {}).items():
+                if neighbour not in visited:
+                    heapq.heappush(queue, (cost + len(steps), neighbour, screens + [neighbour]))
+
+        with self._lock:
+            self._routes[key] = path
+        return path
+
+    @tracer.traced()
+    def wait_screen(self, timeout=None, threshold=0.8, expected=None, transition=None):
+        """
+        等待画面稳定在可识别的界面上
+
+        Args:
+            timeout (float): 最长等待时间(秒)，默认使用配置中的WAIT_TIMEOUT
+            threshold (float): 匹配阈值
+            expected (str): 期望出现的界面，识别到该界面时立即返回；为None时识别到任意界面即返回
+            transition (str): 界面切换名称，指定时记录等到期望界面的耗时，并按历史耗时推算超时和首次检测延迟
+
+        Returns:
+            str: 识别到的界面，超时时返回最后一次识别的结果（可能为None）
+        """
+        if timeout is None:
+            timeout = settings.WAIT_TIMEOUT
+        started = self.detector.monotonic()
+        latency_model = self.detector.latency_model
+        use_model = transition is not None and settings.LATENCY_MODEL_ENABLED
+        if use_model:
+            timeout = latency_model.timeout(transition, timeout)
+            delay = latency_model.initial_delay(transition)
+            if delay > 0:
+                self.detector.sleep(min(delay, timeout))
+        deadline = started + timeout
+        interval = settings.WAIT_POLL_MIN
+        screen = None
+        while True:
+            screen = self.detector.identify_screen(threshold=threshold, signatures=self.signatures)
+            if screen is not None and (expected is None or screen == expected):
+                if use_model:
+                    latency_model.record(transition, self.detector.monotonic() - started)
+                return screen
+            remaining = deadline - self.detector.monotonic()
+            if remaining <= 0:
+                if use_model:
+                    latency_model.record_timeout(transition, self.detector.monotonic() - started)
+                return screen
+            self.detector.sleep(min(interval, remaining))
+            interval = min(interval * settings.WAIT_POLL_BACKOFF, settings.WAIT_POLL_MAX)
+
+    @tracer.traced()
+    def _follow_edge(self, source, target, threshold):
+        """执行从一个界面到相邻界面的点击和按键步骤"""
+        steps = [self._parse_step(step) for step in self.edges[source][target]]
+        for index, (template, offset_x, offset_y) in enumerate(steps):
+            if template.startswith(KEY_STEP_PREFIX):
+                self.controller.press_key(template[len(KEY_STEP_PREFIX):])
+                continue
+            # 第一个步骤的模板已在当前界面上，之后的步骤等待上一次点击弹出的元素
+            transition = f'{source}->{target}/{index}' if index else None
+            x, y, _, _ = self.detector.wait_for(template, threshold=threshold, transition=transition)
+            self.controller.click(x + offset_x, y + offset_y)
+
+    @tracer.traced()
+    def navigate(self, target, threshold=0.8, timeout=None, source=None, max_steps=12):
+        """
+        从当前界面导航到目标界面
+
+        每走一步都重新识别所在界面，点击未生效或进入了意料之外的界面时从实际所在界面重新规划路径
+
+        Args:
+            target (str): 目标界面
+            threshold (float): 模板匹配阈值
+            timeout (float): 每一步等待下一个界面出现的最长时间(秒)，默认使用配置中的WAIT_TIMEOUT
+            source (str): 已知的当前界面，为None时自动识别
+            max_steps (int): 最多经过的界面数量
+
+        Returns:
+            bool: 到达目标界面返回True
+
+        Raises:
+            ElementNotFoundError: 无法识别当前界面或找不到导航按钮时抛出
+            OperationFailedError: 当前界面无法到达目标界面或步数超出限制时抛出
+        """
+        screen = source or self.wait_screen(threshold=threshold)
+        for _ in range(max_steps):
+            if screen is None:
+                raise ElementNotFoundError('screen', "无法识别当前界面")
+            if screen == target:
+                logger.info(f"已到达界面: {target}")
+                return True
+            path = self.route(screen, target)
+            if path is None:
+                raise OperationFailedError("界面导航", f"无法从界面 {screen} 到达 {target}")
+            logger.info(f"界面导航: {' -> '.join(path)}")
+            self._follow_edge(screen, path[1], threshold)
+            # 与识别界面使用同样的判定（特征模板全部出现），超时后按实际所在的界面重新规划
+            arrived = self.wait_screen(timeout=timeout, threshold=threshold, expected=path[1],
+                                       transition=f'{screen}->{path[1]}')
+            if arrived != path[1]:
+                logger.warning(f"点击后未进入界面 {path[1]}，重新识别当前界面")
+                arrived = arrived or self.wait_screen(threshold=threshold)
+            screen = arrived
+        raise OperationFailedError("界面导航", f"经过 {max_steps} 步仍未到达界面 {target}")
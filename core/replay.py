@@ -0,0 +1,387 @@
+"""
+画面录制与回放模块
+将屏幕画面按块录制到磁盘，并以内存映射的方式回放，代替实时截图用于离线测试和性能评估
+"""
+import bisect
+import json
+import os
+import threading
+import time
+import cv2
+import numpy as np
+from numpy.lib.format import open_memmap
+from .capture import COLOR_BGR, COLOR_BGRA, COLOR_GRAY
+from .controller import Controller
+from .exceptions import ReplayFinishedError
+from utils.logger import logger
+
+# 录制目录中的索引文件名
+INDEX_FILENAME = 'index.json'
+# 录制格式版本
+FORMAT_VERSION = 1
+
+
+class FrameRecorder:
+    """
+    画面录制类
+
+    画面以BGR格式写入按块划分的.npy文件，每个块保存chunk_size帧同尺寸的画面，
+    块文件通过内存映射直接写入磁盘，录制过程中只占用很少的内存
+    """
+
+    def __init__(self, path, chunk_size=32, monitor=None):
+        """
+        初始化画面录制
+
+        Args:
+            path (str): 录制目录，不存在时自动创建
+            chunk_size (int): 每个块文件保存的帧数
+            monitor (dict): 录制的显示器区域 {'left', 'top', 'width', 'height'}
+        """
+        self.path = path
+        self.chunk_size = max(1, int(chunk_size))
+        self.monitor = dict(monitor) if monitor else None
+        self._lock = threading.Lock()
+        self._chunks = []
+        self._frames = []
+        self._chunk = None
+        self._chunk_used = 0
+        self._start = None
+        os.makedirs(path, exist_ok=True)
+
+    @property
+    def frame_count(self):
+        """已录制的帧数"""
+        return len(self._frames)
+
+    def record(self, frame, timestamp=None):
+        """
+        录制一帧画面
+
+        Args:
+            frame (numpy.ndarray): BGR或BGRA格式的画面
+            timestamp (float): 截图时间time.monotonic()，默认为当前时间
+        """
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        with self._lock:
+            if self._start is None:
+                self._start = timestamp
+            # 当前块已写满或画面尺寸变化时开始新的块
+            if self._chunk is None or self._chunk_used >= self.chunk_size or self._chunk.shape[1:] != frame.shape:
+                self._close_chunk()
+                filename = f'chunk_{len(self._chunks):05d}.npy'
+                self._chunk = open_memmap(os.path.join(self.path, filename), mode='w+', dtype=np.uint8,
+                                          shape=(self.chunk_size,) + frame.shape)
+                self._chunks.append({'file': filename, 'count': 0})
+                self._chunk_used = 0
+
+            self._chunk[self._chunk_used] = frame
+            self._frames.append({
+                'chunk': len(self._chunks) - 1,
+                'offset': self._chunk_used,
+                'timestamp': round(timestamp - self._start, 4),
+            })
+            self._chunk_used += 1
+            self._chunks[-1]['count'] = self._chunk_used
+
+    def _close_chunk(self):
+        """将当前块写入磁盘并更新索引（调用方需持有锁）"""
+        if self._chunk is None:
+            return
+        self._chunk.flush()
+        self._chunk = None
+        self._write_index()
+
+    def _write_index(self):
+        """写入录制索引（调用方需持有锁）"""
+        data = {
+            'version': FORMAT_VERSION,
+            'monitor': self.monitor,
+            'chunks': self._chunks,
+            'frames': self._frames,
+        }
+        temp_path = os.path.join(self.path, INDEX_FILENAME + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, os.path.join(self.path, INDEX_FILENAME))
+
+    def close(self):
+        """结束录制，写入最后一个块和索引"""
+        with self._lock:
+            self._close_chunk()
+            self._write_index()
+        logger.info(f"画面录制完成，共 {len(self._frames)} 帧: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class RecordingCapture:
+    """
+    边截图边录制的屏幕捕获会话
+
+    包装一个屏幕捕获会话，将其中所有整屏截图同时写入录制目录，可直接传给Detector的capture_session参数
+    """
+
+    def __init__(self, session, recorder):
+        """
+        初始化录制会话
+
+        Args:
+            session (ScreenCapture): 实际执行截图的会话
+            recorder (FrameRecorder): 画面录制
+        """
+        self.session = session
+        self.recorder = recorder
+        if self.recorder.monitor is None:
+            self.recorder.monitor = session.monitor()
+
+    def monitor(self):
+        """获取捕获的显示器区域"""
+        return self.session.monitor()
+
+    def grab(self, region=None, color=COLOR_BGR):
+        """捕获屏幕图像，整屏的彩色截图会被同时录制"""
+        image = self.session.grab(region, color)
+        if not region and color in (COLOR_BGR, COLOR_BGRA):
+            self.recorder.record(image)
+        return image
+
+    def close(self):
+        """结束录制并释放截图会话"""
+        self.recorder.close()
+        self.session.close()
+
+
+class ReplayCapture:
+    """
+    录制画面回放类
+
+    实现与ScreenCapture相同的接口，可直接传给Detector的capture_session参数代替实时截图。
+    块文件以内存映射方式打开，只有实际回放到的画面才会从磁盘读取
+    """
+
+    def __init__(self, path, realtime=False, speed=1.0, loop=False):
+        """
+        初始化录制画面回放
+
+        Args:
+            path (str): 录制目录
+            realtime (bool): 是否按录制时的时间间隔回放；为False时每次截图前进一帧，尽可能快地回放
+            speed (float): 按时间回放时的播放速度倍数
+            loop (bool): 回放完毕后是否从头开始，为False时回放完毕后截图会抛出ReplayFinishedError
+
+        Raises:
+            FileNotFoundError: 录制索引不存在时抛出
+        """
+        index_path = os.path.join(path, INDEX_FILENAME)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"录制索引不存在: {index_path}")
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.path = path
+        self.realtime = realtime
+        self.speed = float(speed)
+        self.loop = loop
+        self._monitor = data.get('monitor')
+        self._chunk_files = [chunk['file'] for chunk in data['chunks']]
+        self._frames = [(frame['chunk'], frame['offset']) for frame in data['frames']]
+        self._timestamps = [frame['timestamp'] for frame in data['frames']]
+        if not self._frames:
+            raise ReplayFinishedError(f"录制中没有任何画面: {path}")
+        self._chunks = {}
+        self._lock = threading.Lock()
+        self._position = 0
+        self._start = None
+        self.frames_served = 0
+
+    @property
+    def frame_count(self):
+        """录制的总帧数"""
+        return len(self._frames)
+
+    @property
+    def position(self):
+        """下一次截图将返回的帧序号"""
+        return self._position
+
+    def rewind(self):
+        """回到第一帧重新开始回放"""
+        with self._lock:
+            self._position = 0
+            self._start = None
+
+    def monitor(self):
+        """
+        获取录制时的显示器区域
+
+        Returns:
+            dict: 显示器区域 {'left', 'top', 'width', 'height'}
+        """
+        if self._monitor:
+            return dict(self._monitor)
+        chunk_index, _ = self._frames[0]
+        height, width = self._get_chunk(chunk_index).shape[1:3]
+        return {'left': 0, 'top': 0, 'width': width, 'height': height}
+
+    def _get_chunk(self, chunk_index):
+        """以内存映射方式打开块文件（首次使用时打开）"""
+        chunk = self._chunks.get(chunk_index)
+        if chunk is None:
+            chunk = np.load(os.path.join(self.path, self._chunk_files[chunk_index]), mmap_mode='r')
+            self._chunks[chunk_index] = chunk
+        return chunk
+
+    def _next_index(self):
+        """计算本次截图应返回的帧序号（调用方需持有锁）"""
+        if not self.realtime:
+            index = self._position
+            if index >= len(self._frames):
+                if not self.loop:
+                    raise ReplayFinishedError()
+                index = 0
+            self._position = index + 1
+            return index
+
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        elapsed = (now - self._start) * self.speed
+        duration = self._timestamps[-1]
+        if elapsed > duration:
+            if not self.loop:
+                # 最后一帧保持到与前一帧相同的间隔后结束
+                tail = duration - self._timestamps[-2] if len(self._timestamps) > 1 else 0.0
+                if elapsed > duration + tail:
+                    raise ReplayFinishedError()
+            elif duration > 0:
+                elapsed %= duration
+        index = max(0, bisect.bisect_right(self._timestamps, elapsed) - 1)
+        self._position = index + 1
+        return index
+
+    def grab(self, region=None, color=COLOR_BGR):
+        """
+        返回当前回放位置的画面
+
+        Args:
+            region (tuple): 捕获区域 (x, y, width, height)，为None时返回整个画面
+            color (str): 返回的颜色格式，'bgr'、'gray'或'bgra'
+
+        Returns:
+            numpy.ndarray: 回放的画面
+
+        Raises:
+            ReplayFinishedError: 录制画面已回放完毕时抛出
+        """
+        with self._lock:
+            chunk_index, offset = self._frames[self._next_index()]
+            frame = self._get_chunk(chunk_index)[offset]
+            self.frames_served += 1
+
+        if region:
+            monitor = self.monitor()
+            x, y = region[0] - monitor['left'], region[1] - monitor['top']
+            frame = frame[y:y + region[3], x:x + region[2]]
+
+        if color == COLOR_BGR:
+            # 从内存映射中复制出来，返回的图像可以随意修改
+            return np.array(frame)
+        if color == COLOR_GRAY:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if color == COLOR_BGRA:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+        raise ValueError(f"不支持的颜色格式: {color}")
+
+    def close(self):
+        """关闭所有已打开的块文件"""
+        with self._lock:
+            self._chunks.clear()
+
+
+class VirtualClock:
+    """
+    虚拟时钟类
+
+    等待时只把时间向前拨，不真正休眠。逐帧回放时传给Detector的clock参数，
+    流程中的固定等待和检测间隔都不再按实际时间消耗，回放速度只取决于识别本身
+    """
+
+    def __init__(self, start=0.0):
+        """
+        初始化虚拟时钟
+
+        Args:
+            start (float): 起始时间(秒)
+        """
+        self._now = float(start)
+        self._lock = threading.Lock()
+        self.slept = 0.0
+
+    def monotonic(self):
+        """当前虚拟时间(秒)，与time.monotonic()的用法相同"""
+        with self._lock:
+            return self._now
+
+    def sleep(self, seconds):
+        """
+        等待指定时间，立即返回
+
+        Args:
+            seconds (float): 等待时间(秒)
+        """
+        seconds = max(0.0, seconds)
+        with self._lock:
+            self._now += seconds
+            self.slept += seconds
+
+
+class NullController(Controller):
+    """
+    空控制器类
+
+    不操作鼠标和键盘，只记录收到的操作，用于在没有图形界面的环境中配合画面回放运行各模块的流程
+    """
+
+    def __init__(self, delay=0.0, clock=None):
+        """
+        初始化空控制器
+
+        Args:
+            delay (float): 每次操作后的延迟时间(秒)
+            clock (VirtualClock): 虚拟时钟，指定时操作后的延迟只拨动虚拟时间
+        """
+        self.delay = delay
+        self.clock = clock
+        self.detector = None
+        self.verify = False
+        self.move_duration = 0.0
+        self.actions = []
+
+    def _record(self, action, *args):
+        """记录一次操作"""
+        self.actions.append((action,) + args)
+        logger.debug(f"空控制器收到操作: {action} {args}")
+        if self.delay:
+            (self.clock or time).sleep(self.delay)
+        return True
+
+    def click(self, x, y, clicks=1, interval=0.2, verify=None, retry=False):
+        return self._record('click', x, y, clicks)
+
+    def press_key(self, key, presses=1, interval=0.2, verify=None, retry=False):
+        return self._record('press_key', key, presses)
+
+    def drag(self, start_x, start_y, end_x, end_y, duration=1.0, verify=None, retry=False):
+        return self._record('drag', start_x, start_y, end_x, end_y)
+
+    def scroll(self, clicks, x=None, y=None, verify=None, retry=False):
+        return self._record('scroll', clicks, x, y)
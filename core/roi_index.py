@@ -0,0 +1,190 @@
+"""
+模板位置索引模块
+记录每个模板过去出现的位置，匹配时优先在历史位置附近的小区域内搜索
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from utils.logger import logger
+from config.settings import settings
+
+# 获取项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 位置索引文件路径
+ROI_INDEX_PATH = os.path.join(PROJECT_ROOT, 'data', 'roi_index.json')
+# 最多保留位置记录的分辨率数量，超出时丢弃最久未使用的分辨率
+MAX_RESOLUTIONS = 8
+
+
+class RoiIndex:
+    """
+    模板位置索引类，按屏幕分辨率持久化保存每个模板最近若干次的命中位置
+
+    搜索区域为最近几次命中位置的包围框，旧的命中位置会被新的挤出，
+    偶尔出现的误匹配或模板位置变化不会让搜索区域永久扩大。
+    各分辨率的记录相互独立，在窗口截图和全屏截图之间切换时不会丢失已有记录
+    """
+
+    def __init__(self, path=ROI_INDEX_PATH, save_interval=5.0, history_size=None):
+        """
+        初始化模板位置索引
+
+        Args:
+            path (str): 索引文件路径，为None时仅保存在内存中
+            save_interval (float): 两次写入磁盘之间的最短间隔(秒)
+            history_size (int): 每个模板保留的最近命中位置数量，默认使用配置中的ROI_HISTORY_SIZE
+        """
+        self.path = path
+        self.save_interval = save_interval
+        self.history_size = history_size or settings.ROI_HISTORY_SIZE
+        # {'宽x高': {模板名称: [[x, y], ...]}}，按最近使用的顺序排列
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._last_save = 0.0
+        atexit.register(self.save)
+
+    def _load(self):
+        """首次使用时从磁盘加载索引（调用方需持有锁）"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            resolutions = data.get('resolutions')
+            if resolutions is None and data.get('resolution'):
+                # 旧版本只保存一种分辨率的记录
+                resolutions = {self._resolution_key(data['resolution']): data.get('templates', {})}
+            self._entries = {key: self._valid_hits(templates) for key, templates in (resolutions or {}).items()}
+        except Exception as e:
+            logger.warning(f"模板位置索引加载失败，将重新建立: {str(e)}")
+            self._entries = {}
+
+    def _valid_hits(self, templates):
+        """筛选出格式正确的命中位置记录（旧版本保存的是只会扩大的包围框，无法区分误匹配，直接丢弃）"""
+        return {name: [list(hit) for hit in hits][-self.history_size:]
+                for name, hits in templates.items()
+                if hits and all(isinstance(hit, list) and len(hit) == 2 for hit in hits)}
+
+    @staticmethod
+    def _resolution_key(resolution):
+        """将分辨率转换为索引文件中的键，如'1920x1080'"""
+        return f"{int(resolution[0])}x{int(resolution[1])}"
+
+    def _templates_for(self, resolution, create=False):
+        """
+        获取某个分辨率下各模板的命中位置（调用方需持有锁）
+
+        Args:
+            resolution (tuple): 屏幕分辨率 (width, height)
+            create (bool): 没有该分辨率的记录时是否新建
+
+        Returns:
+            dict: {模板名称: 命中位置列表}，没有记录且不新建时返回None
+        """
+        key = self._resolution_key(resolution)
+        templates = self._entries.pop(key, None)
+        if templates is None:
+            if not create:
+                return None
+            templates = {}
+            while len(self._entries) >= MAX_RESOLUTIONS:
+                del self._entries[next(iter(self._entries))]
+        # 移到最近使用的位置
+        self._entries[key] = templates
+        return templates
+
+    def lookup(self, name, resolution, template_size, padding):
+        """
+        查询模板的预期搜索区域
+
+        Args:
+            name (str): 模板名称
+            resolution (tuple): 当前屏幕分辨率 (width, height)
+            template_size (tuple): 模板尺寸 (width, height)
+            padding (int): 在历史位置包围框四周扩展的像素数
+
+        Returns:
+            tuple: 搜索区域 (x1, y1, x2, y2)，没有历史记录时返回None
+        """
+        with self._lock:
+            self._load()
+            templates = self._templates_for(resolution)
+            hits = templates.get(name) if templates else None
+            if not hits:
+                return None
+            min_x, min_y = min(hit[0] for hit in hits), min(hit[1] for hit in hits)
+            max_x, max_y = max(hit[0] for hit in hits), max(hit[1] for hit in hits)
+
+        width, height = resolution
+        template_width, template_height = template_size
+        x1 = max(0, min_x - padding)
+        y1 = max(0, min_y - padding)
+        x2 = min(width, max_x + template_width + padding)
+        y2 = min(height, max_y + template_height + padding)
+        if x2 - x1 < template_width or y2 - y1 < template_height:
+            return None
+        return (x1, y1, x2, y2)
+
+    def record(self, name, resolution, top_left):
+        """
+        记录一次模板命中位置
+
+        Args:
+            name (str): 模板名称
+            resolution (tuple): 当前屏幕分辨率 (width, height)
+            top_left (tuple): 命中区域左上角坐标 (x, y)
+        """
+        x, y = int(top_left[0]), int(top_left[1])
+        with self._lock:
+            self._load()
+            hits = self._templates_for(resolution, create=True).setdefault(name, [])
+            if not hits or hits[-1] != [x, y]:
+                # 同一位置只保留一份，并移到最近的位置
+                if [x, y] in hits:
+                    hits.remove([x, y])
+                hits.append([x, y])
+                del hits[:-self.history_size]
+                self._dirty = True
+            should_save = self._dirty and time.monotonic() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def reset(self):
+        """清空所有模板的位置记录"""
+        with self._lock:
+            self._loaded = True
+            self._entries = {}
+            self._dirty = True
+
+    def save(self):
+        """将索引写入磁盘"""
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            # 在锁内复制命中位置列表，写入磁盘时匹配线程仍可能追加新的命中位置
+            data = {
+                'resolutions': {key: {name: [list(hit) for hit in hits] for name, hits in templates.items()}
+                                for key, templates in self._entries.items()},
+            }
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # 先写入临时文件再替换，避免中途退出导致索引文件损坏
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"模板位置索引保存失败: {str(e)}")
+
+
+# 所有检测器默认共享的模板位置索引
+roi_index = RoiIndex()
@@ -0,0 +1,93 @@
+"""
+游戏界面定义模块
+定义可识别的游戏界面，以及用于区分各界面的特征模板
+"""
+
+# 游戏界面名称
+SCREEN_MAIN_MENU = 'main_menu'            # 主菜单（首页）
+SCREEN_BASE = 'base'                      # 基建
+SCREEN_RECRUIT = 'recruit'                # 公开招募
+SCREEN_RECRUIT_DETAIL = 'recruit_detail'  # 公开招募标签选择
+SCREEN_TASK = 'task'                      # 任务
+SCREEN_MISSION = 'mission'                # 作战（终端）
+SCREEN_NORMAL_AFFAIRS = 'normal_affairs'  # 常态事务
+SCREEN_ELIMINATE = 'eliminate'            # 剿灭作战
+SCREEN_STAGE = 'stage'                    # 关卡详情（开始行动）
+SCREEN_SQUAD = 'squad'                    # 编队（开始行动确认）
+SCREEN_COMBAT_BRIEFING = 'combat_briefing'  # 作战简报
+SCREEN_RESULTS = 'results'                # 行动结束
+
+# 各界面的特征模板，界面上同时出现列表中所有模板时判定为该界面。
+# 按识别优先级排列：叠加在其他界面之上的弹出界面和更具体的界面排在前面
+SCREEN_SIGNATURES = {
+    SCREEN_RESULTS: ['MISSION_RESULTS.png'],
+    SCREEN_COMBAT_BRIEFING: ['combat_briefing.png'],
+    SCREEN_SQUAD: ['OPERATION_START_btn.png'],
+    SCREEN_STAGE: ['mission_start_btn.png'],
+    SCREEN_RECRUIT_DETAIL: ['recruit_detail_title.png'],
+    SCREEN_RECRUIT: ['recruit_title.png'],
+    SCREEN_BASE: ['base_title.png'],
+    SCREEN_TASK: ['daily_btn.png', 'weekly_btn.png'],
+    SCREEN_ELIMINATE: ['longmen_01.png'],
+    SCREEN_NORMAL_AFFAIRS: ['exterminated_icon.png'],
+    SCREEN_MISSION: ['normal_affairs_btn.png'],
+    SCREEN_MAIN_MENU: ['main_menu_mission_btn.png', 'main_menu_base_btn.png'],
+}
+
+# 导航步骤中表示按键的前缀，如'key:esc'表示按下Esc键
+KEY_STEP_PREFIX = 'key:'
+
+# 界面之间的导航关系 {起始界面: {目标界面: 点击步骤列表}}。
+# 每个步骤为模板名称，或(模板名称, 横向偏移, 纵向偏移)表示点击模板中心偏移后的位置，
+# 或以KEY_STEP_PREFIX开头的按键；步骤数即为该路径的代价，路由时选择总步骤数最少的路径。
+# 每个可识别的界面都至少有一条离开的路径，导航从任何界面开始都不会无路可走
+NAVIGATION_EDGES = {
+    SCREEN_MAIN_MENU: {
+        SCREEN_MISSION: ['main_menu_mission_btn.png'],
+        SCREEN_BASE: ['main_menu_base_btn.png'],
+        SCREEN_RECRUIT: ['main_recruit_button.png'],
+        SCREEN_TASK: ['main_task_btn.png'],
+    },
+    SCREEN_MISSION: {
+        SCREEN_NORMAL_AFFAIRS: ['normal_affairs_btn.png'],
+        SCREEN_MAIN_MENU: ['back_btn.png'],
+    },
+    SCREEN_NORMAL_AFFAIRS: {
+        # 剿灭作战入口位于剿灭图标下方430像素处
+        SCREEN_ELIMINATE: [('exterminated_icon.png', 0, 430)],
+        SCREEN_MISSION: ['back_btn.png'],
+        SCREEN_MAIN_MENU: ['top_bar.png', 'home_btn.png'],
+    },
+    SCREEN_ELIMINATE: {
+        SCREEN_NORMAL_AFFAIRS: ['back_btn.png'],
+        SCREEN_MAIN_MENU: ['top_bar.png', 'home_btn.png'],
+    },
+    SCREEN_STAGE: {
+        SCREEN_MAIN_MENU: ['top_bar.png', 'home_btn.png'],
+    },
+    SCREEN_SQUAD: {
+        SCREEN_STAGE: ['back_btn.png'],
+        SCREEN_MAIN_MENU: ['top_bar.png', 'home_btn.png'],
+    },
+    # 点击作战简报进入行动结束界面，再点击行动结束界面回到关卡界面
+    SCREEN_COMBAT_BRIEFING: {
+        SCREEN_RESULTS: ['combat_briefing.png'],
+    },
+    SCREEN_RESULTS: {
+        SCREEN_STAGE: ['MISSION_RESULTS.png'],
+    },
+    SCREEN_BASE: {
+        # 离开基建时需要确认
+        SCREEN_MAIN_MENU: ['top_bar.png', 'home_btn.png', 'true_btn.png'],
+    },
+    SCREEN_TASK: {
+        SCREEN_MAIN_MENU: ['top_bar.png', 'home_btn.png'],
+    },
+    SCREEN_RECRUIT: {
+        SCREEN_MAIN_MENU: ['back_btn.png'],
+    },
+    # 标签选择界面没有返回按钮，按Esc关闭（不会开始招募）
+    SCREEN_RECRUIT_DETAIL: {
+        SCREEN_RECRUIT: [KEY_STEP_PREFIX + 'esc'],
+    },
+}
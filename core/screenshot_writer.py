@@ -0,0 +1,209 @@
+"""
+调试截图写入模块
+在后台线程中编码并保存调试截图，并按磁盘占用上限删除最早的截图
+"""
+import atexit
+import os
+import queue
+import threading
+from collections import OrderedDict
+import cv2
+from utils.logger import logger
+from config.settings import settings
+
+# 获取项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 调试截图默认保存目录
+SCREENSHOT_DIR = os.path.join(PROJECT_ROOT, 'logs')
+# 视为调试截图的文件扩展名，计算磁盘占用时只统计这些文件
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+class ScreenshotWriter:
+    """
+    调试截图写入类
+
+    调用方只需复制一份图像放入有界队列即可返回，编码和写入磁盘在后台线程中完成；
+    队列已满时丢弃新的截图，而不是阻塞识别和操作流程
+    """
+
+    def __init__(self, directory=SCREENSHOT_DIR, image_format=None, quality=None, max_queue=None,
+                 disk_budget_mb=None):
+        """
+        初始化调试截图写入器
+
+        Args:
+            directory (str): 默认保存目录，磁盘占用上限只统计该目录中的截图
+            image_format (str): 图像格式（'jpg'、'png'或'webp'），默认使用配置中的SCREENSHOT_FORMAT
+            quality (int): jpg和webp的编码质量 (1-100)，默认使用配置中的SCREENSHOT_QUALITY
+            max_queue (int): 等待写入的截图数量上限，默认使用配置中的SCREENSHOT_QUEUE_SIZE
+            disk_budget_mb (float): 截图占用磁盘空间的上限(MB)，为0时不限制，
+                                    默认使用配置中的SCREENSHOT_DISK_BUDGET_MB
+        """
+        self.directory = directory
+        self.image_format = (image_format or settings.SCREENSHOT_FORMAT).lower().lstrip('.')
+        if '.' + self.image_format not in IMAGE_EXTENSIONS:
+            raise ValueError(f"不支持的截图格式: {self.image_format}")
+        self.quality = settings.SCREENSHOT_QUALITY if quality is None else quality
+        self.disk_budget = int((settings.SCREENSHOT_DISK_BUDGET_MB if disk_budget_mb is None
+                                else disk_budget_mb) * 1024 * 1024)
+        self._queue = queue.Queue(maxsize=max_queue or settings.SCREENSHOT_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread = None
+        # 已提交但还没有写完的截图数量，全部写完时通知等待中的flush()
+        self._pending = 0
+        self._idle = threading.Condition()
+        # 默认目录中已有的截图 {路径: 大小}，按写入时间从早到晚排列（首次写入时扫描）
+        self._files = None
+        self._total_size = 0
+        self.written = 0
+        self.dropped = 0
+        atexit.register(self.flush, 5.0)
+
+    def _encode_params(self):
+        """按图像格式返回编码参数"""
+        if self.image_format in ('jpg', 'jpeg'):
+            return [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        if self.image_format == 'webp':
+            return [cv2.IMWRITE_WEBP_QUALITY, int(self.quality)]
+        # PNG无损，使用较低的压缩级别换取编码速度
+        return [cv2.IMWRITE_PNG_COMPRESSION, 1]
+
+    def resolve_path(self, filename, directory=None):
+        """
+        计算截图的保存路径，文件扩展名统一替换为配置的图像格式
+
+        Args:
+            filename (str): 图像文件名
+            directory (str): 保存目录，为None时使用默认目录
+
+        Returns:
+            str: 保存路径
+        """
+        stem, extension = os.path.splitext(filename)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            stem = filename
+        return os.path.join(directory or self.directory, f'{stem}.{self.image_format}')
+
+    def submit(self, image, path):
+        """
+        提交一张截图，立即返回
+
+        Args:
+            image (numpy.ndarray): 要保存的图像，提交时会复制一份，之后可以继续复用原缓冲区
+            path (str): 保存路径
+
+        Returns:
+            bool: 已放入写入队列返回True，队列已满被丢弃时返回False
+        """
+        self._ensure_thread()
+        with self._idle:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((image.copy(), path))
+            return True
+        except queue.Full:
+            self._task_finished()
+            self.dropped += 1
+            logger.debug(f"截图写入队列已满，丢弃截图: {path}")
+            return False
+
+    def flush(self, timeout=None):
+        """
+        等待队列中的截图全部写入磁盘
+
+        Args:
+            timeout (float): 最长等待时间(秒)，为None时一直等待
+
+        Returns:
+            bool: 全部写入完成返回True，超时返回False
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _task_finished(self):
+        """一张截图处理完毕（写入、失败或被丢弃），没有待写入的截图时唤醒flush()"""
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _ensure_thread(self):
+        """首次提交截图时启动后台写入线程"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ZOOTScreenshotWriter', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """后台线程主循环"""
+        while True:
+            image, path = self._queue.get()
+            try:
+                self._write(image, path)
+            except Exception as e:
+                logger.warning(f"截图保存失败: {path}, {str(e)}")
+            finally:
+                self._task_finished()
+
+    def _write(self, image, path):
+        """编码并写入一张截图，然后检查磁盘占用"""
+        ok, buffer = cv2.imencode('.' + self.image_format, image, self._encode_params())
+        if not ok:
+            raise ValueError("图像编码失败")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先编码再写入文件，避免cv2.imwrite无法处理中文路径
+        with open(path, 'wb') as f:
+            f.write(buffer.tobytes())
+        self.written += 1
+        logger.info(f"图像已保存到: {path}")
+
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory):
+            self._track(path, len(buffer))
+            self._enforce_budget()
+
+    def _scan(self):
+        """扫描默认目录中已有的截图"""
+        files = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        files.sort()
+        self._files = OrderedDict((path, size) for _, path, size in files)
+        self._total_size = sum(self._files.values())
+
+    def _track(self, path, size):
+        """记录新写入的截图"""
+        if self._files is None:
+            # 扫描结果已包含刚写入的文件
+            self._scan()
+            return
+        # 同名截图被覆盖时按最新写入的截图重新记录
+        self._total_size -= self._files.pop(path, 0)
+        self._files[path] = size
+        self._total_size += size
+
+    def _enforce_budget(self):
+        """截图总大小超过上限时从最早的截图开始删除"""
+        if self.disk_budget <= 0:
+            return
+        removed = 0
+        # 至少保留刚写入的一张
+        while self._total_size > self.disk_budget and len(self._files) > 1:
+            path, size = self._files.popitem(last=False)
+            self._total_size -= size
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除旧截图失败: {path}, {str(e)}")
+        if removed:
+            logger.debug(f"截图超过磁盘占用上限，已删除最早的 {removed} 张截图")
+
+
+# 所有检测器默认共享的调试截图写入器
+screenshot_writer = ScreenshotWriter()
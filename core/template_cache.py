@@ -0,0 +1,72 @@
+"""
+模板缓存模块
+负责缓存已解码的模板图像，避免每次匹配都重复读取磁盘和解码
+"""
+import threading
+from collections import OrderedDict
+from config.settings import settings
+
+
+class TemplateCache:
+    """模板缓存类，按LRU策略保存已解码的模板图像，可在多个检测器之间共享"""
+
+    def __init__(self, max_size=64):
+        """
+        初始化模板缓存
+
+        Args:
+            max_size (int): 最多缓存的模板数量，超出时淘汰最久未使用的模板
+        """
+        self.max_size = max(1, int(max_size))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        """
+        获取缓存的模板，未命中时调用loader解码并放入缓存
+
+        Args:
+            key (str): 缓存键（通常为模板的完整路径）
+            loader (callable): 未命中时调用的加载函数，参数为key
+
+        Returns:
+            numpy.ndarray: 解码后的模板图像（只读）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        # 在锁外解码，避免慢速磁盘读取阻塞其他线程
+        image = loader(key)
+        # 模板被多个模块共享，禁止原地修改
+        image.flags.writeable = False
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return image
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+# 所有检测器默认共享的模板缓存
+template_cache = TemplateCache(max_size=settings.TEMPLATE_CACHE_SIZE)
@@ -0,0 +1,182 @@
+"""
+耗时追踪模块
+记录截图、模板加载、匹配、鼠标键盘操作、等待以及各功能模块步骤的耗时区间，
+并导出为Chrome trace-event格式，可在chrome://tracing或Perfetto中按时间线查看
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from utils.logger import logger
+from config.settings import settings
+
+# 未启用追踪时返回的空上下文，可重复使用
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """
+    耗时追踪类
+
+    每个区间记录为一个完整事件（名称、分类、开始时间、持续时间、线程和参数），
+    同一线程内嵌套的区间在时间线上显示为调用栈。事件数量有上限，超出时丢弃最早的事件；
+    未启用时span()直接返回空上下文，几乎没有开销
+    """
+
+    def __init__(self, enabled=None, max_events=None):
+        """
+        初始化耗时追踪
+
+        Args:
+            enabled (bool): 是否启用，默认使用配置中的TRACE_ENABLED
+            max_events (int): 保留的事件数量上限，默认使用配置中的TRACE_MAX_EVENTS
+        """
+        self.enabled = settings.TRACE_ENABLED if enabled is None else enabled
+        self._events = deque(maxlen=max_events or settings.TRACE_MAX_EVENTS)
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def _now(self):
+        """距离追踪开始的时间(微秒)"""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _add(self, event):
+        thread = threading.current_thread()
+        event['pid'] = os.getpid()
+        event['tid'] = thread.ident
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            self._events.append(event)
+
+    def span(self, name, category='zoot', **args):
+        """
+        记录with块的耗时
+
+        Args:
+            name (str): 区间名称
+            category (str): 分类，用于在查看器中筛选
+            **args: 附加在事件上的参数
+
+        Returns:
+            上下文管理器
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, category, args)
+
+    @contextmanager
+    def _span(self, name, category, args):
+        started = self._now()
+        try:
+            yield
+        finally:
+            event = {'name': name, 'cat': category, 'ph': 'X', 'ts': started, 'dur': self._now() - started}
+            if args:
+                event['args'] = {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                                 for key, value in args.items()}
+            self._add(event)
+
+    def traced(self, name=None, category='zoot'):
+        """
+        记录函数每次调用耗时的装饰器
+
+        Args:
+            name (str): 区间名称，默认使用函数的限定名（如CombatModule.combat_only_flow）
+            category (str): 分类
+        """
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(span_name, category, None):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def instant(self, name, category='zoot', **args):
+        """
+        记录一个瞬时事件（如界面识别结果）
+
+        Args:
+            name (str): 事件名称
+            category (str): 分类
+            **args: 附加在事件上的参数
+        """
+        if not self.enabled:
+            return
+        event = {'name': name, 'cat': category, 'ph': 'i', 's': 't', 'ts': self._now()}
+        if args:
+            event['args'] = {key: str(value) for key, value in args.items()}
+        self._add(event)
+
+    def clear(self):
+        """清空所有事件"""
+        with self._lock:
+            self._events.clear()
+
+    def summary(self, top=10):
+        """
+        按区间名称统计耗时
+
+        Args:
+            top (int): 返回总耗时最长的区间数量
+
+        Returns:
+            list: [(区间名称, 次数, 总耗时(秒), 最长耗时(秒))]，按总耗时从长到短排列
+        """
+        with self._lock:
+            events = [event for event in self._events if event['ph'] == 'X']
+        totals = {}
+        for event in events:
+            count, total, longest = totals.get(event['name'], (0, 0.0, 0.0))
+            totals[event['name']] = (count + 1, total + event['dur'] / 1e6, max(longest, event['dur'] / 1e6))
+        ranked = sorted(((name,) + values for name, values in totals.items()), key=lambda item: -item[2])
+        return ranked[:top]
+
+    def export(self, path):
+        """
+        将事件导出为Chrome trace-event格式的JSON文件
+
+        Args:
+            path (str): 导出文件路径
+
+        Returns:
+            str: 导出文件路径，没有任何事件时返回None
+        """
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        if not events:
+            return None
+        pid = os.getpid()
+        # 线程名称元数据，查看器中按线程名称显示各条时间线
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}}
+                    for tid, thread_name in threads.items()]
+        metadata.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'ZOOT'}})
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        logger.info(f"耗时追踪已导出到: {path}，共 {len(events)} 个事件")
+        return path
+
+    def log_summary(self, top=10):
+        """在日志中输出总耗时最长的区间"""
+        ranked = self.summary(top)
+        if not ranked:
+            return
+        logger.info("耗时最长的步骤:")
+        for name, count, total, longest in ranked:
+            logger.info(f"  {name}: {count}次，共 {total:.2f}秒，最长 {longest:.2f}秒")
+
+
+# 所有模块共享的耗时追踪
+tracer = Tracer()
@@ -0,0 +1,97 @@
+"""
+游戏窗口模块
+负责定位游戏窗口并缓存其位置，使截图只需捕获游戏窗口所在区域
+"""
+import time
+from utils.logger import logger
+
+
+class GameWindow:
+    """游戏窗口类，按窗口标题查找游戏窗口并定期校验其位置"""
+
+    def __init__(self, title, recheck_interval=2.0):
+        """
+        初始化游戏窗口
+
+        Args:
+            title (str): 游戏窗口标题（完全匹配）
+            recheck_interval (float): 重新校验窗口位置的间隔(秒)
+        """
+        self.title = title
+        self.recheck_interval = recheck_interval
+        self._window = None
+        self._region = None
+        self._checked_at = 0.0
+        self._available = True
+
+    def _find_window(self):
+        """按标题查找游戏窗口，找不到时返回None"""
+        try:
+            import pygetwindow
+        except ImportError:
+            if self._available:
+                logger.warning("未安装pygetwindow，无法定位游戏窗口，将捕获整个屏幕")
+            self._available = False
+            return None
+
+        for window in pygetwindow.getWindowsWithTitle(self.title):
+            # getWindowsWithTitle为部分匹配，这里只接受标题完全一致的窗口，避免误选同名网页等窗口
+            if window.title.strip() == self.title:
+                return window
+        return None
+
+    def region(self, bounds=None):
+        """
+        获取游戏窗口在屏幕上的区域
+
+        Args:
+            bounds (dict): 显示器区域 {'left', 'top', 'width', 'height'}，窗口区域会被裁剪到该范围内
+
+        Returns:
+            tuple: 窗口区域 (x, y, width, height)，找不到窗口或窗口已最小化时返回None
+        """
+        now = time.monotonic()
+        if self._available and now - self._checked_at >= self.recheck_interval:
+            self._checked_at = now
+            self._region = self._read_region(bounds)
+        return self._region
+
+    def _read_region(self, bounds):
+        """读取窗口当前位置，窗口丢失时重新查找"""
+        for _ in range(2):
+            if self._window is None:
+                self._window = self._find_window()
+                if self._window is None:
+                    if self._region is not None:
+                        logger.info(f"游戏窗口 '{self.title}' 已丢失，将捕获整个屏幕")
+                    return None
+            try:
+                if self._window.isMinimized:
+                    return None
+                left, top = self._window.left, self._window.top
+                width, height = self._window.width, self._window.height
+                break
+            except Exception:
+                # 窗口已关闭，重新查找
+                self._window = None
+        else:
+            return None
+
+        if bounds:
+            right = min(left + width, bounds['left'] + bounds['width'])
+            bottom = min(top + height, bounds['top'] + bounds['height'])
+            left, top = max(left, bounds['left']), max(top, bounds['top'])
+            width, height = right - left, bottom - top
+        if width <= 0 or height <= 0:
+            return None
+
+        region = (left, top, width, height)
+        if region != self._region:
+            logger.info(f"已定位游戏窗口 '{self.title}': {region}")
+        return region
+
+    def invalidate(self):
+        """清除缓存的窗口位置，下次使用时重新查找"""
+        self._window = None
+        self._region = None
+        self._checked_at = 0.0
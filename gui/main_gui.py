@@ -2,8 +2,11 @@ import tkinter as tk
 from tkinter import ttk, font, messagebox, scrolledtext
 import os
 import sys
+import queue
+import threading
 import time
 import logging
+from collections import deque
 
 # 将项目根目录添加到Python路径
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -11,10 +14,15 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from utils import logger
-from modules import BaseManagementModule, CombatModule, TaskManagementModule
-from core.exceptions import ElementNotFoundError, OperationFailedError
+from modules import BaseManagementModule, CombatModule, TaskManagementModule, RecruitModule
+from core import Controller, Detector
+from core.exceptions import ElementNotFoundError, OperationFailedError, ConfigurationError
+from core.tracing import tracer
 from config.settings import settings
 
+# 界面线程检查后台任务消息的间隔(毫秒)
+UI_QUEUE_POLL_INTERVAL = 100
+
 class ZOOTGui:
     def __init__(self, root):
         # 设置主窗口
@@ -35,10 +43,18 @@ class ZOOTGui:
         # 标题图片路径（预留）
         self.title_image_path = os.path.join(os.path.dirname(__file__), "icon", "title-ZOOT-white.png")
         
-        # 初始化模块实例（避免重复初始化）
-        self.base_manager = BaseManagementModule()
-        self.combat_manager = CombatModule()
-        self.task_manager = TaskManagementModule()
+        # 初始化模块实例（避免重复初始化），所有模块共享同一个检测器和控制器
+        self.detector = Detector()
+        self.controller = Controller(detector=self.detector)
+        self.base_manager = BaseManagementModule(controller=self.controller, detector=self.detector)
+        self.combat_manager = CombatModule(controller=self.controller, detector=self.detector)
+        self.task_manager = TaskManagementModule(controller=self.controller, detector=self.detector)
+        self.recruit_manager = RecruitModule(controller=self.controller, detector=self.detector)
+
+        # 后台任务线程，以及后台线程发往界面线程的消息队列
+        self.task_thread = None
+        self.task_name = None
+        self.ui_queue = queue.Queue()
         
         # 初始化日志窗口
         self.init_log_window()
@@ -138,12 +154,26 @@ class ZOOTGui:
         )
         self.close_button.pack(side=tk.RIGHT, padx=10)
         self.close_button.bind("<Button-1>", lambda e: self.on_closing())
+
+        # 创建停止按钮
+        self.stop_button = tk.Label(
+            self.title_bar,
+            text="■ 停止任务",
+            font=font.Font(family="SimHei", size=10),
+            bg="#2d2d2d",
+            fg="#ff6666"
+        )
+        self.stop_button.pack(side=tk.RIGHT, padx=10)
+        self.stop_button.bind("<Button-1>", lambda e: self.stop_task())
         
         # 记录当前截图存储设置状态
         logger.info(f"程序启动，当前截图存储设置: {'启用' if settings.SAVE_SCREENSHOTS else '禁用'}")
         
         # 显示主页
         self.show_home()
+
+        # 开始处理后台任务发来的消息
+        self.root.after(UI_QUEUE_POLL_INTERVAL, self.process_ui_queue)
         
     def show_home(self):
         self.clear_content_area()
@@ -297,7 +327,7 @@ class ZOOTGui:
         
         cycles_label = tk.Label(
             cycles_frame, 
-            text="指定轮次: ", 
+            text="指定轮次(0为按理智计算): ", 
             font=font.Font(family="SimHei", size=10),
             bg="#1a1a1a", 
             fg="#cccccc"
@@ -750,6 +780,18 @@ class ZOOTGui:
         # 确保窗口置顶
         self.log_window.attributes('-topmost', True)
         
+        # 创建停止按钮，主窗口在任务执行期间隐藏，只能通过日志窗口停止任务
+        self.log_stop_button = tk.Button(
+            self.log_window,
+            text="停止任务",
+            font=font.Font(family="SimHei", size=10),
+            bg="#3d3d3d",
+            fg="#ff6666",
+            bd=0,
+            command=self.stop_task
+        )
+        self.log_stop_button.pack(side=tk.BOTTOM, fill=tk.X)
+
         # 创建滚动文本框用于显示日志
         self.log_text = scrolledtext.ScrolledText(
             self.log_window, 
@@ -760,28 +802,54 @@ class ZOOTGui:
         )
         self.log_text.pack(fill=tk.BOTH, expand=True)
         
-        # 创建自定义日志处理器
+        # 创建自定义日志处理器：任意线程只把格式化后的日志放入缓冲区，由界面线程定时批量写入文本框
         class TextHandler(logging.Handler):
-            def __init__(self, text_widget):
+            def __init__(self, text_widget, max_lines):
                 logging.Handler.__init__(self)
                 self.text_widget = text_widget
+                self.max_lines = max_lines
+                # 待写入的日志，积压超过上限时丢弃最早的记录（反正写入后也会被删除）
+                self.pending = deque(maxlen=max_lines)
                 self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
 
             def emit(self, record):
-                msg = self.format(record) + '\n'
+                try:
+                    self.pending.append(self.format(record))
+                except Exception:
+                    self.handleError(record)
+
+            def flush_pending(self):
+                """将缓冲区中的日志一次性写入文本框，只能在界面线程中调用"""
+                lines = []
+                while self.pending:
+                    lines.append(self.pending.popleft())
+                if not lines:
+                    return
                 self.text_widget.configure(state='normal')
-                self.text_widget.insert(tk.END, msg)
+                self.text_widget.insert(tk.END, '\n'.join(lines) + '\n')
+                # 超出行数上限时删除最早的行，保持内存和渲染开销恒定
+                line_count = int(self.text_widget.index('end-1c').split('.')[0]) - 1
+                if line_count > self.max_lines:
+                    self.text_widget.delete('1.0', f'{line_count - self.max_lines + 1}.0')
                 self.text_widget.see(tk.END)  # 滚动到最后一行
                 self.text_widget.configure(state='disabled')
 
         # 添加日志处理器到logger
-        self.text_handler = TextHandler(self.log_text)
+        self.text_handler = TextHandler(self.log_text, settings.LOG_WINDOW_MAX_LINES)
         logger.addHandler(self.text_handler)
+        self.root.after(settings.LOG_WINDOW_FLUSH_INTERVAL, self.flush_log_window)
         
         # 根据配置决定是否显示日志窗口
         if not settings.LOG_WINDOW_ENABLED:
             self.log_window.withdraw()
 
+    def flush_log_window(self):
+        """
+        定时将缓冲的日志批量写入日志窗口
+        """
+        self.text_handler.flush_pending()
+        self.root.after(settings.LOG_WINDOW_FLUSH_INTERVAL, self.flush_log_window)
+
     def show_about(self):
         self.clear_content_area()
         title = tk.Label(
@@ -819,283 +887,294 @@ class ZOOTGui:
         self.root.geometry(f"+{x}+{y}")
 
         
-    def complete_base_tasks(self):
+    def start_task(self, name, func, *args):
         """
-        完成基建事项功能
+        在后台线程中执行自动化任务，界面线程只负责显示进度和结果
+
+        Args:
+            name (str): 任务名称，用于日志和提示
+            func (callable): 在后台线程中执行的任务函数，返回(是否成功, 提示信息)
+            *args: 传给任务函数的参数
+
+        Returns:
+            bool: 任务已启动返回True，已有任务正在执行时返回False
         """
+        if self.task_thread is not None and self.task_thread.is_alive():
+            messagebox.showwarning("提示", f"{self.task_name}正在执行，请等待完成或先停止")
+            return False
+
+        # 显示提示信息
+        messagebox.showinfo("提示", "请确保已在主菜单界面\n3秒后开始执行...")
+
+        self.detector.reset_cancel()
+        self.task_name = name
+        self.task_thread = threading.Thread(target=self._run_task, args=(name, func, args),
+                                            name='ZOOTTask', daemon=True)
+        self.task_thread.start()
+        return True
+
+    def _run_task(self, name, func, args):
+        """
+        后台线程中执行任务，结果通过消息队列交给界面线程显示
+        """
+        result = None
+        # 失败时只保存本次任务的记录
+        self.detector.flight_recorder.clear()
+        tracer.clear()
         try:
-            threshold = self.threshold_var.get()
-            logger.info("开始执行完成基建事项功能...")
-            logger.info(f"当前模板匹配阈值: {threshold}")
-            
-            # 显示提示信息
-            messagebox.showinfo("提示", "请确保已在主菜单界面\n3秒后开始执行...")
-            
-            # 等待3秒
-            time.sleep(3)
-            
+            # 等待3秒，期间可以停止
+            self.detector.sleep(3)
+
             # 隐藏窗口
-            self.root.withdraw()
-            
-            # 使用已初始化的基建管理模块实例
-            logger.info("正在导航到基建...")
-            if not self.base_manager.navigate_to_base(threshold=threshold):
-                logger.error("无法导航到基建")
-                messagebox.showerror("失败", "无法导航到基建")
+            self.ui_queue.put(('withdraw', None))
+
+            success, message = func(*args)
+            # 被停止的流程可能只返回失败而不抛出异常
+            self.detector.check_cancelled()
+            if not success:
+                self.detector.flight_recorder.dump(name)
+            result = ('info', "成功", message) if success else ('error', "失败", message)
+        except Exception as e:
+            if self.detector.cancelled:
+                logger.warning(f"{name}已停止")
+                result = ('info', "已停止", f"{name}已停止")
                 return
-            time.sleep(10)
-            
-            logger.info("正在尝试完成事项...")
-            # 完成事项
-            success = self.base_manager.complete_tasks(threshold=threshold)
-            
-            if success:
-                logger.info("完成事项成功!")
-                messagebox.showinfo("成功", "基建事项已成功完成!")
+            # 保存失败前的画面和操作记录
+            self.detector.flight_recorder.dump(name)
+            if isinstance(e, ElementNotFoundError):
+                logger.error(f"执行失败: 未找到元素 - {e}")
+                result = ('error', "失败", f"未找到元素: {e}\n可能的原因: 游戏窗口未正确唤出、界面与模板不匹配")
+            elif isinstance(e, OperationFailedError):
+                logger.error(f"执行失败: 操作失败 - {e}")
+                result = ('error', "失败", f"操作失败: {e}\n可能的原因: 鼠标点击操作未能正确执行")
             else:
-                logger.error("完成事项失败!")
-                messagebox.showerror("失败", "无法完成基建事项，请检查游戏界面是否正确。")
-        except ElementNotFoundError as e:
-            logger.error(f"执行失败: 未找到元素 - {e}")
-            messagebox.showerror("失败", f"未找到元素: {e}\n可能的原因: 游戏窗口未正确唤出、界面与模板不匹配或通知按钮不可见")
-        except OperationFailedError as e:
-            logger.error(f"执行失败: 操作失败 - {e}")
-            messagebox.showerror("失败", f"操作失败: {e}\n可能的原因: 鼠标点击操作未能正确执行")
-        except Exception as e:
-            logger.error(f"执行过程中发生未知错误: {str(e)}")
-            messagebox.showerror("错误", f"发生未知错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
+                logger.error(f"执行过程中发生未知错误: {str(e)}", exc_info=True)
+                result = ('error', "错误", f"发生未知错误: {str(e)}")
         finally:
-            # 显示窗口
-            self.root.deiconify()
-        
+            if tracer.enabled:
+                tracer.log_summary()
+                tracer.export(os.path.join(project_root, 'logs', f"trace_{time.strftime('%Y%m%d-%H%M%S')}_{name}.json"))
+            self.ui_queue.put(('finished', result))
+
+    def stop_task(self):
+        """
+        停止正在执行的后台任务，任务会在下一次截图、等待或操作时结束
+        """
+        if self.task_thread is None or not self.task_thread.is_alive():
+            logger.info("当前没有正在执行的任务")
+            return
+        logger.info(f"正在停止{self.task_name}...")
+        self.detector.cancel()
+
+    def process_ui_queue(self):
+        """
+        在界面线程中处理后台任务发来的消息，Tk控件只能在界面线程中操作
+        """
+        try:
+            while True:
+                kind, payload = self.ui_queue.get_nowait()
+                if kind == 'withdraw':
+                    self.root.withdraw()
+                    # 主窗口隐藏期间保持日志窗口可见，以便随时停止任务
+                    self.log_window.deiconify()
+                elif kind == 'finished':
+                    self.task_thread = None
+                    # 显示窗口
+                    self.root.deiconify()
+                    log_window_enabled = self.log_window_enabled_var.get() \
+                        if hasattr(self, 'log_window_enabled_var') else settings.LOG_WINDOW_ENABLED
+                    if not log_window_enabled:
+                        self.log_window.withdraw()
+                    if payload is not None:
+                        level, title, message = payload
+                        if level == 'info':
+                            messagebox.showinfo(title, message)
+                        else:
+                            messagebox.showerror(title, message)
+        except queue.Empty:
+            pass
+        self.root.after(UI_QUEUE_POLL_INTERVAL, self.process_ui_queue)
+
+    def complete_base_tasks(self):
+        """
+        完成基建事项功能
+        """
+        threshold = self.threshold_var.get()
+        logger.info("开始执行完成基建事项功能...")
+        logger.info(f"当前模板匹配阈值: {threshold}")
+        self.start_task("完成基建事项", self._complete_base_tasks, threshold)
+
+    def _complete_base_tasks(self, threshold):
+        """
+        在后台线程中完成基建事项
+        """
+        # 使用已初始化的基建管理模块实例
+        logger.info("正在导航到基建...")
+        if not self.base_manager.navigate_to_base(threshold=threshold):
+            logger.error("无法导航到基建")
+            return False, "无法导航到基建"
+
+        logger.info("正在尝试完成事项...")
+        # 完成事项
+        success = self.base_manager.complete_tasks(threshold=threshold)
+
+        if success:
+            logger.info("完成事项成功!")
+            return True, "基建事项已成功完成!"
+        logger.error("完成事项失败!")
+        return False, "无法完成基建事项，请检查游戏界面是否正确。"
+
     def start_auto_eliminate(self):
         """
         自动剿灭作战功能
         """
-        try:
-            cycles = self.cycles_var.get()
-            threshold = self.combat_threshold_var.get()
-            
-            if cycles <= 0:
-                messagebox.showerror("错误", "轮次必须大于0")
-                return
-            
-            logger.info("开始执行自动剿灭作战功能...")
-            logger.info(f"轮次: {cycles}, 模板匹配阈值: {threshold}")
-            
-            # 显示提示信息
-            messagebox.showinfo("提示", "请确保已在主菜单界面\n3秒后开始执行...")
-            
-            # 等待3秒
-            time.sleep(3)
-            
-            # 隐藏窗口
-            self.root.withdraw()
-            
-            # 使用已初始化的作战模块实例
-            logger.info("正在导航到作战界面...")
-            if not self.combat_manager.navigate_to_mission(threshold=threshold):
-                logger.error("无法导航到作战界面")
-                messagebox.showerror("失败", "无法导航到作战界面")
-                return
-            time.sleep(2)
-            
-            # 导航到常态事务
-            logger.info("正在导航到常态事务...")
-            if not self.combat_manager.navigate_to_normal_affairs(threshold=threshold):
-                logger.error("无法导航到常态事务")
-                messagebox.showerror("失败", "无法导航到常态事务")
-                return
-            time.sleep(2)
-            
-            # 导航到剿灭作战
-            logger.info("正在导航到剿灭作战...")
-            if not self.combat_manager.navigate_to_eliminate(threshold=threshold):
-                logger.error("无法导航到剿灭作战")
-                messagebox.showerror("失败", "无法导航到剿灭作战")
-                return
-            time.sleep(2)
-            
-            # 根据选择的关卡导航
-            selected_level = self.level_var.get()
-            logger.info(f"正在导航到{selected_level}...")
-            
-            if selected_level == "龙门外环":
-                if not self.combat_manager.navigate_to_longmen(threshold=threshold):
-                    logger.error(f"无法导航到{selected_level}")
-                    messagebox.showerror("失败", f"无法导航到{selected_level}")
-                    return
-            elif selected_level == "龙门市区":
-                if not self.combat_manager.navigate_to_longmen_city(threshold=threshold):
-                    logger.error(f"无法导航到{selected_level}")
-                    messagebox.showerror("失败", f"无法导航到{selected_level}")
-                    return
-            elif selected_level == "当期委托地点":
-                if not self.combat_manager.navigate_to_current_commission(threshold=threshold):
-                    logger.error(f"无法导航到{selected_level}")
-                    messagebox.showerror("失败", f"无法导航到{selected_level}")
-                    return
-            # 未来可以在这里添加其他关卡的导航逻辑
-            # elif selected_level == "其他关卡名称":
-            #     if not combat_manager.navigate_to_other_level(threshold=threshold):
-            #         logger.error(f"无法导航到{selected_level}")
-            #         messagebox.showerror("失败", f"无法导航到{selected_level}")
-            #         return
-            
-            time.sleep(2)
-            
-            # 检查并启用代理指挥
-            logger.info("正在检查并启用代理指挥...")
-            acting_commander_success = self.combat_manager.check_and_enable_acting_commander(threshold=threshold)
-            if not acting_commander_success:
-                logger.error("无法启用代理指挥")
-                messagebox.showerror("失败", "无法启用代理指挥")
+        cycles = self.cycles_var.get()
+        threshold = self.combat_threshold_var.get()
+        selected_level = self.level_var.get()
+
+        if cycles < 0:
+            messagebox.showerror("错误", "轮次不能小于0")
+            return
+        if cycles == 0:
+            try:
+                self.combat_manager.check_auto_cycles()
+            except ConfigurationError as e:
+                messagebox.showerror("错误", e.message)
                 return
-            time.sleep(2)
-            
-            # 开始作战循环
-            logger.info(f"开始作战循环，轮次: {cycles}")
-            
-            # 执行作战循环
-            success = self.combat_manager.combat_only_flow(cycles=cycles, threshold=threshold)
-            
-            if success:
-                logger.info(f"自动剿灭作战完成，共执行 {cycles} 轮")
-                messagebox.showinfo("成功", f"自动剿灭作战完成，共执行 {cycles} 轮")
-            else:
-                logger.error("自动剿灭作战失败")
-                messagebox.showerror("失败", "自动剿灭作战失败，请检查游戏界面是否正确。")
-        except ElementNotFoundError as e:
-            logger.error(f"执行失败: 未找到元素 - {e}")
-            messagebox.showerror("失败", f"未找到元素: {e}\n可能的原因: 游戏窗口未正确唤出、界面与模板不匹配")
-        except OperationFailedError as e:
-            logger.error(f"执行失败: 操作失败 - {e}")
-            messagebox.showerror("失败", f"操作失败: {e}\n可能的原因: 鼠标点击操作未能正确执行")
-        except Exception as e:
-            logger.error(f"执行过程中发生未知错误: {str(e)}")
-            messagebox.showerror("错误", f"发生未知错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            # 显示窗口
-            self.root.deiconify()
-        
+
+        logger.info("开始执行自动剿灭作战功能...")
+        logger.info(f"轮次: {cycles or '按理智计算'}, 模板匹配阈值: {threshold}")
+        self.start_task("自动剿灭作战", self._auto_eliminate, cycles, threshold, selected_level)
+
+    def _auto_eliminate(self, cycles, threshold, selected_level):
+        """
+        在后台线程中执行自动剿灭作战
+        """
+        # 使用已初始化的作战模块实例
+        logger.info("正在导航到作战界面...")
+        if not self.combat_manager.navigate_to_mission(threshold=threshold):
+            logger.error("无法导航到作战界面")
+            return False, "无法导航到作战界面"
+
+        # 导航到常态事务
+        logger.info("正在导航到常态事务...")
+        if not self.combat_manager.navigate_to_normal_affairs(threshold=threshold):
+            logger.error("无法导航到常态事务")
+            return False, "无法导航到常态事务"
+
+        # 导航到剿灭作战
+        logger.info("正在导航到剿灭作战...")
+        if not self.combat_manager.navigate_to_eliminate(threshold=threshold):
+            logger.error("无法导航到剿灭作战")
+            return False, "无法导航到剿灭作战"
+
+        # 根据选择的关卡导航
+        logger.info(f"正在导航到{selected_level}...")
+
+        if selected_level == "龙门外环":
+            navigated = self.combat_manager.navigate_to_longmen(threshold=threshold)
+        elif selected_level == "龙门市区":
+            navigated = self.combat_manager.navigate_to_longmen_city(threshold=threshold)
+        elif selected_level == "当期委托地点":
+            navigated = self.combat_manager.navigate_to_current_commission(threshold=threshold)
+        # 未来可以在这里添加其他关卡的导航逻辑
+        # elif selected_level == "其他关卡名称":
+        #     navigated = self.combat_manager.navigate_to_other_level(threshold=threshold)
+        else:
+            navigated = True
+        if not navigated:
+            logger.error(f"无法导航到{selected_level}")
+            return False, f"无法导航到{selected_level}"
+
+        # 检查并启用代理指挥
+        logger.info("正在检查并启用代理指挥...")
+        acting_commander_success = self.combat_manager.check_and_enable_acting_commander(threshold=threshold)
+        if not acting_commander_success:
+            logger.error("无法启用代理指挥")
+            return False, "无法启用代理指挥"
+
+        # 开始作战循环
+        logger.info(f"开始作战循环，轮次: {cycles or '按理智计算'}")
+
+        # 执行作战循环，轮次为0时按剩余理智自动计算
+        success = self.combat_manager.combat_only_flow(cycles=cycles or None, threshold=threshold,
+                                                       stage=selected_level)
+
+        if success:
+            summary = f"，共执行 {cycles} 轮" if cycles else ""
+            logger.info(f"自动剿灭作战完成{summary}")
+            return True, f"自动剿灭作战完成{summary}"
+        logger.error("自动剿灭作战失败")
+        return False, "自动剿灭作战失败，请检查游戏界面是否正确。"
+
     def start_public_recruit(self):
         """
         公开招募功能
         """
-        try:
-            # 导入招募模块
-            from modules import RecruitModule
-            
-            # 获取选中的标签
-            selected_tags = [tag for tag, var in self.tag_vars.items() if var.get()]
-            
-            # 获取选择的招募位
-            slot_option = self.slot_var.get()
-            slot_number = None if slot_option == "所有" else int(slot_option)
-            
-            # 获取模板匹配阈值
-            threshold = self.recruit_threshold_var.get()
-            
-            logger.info(f"开始执行公开招募功能...")
-            logger.info(f"选中的标签: {selected_tags}")
-            logger.info(f"选择的招募位: {slot_option}")
-            logger.info(f"模板匹配阈值: {threshold}")
-            
-            # 如果没有选择标签，使用默认标签
-            if not selected_tags:
-                selected_tags = ["重装干员", "新手", "医疗干员"]
-                logger.info(f"未选择标签，使用默认标签: {selected_tags}")
-            
-            # 显示提示信息
-            messagebox.showinfo("提示", "请确保已在主菜单界面\n3秒后开始执行...")
-            
-            # 等待3秒
-            time.sleep(3)
-            
-            # 隐藏窗口
-            self.root.withdraw()
-            
-            # 创建招募模块实例
-            recruit_manager = RecruitModule()
-            
-            # 导航到招募页面
-            logger.info("正在导航到招募页面...")
-            if not recruit_manager.navigate_to_recruit(threshold=threshold):
-                logger.error("无法导航到招募页面")
-                messagebox.showerror("失败", "无法导航到招募页面")
-                return
-            time.sleep(2)
-            
-            # 执行招募操作
-            logger.info(f"正在执行招募操作，目标标签: {selected_tags}")
-            success = recruit_manager.enter_recruit_slots(slot_number=slot_number, target_tags=selected_tags, threshold=threshold)
-            
-            if success:
-                logger.info("公开招募操作完成!")
-                messagebox.showinfo("成功", "公开招募操作已完成!")
-            else:
-                logger.error("公开招募操作失败!")
-                messagebox.showerror("失败", "无法完成公开招募操作，请检查游戏界面是否正确。")
-        except ElementNotFoundError as e:
-            logger.error(f"执行失败: 未找到元素 - {e}")
-            messagebox.showerror("失败", f"未找到元素: {e}\n可能的原因: 游戏窗口未正确唤出、界面与模板不匹配")
-        except OperationFailedError as e:
-            logger.error(f"执行失败: 操作失败 - {e}")
-            messagebox.showerror("失败", f"操作失败: {e}\n可能的原因: 鼠标点击操作未能正确执行")
-        except Exception as e:
-            logger.error(f"执行过程中发生未知错误: {str(e)}")
-            messagebox.showerror("错误", f"发生未知错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            # 显示窗口
-            self.root.deiconify()
+        # 获取选中的标签
+        selected_tags = [tag for tag, var in self.tag_vars.items() if var.get()]
+
+        # 获取选择的招募位
+        slot_option = self.slot_var.get()
+        slot_number = None if slot_option == "所有" else int(slot_option)
+
+        # 获取模板匹配阈值
+        threshold = self.recruit_threshold_var.get()
+
+        logger.info(f"开始执行公开招募功能...")
+        logger.info(f"选中的标签: {selected_tags}")
+        logger.info(f"选择的招募位: {slot_option}")
+        logger.info(f"模板匹配阈值: {threshold}")
+
+        # 如果没有选择标签，使用默认标签
+        if not selected_tags:
+            selected_tags = ["重装干员", "新手", "医疗干员"]
+            logger.info(f"未选择标签，使用默认标签: {selected_tags}")
+
+        self.start_task("公开招募", self._public_recruit, selected_tags, slot_number, threshold)
+
+    def _public_recruit(self, selected_tags, slot_number, threshold):
+        """
+        在后台线程中执行公开招募
+        """
+        # 导航到招募页面
+        logger.info("正在导航到招募页面...")
+        if not self.recruit_manager.navigate_to_recruit(threshold=threshold):
+            logger.error("无法导航到招募页面")
+            return False, "无法导航到招募页面"
+
+        # 执行招募操作
+        logger.info(f"正在执行招募操作，目标标签: {selected_tags}")
+        success = self.recruit_manager.enter_recruit_slots(slot_number=slot_number, target_tags=selected_tags,
+                                                           threshold=threshold)
+
+        if success:
+            logger.info("公开招募操作完成!")
+            return True, "公开招募操作已完成!"
+        logger.error("公开招募操作失败!")
+        return False, "无法完成公开招募操作，请检查游戏界面是否正确。"
 
     def claim_task_rewards(self):
         """
         领取任务奖励功能
         """
-        try:
-            logger.info("开始执行领取任务奖励功能...")
-            
-            # 显示提示信息
-            messagebox.showinfo("提示", "请确保已在主菜单界面\n3秒后开始执行...")
-            
-            # 等待3秒
-            time.sleep(3)
-            
-            # 隐藏窗口
-            self.root.withdraw()
-            
-            logger.info("正在尝试领取任务奖励...")
-            # 使用已初始化的任务管理模块实例领取奖励
-            success = self.task_manager.claim_all_rewards()
-            
-            if success:
-                logger.info("领取任务奖励成功!")
-                messagebox.showinfo("成功", "任务奖励已成功领取!")
-            else:
-                logger.error("领取任务奖励失败!")
-                messagebox.showerror("失败", "无法领取任务奖励，请检查游戏界面是否正确。")
-        except ElementNotFoundError as e:
-            logger.error(f"执行失败: 未找到元素 - {e}")
-            messagebox.showerror("失败", f"未找到元素: {e}\n可能的原因: 游戏窗口未正确唤出、界面与模板不匹配")
-        except OperationFailedError as e:
-            logger.error(f"执行失败: 操作失败 - {e}")
-            messagebox.showerror("失败", f"操作失败: {e}\n可能的原因: 鼠标点击操作未能正确执行")
-        except Exception as e:
-            logger.error(f"执行过程中发生未知错误: {str(e)}")
-            messagebox.showerror("错误", f"发生未知错误: {str(e)}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            # 显示窗口
-            self.root.deiconify()
-        
+        logger.info("开始执行领取任务奖励功能...")
+        self.start_task("领取任务奖励", self._claim_task_rewards)
+
+    def _claim_task_rewards(self):
+        """
+        在后台线程中领取任务奖励
+        """
+        logger.info("正在尝试领取任务奖励...")
+        # 使用已初始化的任务管理模块实例领取奖励
+        success = self.task_manager.claim_all_rewards()
+
+        if success:
+            logger.info("领取任务奖励成功!")
+            return True, "任务奖励已成功领取!"
+        logger.error("领取任务奖励失败!")
+        return False, "无法领取任务奖励，请检查游戏界面是否正确。"
+
     def toggle_log_window(self):
         """
         切换日志窗口的显示/隐藏状态
@@ -1161,9 +1240,78 @@ class ZOOTGui:
                 f.write(f'    LOG_WINDOW_OPACITY = {settings.LOG_WINDOW_OPACITY:.1f}\n')
                 f.write(f'    LOG_WINDOW_WIDTH = {settings.LOG_WINDOW_WIDTH}     # 日志窗口宽度\n')
                 f.write('    LOG_WINDOW_HEIGHT = 300    # 日志窗口高度\n')
+                f.write(f'    LOG_WINDOW_MAX_LINES = {settings.LOG_WINDOW_MAX_LINES}    # 日志窗口最多保留的行数，超出时删除最早的行\n')
+                f.write(f'    LOG_WINDOW_FLUSH_INTERVAL = {settings.LOG_WINDOW_FLUSH_INTERVAL}    # 日志窗口批量刷新的间隔(毫秒)\n')
+                f.write('\n')
+                f.write('    # 日志文件设置\n')
+                f.write(f'    LOG_FILE_MAX_MB = {settings.LOG_FILE_MAX_MB}    # 单个日志文件的大小上限(MB)，超出或跨天时轮转，为0时只按日期轮转\n')
+                f.write(f'    LOG_FILE_BACKUP_COUNT = {settings.LOG_FILE_BACKUP_COUNT}    # 保留的轮转日志文件数量，为0时不删除旧文件\n')
+                f.write(f'    LOG_FILE_COMPRESS = {settings.LOG_FILE_COMPRESS}    # 是否将轮转后的日志文件压缩为gzip\n')
+                f.write(f'    LOG_JSON_ENABLED = {settings.LOG_JSON_ENABLED}    # 是否同时输出JSON格式的日志(日期.jsonl)，便于程序分析\n')
                 f.write('    \n')
                 f.write('    # 截图存储设置\n')
-                f.write(f'    SAVE_SCREENSHOTS = {settings.SAVE_SCREENSHOTS}    # 是否保存截图用于调试\n\n')
+                f.write(f'    SAVE_SCREENSHOTS = {settings.SAVE_SCREENSHOTS}    # 是否保存截图用于调试\n')
+                f.write(f"    SCREENSHOT_FORMAT = '{settings.SCREENSHOT_FORMAT}'    # 调试截图格式: 'jpg'、'png'或'webp'\n")
+                f.write(f'    SCREENSHOT_QUALITY = {settings.SCREENSHOT_QUALITY}    # jpg和webp调试截图的编码质量 (1-100)\n')
+                f.write(f'    SCREENSHOT_QUEUE_SIZE = {settings.SCREENSHOT_QUEUE_SIZE}    # 等待后台写入的调试截图数量上限，队列已满时丢弃新的截图\n')
+                f.write(f'    SCREENSHOT_DISK_BUDGET_MB = {settings.SCREENSHOT_DISK_BUDGET_MB}    # 调试截图占用磁盘空间的上限(MB)，超出时删除最早的截图，为0时不限制\n')
+                f.write('\n')
+                f.write('    # 飞行记录器设置\n')
+                f.write(f'    FLIGHT_RECORDER_ENABLED = {settings.FLIGHT_RECORDER_ENABLED}    # 是否在内存中记录最近的画面、匹配结果和操作，流程失败时写入logs/flight\n')
+                f.write(f'    FLIGHT_RECORDER_FRAMES = {settings.FLIGHT_RECORDER_FRAMES}    # 保留的最近画面数量\n')
+                f.write(f'    FLIGHT_RECORDER_SCALE = {settings.FLIGHT_RECORDER_SCALE}    # 记录画面的缩放比例\n')
+                f.write(f'    FLIGHT_RECORDER_INTERVAL = {settings.FLIGHT_RECORDER_INTERVAL}    # 两次记录画面之间的最短间隔(秒)\n')
+                f.write('\n')
+                f.write('    # 耗时追踪设置\n')
+                f.write(f'    TRACE_ENABLED = {settings.TRACE_ENABLED}    # 是否记录各步骤的耗时，每个任务结束后导出为Chrome trace格式(logs/trace_*.json)\n')
+                f.write(f'    TRACE_MAX_EVENTS = {settings.TRACE_MAX_EVENTS}    # 内存中保留的耗时事件数量上限\n')
+                f.write('\n')
+                f.write('    # 图像识别设置\n')
+                f.write(f'    TEMPLATE_CACHE_SIZE = {settings.TEMPLATE_CACHE_SIZE}    # 内存中缓存的已解码模板数量上限\n')
+                f.write(f"    MATCH_MODE = '{settings.MATCH_MODE}'    # 模板匹配模式: 'full'为全分辨率匹配，'pyramid'为由粗到精的金字塔匹配\n")
+                f.write(f'    PYRAMID_SCALE = {settings.PYRAMID_SCALE}    # 金字塔匹配粗匹配阶段的缩放比例\n')
+                f.write(f'    PYRAMID_MARGIN = {settings.PYRAMID_MARGIN}    # 粗匹配阈值相对匹配阈值的放宽量\n')
+                f.write(f'    PYRAMID_CANDIDATES = {settings.PYRAMID_CANDIDATES}    # 粗匹配阶段保留的候选位置数量\n')
+                f.write(f'    ROI_INDEX_ENABLED = {settings.ROI_INDEX_ENABLED}    # 是否优先在模板历史出现位置附近搜索\n')
+                f.write(f'    ROI_PADDING = {settings.ROI_PADDING}    # 历史位置搜索区域四周扩展的像素数\n')
+                f.write(f'    ROI_HISTORY_SIZE = {settings.ROI_HISTORY_SIZE}    # 每个模板保留的最近命中位置数量，搜索区域为这些位置的包围框\n')
+                f.write(f'    ROI_RECORD_MARGIN = {settings.ROI_RECORD_MARGIN}    # 匹配值至少超过阈值该值时才记录命中位置，避免误匹配污染索引\n')
+                f.write(f'    ROI_FALLBACK_INTERVAL = {settings.ROI_FALLBACK_INTERVAL}    # 界面识别只在历史位置搜索且未识别出界面时，全图重新搜索的最短间隔(秒)\n')
+                f.write(f'    MATCH_WORKERS = {settings.MATCH_WORKERS}    # 并发模板匹配线程数，0表示使用CPU核心数\n')
+                f.write(f'    OPENCV_THREADS = {settings.OPENCV_THREADS}    # OpenCV内部线程数，-1表示使用OpenCV默认值，0表示禁用内部多线程\n')
+                f.write(f'    FRAME_DIFF_TOLERANCE = {settings.FRAME_DIFF_TOLERANCE}    # 画面指纹各单元格像素差均不超过该值时视为画面未变化\n')
+                f.write(f'    CAPTURE_BUFFER_COUNT = {settings.CAPTURE_BUFFER_COUNT}    # 截图环形缓冲区数量，截图在之后的(该值-1)次截图内保持有效\n')
+                f.write(f'    FRAME_GRABBER_ENABLED = {settings.FRAME_GRABBER_ENABLED}    # 是否启用后台截图服务（全屏截图直接取最新一帧）\n')
+                f.write(f'    CAPTURE_RATE_ACTIVE = {settings.CAPTURE_RATE_ACTIVE}    # 菜单操作阶段的后台截图频率(帧/秒)\n')
+                f.write(f'    CAPTURE_RATE_IDLE = {settings.CAPTURE_RATE_IDLE}    # 等待战斗结束阶段的后台截图频率(帧/秒)\n')
+                f.write(f'    GAME_WINDOW_CAPTURE = {settings.GAME_WINDOW_CAPTURE}    # 是否只捕获游戏窗口所在区域（截图坐标以窗口左上角为原点，固定的屏幕坐标裁剪区域需用frame_region换算）\n')
+                f.write(f'    GAME_WINDOW_TITLE = {settings.GAME_WINDOW_TITLE!r}    # 游戏窗口标题\n')
+                f.write(f'    GAME_WINDOW_RECHECK_INTERVAL = {settings.GAME_WINDOW_RECHECK_INTERVAL}    # 重新校验游戏窗口位置的间隔(秒)\n')
+                f.write('\n')
+                f.write('    # 界面等待设置\n')
+                f.write(f'    WAIT_TIMEOUT = {settings.WAIT_TIMEOUT}    # 等待界面元素出现的默认最长时间(秒)\n')
+                f.write(f'    WAIT_POLL_MIN = {settings.WAIT_POLL_MIN}    # 操作后首次检测界面元素的间隔(秒)\n')
+                f.write(f'    WAIT_POLL_MAX = {settings.WAIT_POLL_MAX}    # 检测界面元素的最长间隔(秒)\n')
+                f.write(f'    WAIT_POLL_BACKOFF = {settings.WAIT_POLL_BACKOFF}    # 每次未检测到元素后检测间隔的增长倍数\n')
+                f.write(f'    WAIT_SETTLE_TIMEOUT = {settings.WAIT_SETTLE_TIMEOUT}    # 操作后等待画面离开操作前样子的最长时间(秒)，画面变化前不查找界面元素\n')
+                f.write(f'    LATENCY_MODEL_ENABLED = {settings.LATENCY_MODEL_ENABLED}    # 是否记录各界面切换的耗时，并据此自动调整等待超时和首次检测延迟\n')
+                f.write(f'    LATENCY_MIN_SAMPLES = {settings.LATENCY_MIN_SAMPLES}    # 记录达到该次数后才按历史耗时调整等待\n')
+                f.write(f'    LATENCY_TIMEOUT_FACTOR = {settings.LATENCY_TIMEOUT_FACTOR}    # 等待超时为历史95分位耗时的倍数，可短于调用方给出的超时，最多延长到调用方超时的该倍数\n')
+                f.write(f'    LATENCY_MIN_TIMEOUT = {settings.LATENCY_MIN_TIMEOUT}    # 按历史耗时推算的等待超时下限(秒)\n')
+                f.write('\n')
+                f.write('    # 操作校验设置\n')
+                f.write(f'    VERIFY_ACTIONS = {settings.VERIFY_ACTIONS}    # 是否校验操作结果（操作后画面变化立即继续，没有变化时重试），代替固定的操作延迟\n')
+                f.write(f'    VERIFY_TIMEOUT = {settings.VERIFY_TIMEOUT}    # 等待操作后画面变化的最长时间(秒)\n')
+                f.write(f'    VERIFY_RETRIES = {settings.VERIFY_RETRIES}    # 操作后画面没有变化时的重试次数（只对调用时声明可以重复执行的操作生效）\n')
+                f.write(f'    VERIFY_REGION_RADIUS = {settings.VERIFY_REGION_RADIUS}    # 校验操作位置附近区域的半径(像素)\n')
+                f.write(f'    VERIFY_POLL_INTERVAL = {settings.VERIFY_POLL_INTERVAL}    # 校验操作结果时的截图间隔(秒)\n')
+                f.write('\n')
+                f.write('    # 战斗时长估计设置\n')
+                f.write(f'    BATTLE_ESTIMATE_ENABLED = {settings.BATTLE_ESTIMATE_ENABLED}    # 是否按各关卡的历史战斗时长，在战斗的大部分时间内停止截图\n')
+                f.write(f'    BATTLE_IDLE_PERCENTILE = {settings.BATTLE_IDLE_PERCENTILE}    # 停止截图的时长为历史战斗时长的该分位数\n')
+                f.write(f'    BATTLE_IDLE_MARGIN = {settings.BATTLE_IDLE_MARGIN}    # 比预计最短战斗时长提前恢复截图的时间(秒)\n')
+                f.write(f'    BATTLE_WINDOW_PERCENTILE = {settings.BATTLE_WINDOW_PERCENTILE}    # 预计战斗结束时间段的终点为历史战斗时长的该分位数\n')
+                f.write(f'    BATTLE_POLL_INTERVAL = {settings.BATTLE_POLL_INTERVAL}    # 预计战斗结束时间段内检测战斗结束的间隔(秒)\n\n')
                 f.write('# 创建设置实例\n')
                 f.write('settings = Settings()\n')
             
@@ -1174,7 +1322,11 @@ class ZOOTGui:
             messagebox.showerror("失败", f"保存配置失败: {str(e)}")
 
     def on_closing(self):
-        # 退出程序
+        # 停止正在执行的任务，释放截图资源后退出程序
+        if self.task_thread is not None and self.task_thread.is_alive():
+            self.detector.cancel()
+            self.task_thread.join(timeout=5)
+        self.detector.close()
         self.root.destroy()
         
 def main():
@@ -3,8 +3,9 @@
 负责处理与明日方舟基建相关的操作，包括从主菜单导航到基建等功能
 """
 import os
-import time
-from core import Controller, Detector
+from core import Controller, Detector, Navigator
+from core.screens import SCREEN_BASE, SCREEN_MAIN_MENU
+from core.tracing import tracer
 from core.exceptions import ElementNotFoundError, OperationFailedError
 from utils import logger
 
@@ -25,8 +26,9 @@ class BaseManagementModule:
             controller (Controller): 控制器实例
             detector (Detector): 检测器实例
         """
-        self.controller = controller or Controller()
         self.detector = detector or Detector()
+        self.controller = controller or Controller(detector=self.detector)
+        self.navigator = Navigator(self.detector, self.controller)
         # 模板图片路径
         self.base_btn_template = os.path.join(TEMPLATES_DIR, 'main_menu_base_btn.png')
         self.back_btn_template = os.path.join(TEMPLATES_DIR, 'back_btn.png')
@@ -38,9 +40,10 @@ class BaseManagementModule:
         self.home_btn_template = os.path.join(TEMPLATES_DIR, 'home_btn.png')
         self.true_btn_template = os.path.join(TEMPLATES_DIR, 'true_btn.png')
 
+    @tracer.traced()
     def navigate_to_base(self, threshold=0.8):
         """
-        从主菜单导航到基建
+        从当前界面导航到基建
 
         Args:
             threshold (float): 模板匹配阈值，默认为0.8
@@ -49,24 +52,14 @@ class BaseManagementModule:
             bool: 导航成功返回True，失败返回False
 
         Raises:
-            ElementNotFoundError: 未找到基建按钮时抛出
+            ElementNotFoundError: 无法识别当前界面或未找到导航按钮时抛出
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找基建按钮
-            base_btn_pos = self.detector.find_template(screenshot, self.base_btn_template, threshold=threshold)
-
-            if base_btn_pos:
-                # 点击基建按钮
-                x, y, _, _ = base_btn_pos
-                self.controller.click(x, y)
-                logger.info("成功导航到基建")
-                return True
-            else:
-                raise ElementNotFoundError('main_menu_base_btn.png', "未找到基建按钮")
+            # 进入基建需要较长的加载时间
+            self.navigator.navigate(SCREEN_BASE, threshold=threshold, timeout=30)
+            logger.info("成功导航到基建")
+            return True
         except ElementNotFoundError:
             raise
         except OperationFailedError:
@@ -74,6 +67,7 @@ class BaseManagementModule:
         except Exception as e:
             raise OperationFailedError("导航到基建") from e
 
+    @tracer.traced()
     def navigate_back_from_base(self):
         """
         从基建返回到主菜单
@@ -86,11 +80,8 @@ class BaseManagementModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找返回按钮
-            back_btn_pos = self.detector.find_template(screenshot, self.back_btn_template)
+            # 等待返回按钮出现
+            back_btn_pos = self.detector.wait_for(self.back_btn_template)
 
             if back_btn_pos:
                 # 点击返回按钮
@@ -107,6 +98,7 @@ class BaseManagementModule:
         except Exception as e:
             raise OperationFailedError("从基建返回主菜单") from e
 
+    @tracer.traced()
     def exit_from_base(self, threshold=0.8):
         """
         退出基建，返回到主界面
@@ -122,54 +114,10 @@ class BaseManagementModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找顶栏
-            top_bar_pos = self.detector.find_template(screenshot, self.top_bar_template, threshold=threshold)
-
-            if top_bar_pos:
-                # 点击顶栏
-                x, y, _, _ = top_bar_pos
-                self.controller.click(x, y)
-                logger.info("成功点击顶栏")
-                
-                # 等待菜单加载
-                time.sleep(1)
-                
-                # 重新捕获屏幕截图
-                screenshot = self.detector.capture_screen()
-                
-                # 在截图中查找首页按钮
-                home_btn_pos = self.detector.find_template(screenshot, self.home_btn_template, threshold=threshold)
-                
-                if home_btn_pos:
-                    # 点击首页按钮
-                    x, y, _, _ = home_btn_pos
-                    self.controller.click(x, y)
-                    logger.info("成功点击首页按钮")
-                    
-                    # 等待确认对话框加载
-                    time.sleep(1)
-                    
-                    # 重新捕获屏幕截图
-                    screenshot = self.detector.capture_screen()
-                    
-                    # 在截图中查找确认按钮
-                    true_btn_pos = self.detector.find_template(screenshot, self.true_btn_template, threshold=threshold)
-                    
-                    if true_btn_pos:
-                        # 点击确认按钮
-                        x, y, _, _ = true_btn_pos
-                        self.controller.click(x, y)
-                        logger.info("成功点击确认按钮")
-                        return True
-                    else:
-                        raise ElementNotFoundError('true_btn.png', "未找到确认按钮")
-                else:
-                    raise ElementNotFoundError('home_btn.png', "未找到首页按钮")
-            else:
-                raise ElementNotFoundError('top_bar.png', "未找到顶栏")
+            # 基建内可能停留在通知等子界面上，直接按基建界面规划返回路径
+            self.navigator.navigate(SCREEN_MAIN_MENU, threshold=threshold, source=SCREEN_BASE)
+            logger.info("成功退出基建")
+            return True
         except ElementNotFoundError:
             raise
         except OperationFailedError:
@@ -177,6 +125,7 @@ class BaseManagementModule:
         except Exception as e:
             raise OperationFailedError("退出基建") from e
 
+    @tracer.traced()
     def complete_tasks(self, threshold=0.8):
         """
         完成基建中的事项
@@ -192,11 +141,8 @@ class BaseManagementModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找通知按钮
-            notification_btn_pos = self.detector.find_template(screenshot, self.notification_btn_template, threshold=threshold)
+            # 等待通知按钮出现（刚进入基建时加载较慢；此时已由导航进入基建，不计入界面切换耗时）
+            notification_btn_pos = self.detector.wait_for(self.notification_btn_template, timeout=30, threshold=threshold)
 
             if notification_btn_pos:
                 # 点击通知按钮
@@ -204,14 +150,9 @@ class BaseManagementModule:
                 self.controller.click(x, y)
                 logger.info("成功点击通知按钮")
                 
-                # 等待通知面板加载
-                time.sleep(1)
-                
-                # 重新捕获屏幕截图
-                screenshot = self.detector.capture_screen()
-                
-                # 在截图中查找通知标题
-                notification_title_pos = self.detector.find_template(screenshot, self.notification_title_template, threshold=threshold)
+                # 等待通知标题出现
+                notification_title_pos = self.detector.wait_for(self.notification_title_template, threshold=threshold,
+                                                                transition='base->notification')
                 
                 if notification_title_pos:
                     # 计算点击位置（标题右面约75像素）
@@ -223,7 +164,7 @@ class BaseManagementModule:
                     for i in range(5):
                         self.controller.click(click_x, click_y)
                         logger.info(f"成功点击位置 ({click_x}, {click_y})，第 {i+1} 次")
-                        time.sleep(0.5)  # 间隔0.5秒
+                        self.detector.sleep(0.5)  # 间隔0.5秒
                         
                     # 计算关闭按钮位置（标题向上偏移100像素）
                     close_x = title_x
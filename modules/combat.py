@@ -3,16 +3,43 @@
 负责处理与明日方舟作战相关的操作，包括自动代理剿灭作战等功能
 """
 import os
-import time
 import cv2
-from core import Controller, Detector
-from core.exceptions import ElementNotFoundError, OperationFailedError, ImageRecognitionError
+from core import Controller, Detector, LatencyModel, Navigator
+from core.screens import SCREEN_MISSION, SCREEN_NORMAL_AFFAIRS, SCREEN_ELIMINATE, SCREEN_MAIN_MENU
+from core.digits import digit_recognizer
+from core.tracing import tracer
+from core.exceptions import (ElementNotFoundError, OperationFailedError, ImageRecognitionError, OperationCancelledError,
+                             ConfigurationError)
 from utils import logger
+from config.settings import settings
 
 # 获取项目根目录
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # 设置模板目录路径
 TEMPLATES_DIR = os.path.join(PROJECT_ROOT, 'templates')
+# 战斗时长记录文件路径
+BATTLE_DURATIONS_PATH = os.path.join(PROJECT_ROOT, 'data', 'battle_durations.json')
+# 战斗时长未区分关卡时使用的关卡名称
+DEFAULT_STAGE = 'default'
+
+# 作战流程状态
+STATE_STAGE = 'stage'            # 关卡界面，等待开始行动按钮
+STATE_SQUAD = 'squad'            # 编队界面，等待开始行动确认按钮
+STATE_BATTLE = 'battle'          # 作战中，等待作战结束后出现的界面
+STATE_SETTLEMENT = 'settlement'  # 结算中，等待行动结束界面
+STATE_DONE = 'done'              # 作战结束
+
+# 各状态下可能出现的界面，同时出现时按列表顺序优先处理靠前的界面
+# 等级提升、行动失败和理智不足对话框还没有模板，暂不识别，出现时只能按等待超时处理
+COMBAT_STATE_SCREENS = {
+    STATE_STAGE: ['stage', 'results'],
+    STATE_SQUAD: ['squad'],
+    STATE_BATTLE: ['results', 'briefing'],
+    STATE_SETTLEMENT: ['results', 'briefing'],
+}
+
+# 所有作战模块共享的各关卡战斗时长记录
+battle_durations = LatencyModel(BATTLE_DURATIONS_PATH, max_samples=30)
 
 
 class CombatModule:
@@ -26,8 +53,9 @@ class CombatModule:
             controller (Controller): 控制器实例
             detector (Detector): 检测器实例
         """
-        self.controller = controller or Controller()
         self.detector = detector or Detector()
+        self.controller = controller or Controller(detector=self.detector)
+        self.navigator = Navigator(self.detector, self.controller)
         # 模板图片路径
         self.mission_btn_template = os.path.join(TEMPLATES_DIR, 'main_menu_mission_btn.png')
         self.back_btn_template = os.path.join(TEMPLATES_DIR, 'back_btn.png')
@@ -49,14 +77,25 @@ class CombatModule:
         self.mission_results_template = os.path.join(TEMPLATES_DIR, 'MISSION_RESULTS.png')
         self.top_bar_template = os.path.join(TEMPLATES_DIR, 'top_bar.png')
         self.home_btn_template = os.path.join(TEMPLATES_DIR, 'home_btn.png')
+        # 作战流程中各界面对应的模板
+        self.combat_screens = {
+            'stage': self.mission_start_btn_template,
+            'squad': self.operation_start_btn_template,
+            'briefing': self.combat_briefing_template,
+            'results': self.mission_results_template,
+        }
+        self.battle_durations = battle_durations
+        self.digit_recognizer = digit_recognizer
         # 理智识别区域坐标（根据游戏界面调整）
         # x：templates\remaining_sanity.png向右偏移255至390，y：与templates\remaining_sanity.png相同
         self.remaining_sanity_area = (0, 0, 135, 40)  # 初始值，实际使用时会基于模板位置计算
-        self.consuming_sanity_area = (850, 640, 950, 670)  # 再次调整消耗理智区域坐标 (x1, y1, x2, y2)
+        # 消耗理智区域的屏幕坐标 (x1, y1, x2, y2)，只截取游戏窗口时需换算为截图中的坐标后再裁剪
+        self.consuming_sanity_area = (850, 640, 950, 670)
 
+    @tracer.traced()
     def navigate_to_mission(self, threshold=0.8):
         """
-        从主菜单导航到作战界面
+        从当前界面导航到作战界面
 
         Args:
             threshold (float): 模板匹配阈值，默认为0.8
@@ -65,24 +104,13 @@ class CombatModule:
             bool: 导航成功返回True，失败返回False
 
         Raises:
-            ElementNotFoundError: 未找到作战按钮时抛出
+            ElementNotFoundError: 无法识别当前界面或未找到导航按钮时抛出
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找作战按钮
-            mission_btn_pos = self.detector.find_template(screenshot, self.mission_btn_template, threshold=threshold)
-
-            if mission_btn_pos:
-                # 点击作战按钮
-                x, y, _, _ = mission_btn_pos
-                self.controller.click(x, y)
-                logger.info("成功导航到作战界面")
-                return True
-            else:
-                raise ElementNotFoundError('main_menu_mission_btn.png', "未找到作战按钮")
+            self.navigator.navigate(SCREEN_MISSION, threshold=threshold)
+            logger.info("成功导航到作战界面")
+            return True
         except ElementNotFoundError:
             raise
         except OperationFailedError:
@@ -90,6 +118,7 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("导航到作战界面") from e
 
+    @tracer.traced()
     def navigate_back_from_mission(self):
         """
         从作战界面返回到主菜单
@@ -102,11 +131,8 @@ class CombatModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找返回按钮
-            back_btn_pos = self.detector.find_template(screenshot, self.back_btn_template)
+            # 等待返回按钮出现
+            back_btn_pos = self.detector.wait_for(self.back_btn_template)
 
             if back_btn_pos:
                 # 点击返回按钮
@@ -123,9 +149,10 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("从作战界面返回主菜单") from e
 
+    @tracer.traced()
     def navigate_to_normal_affairs(self, threshold=0.8):
         """
-        从作战界面导航到常态事务
+        从当前界面导航到常态事务
 
         Args:
             threshold (float): 模板匹配阈值，默认为0.8
@@ -134,24 +161,13 @@ class CombatModule:
             bool: 导航成功返回True，失败返回False
 
         Raises:
-            ElementNotFoundError: 未找到常态事务按钮时抛出
+            ElementNotFoundError: 无法识别当前界面或未找到导航按钮时抛出
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找常态事务按钮
-            normal_affairs_btn_pos = self.detector.find_template(screenshot, self.normal_affairs_btn_template, threshold=threshold)
-
-            if normal_affairs_btn_pos:
-                # 点击常态事务按钮
-                x, y, _, _ = normal_affairs_btn_pos
-                self.controller.click(x, y)
-                logger.info("成功导航到常态事务")
-                return True
-            else:
-                raise ElementNotFoundError('normal_affairs_btn.png', "未找到常态事务按钮")
+            self.navigator.navigate(SCREEN_NORMAL_AFFAIRS, threshold=threshold)
+            logger.info("成功导航到常态事务")
+            return True
         except ElementNotFoundError:
             raise
         except OperationFailedError:
@@ -159,9 +175,10 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("导航到常态事务") from e
 
+    @tracer.traced()
     def navigate_to_eliminate(self, threshold=0.8):
         """
-        从常态事务界面导航到剿灭作战
+        从当前界面导航到剿灭作战
 
         Args:
             threshold (float): 模板匹配阈值，默认为0.8
@@ -170,28 +187,13 @@ class CombatModule:
             bool: 导航成功返回True，失败返回False
 
         Raises:
-            ElementNotFoundError: 未找到剿灭作战图标时抛出
+            ElementNotFoundError: 无法识别当前界面或未找到导航按钮时抛出
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找剿灭作战图标
-            exterminated_icon_pos = self.detector.find_template(screenshot, self.exterminated_icon_template, threshold=threshold)
-
-            if exterminated_icon_pos:
-                # 计算向下偏移430像素后的点击位置
-                x, y, _, _ = exterminated_icon_pos
-                click_x = x
-                click_y = y + 430
-
-                # 点击计算后的位置
-                self.controller.click(click_x, click_y)
-                logger.info("成功导航到剿灭作战")
-                return True
-            else:
-                raise ElementNotFoundError('exterminated_icon.png', "未找到剿灭作战图标")
+            self.navigator.navigate(SCREEN_ELIMINATE, threshold=threshold)
+            logger.info("成功导航到剿灭作战")
+            return True
         except ElementNotFoundError:
             raise
         except OperationFailedError:
@@ -199,6 +201,7 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("导航到剿灭作战") from e
 
+    @tracer.traced()
     def navigate_to_longmen(self, threshold=0.8):
         """
         导航到龙门外环
@@ -214,26 +217,21 @@ class CombatModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找longmen_01模板
-            longmen_01_pos = self.detector.find_template(screenshot, self.longmen_01_template, threshold=threshold)
+            # 等待longmen_01模板出现
+            # 此时已由导航进入剿灭作战界面，不计入界面切换耗时
+            longmen_01_pos = self.detector.wait_for(self.longmen_01_template, threshold=threshold)
 
             if longmen_01_pos:
                 # 点击longmen_01
                 x1, y1, _, _ = longmen_01_pos
                 self.controller.click(x1, y1)
                 logger.info("成功点击longmen_01")
-                time.sleep(2)
             else:
                 raise ElementNotFoundError('longmen_01.png', "未找到longmen_01模板")
 
-            # 重新捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找longmen_02模板
-            longmen_02_pos = self.detector.find_template(screenshot, self.longmen_02_template, threshold=threshold)
+            # 等待longmen_02模板出现
+            longmen_02_pos = self.detector.wait_for(self.longmen_02_template, threshold=threshold,
+                                                    transition='longmen_01->longmen_02')
 
             if longmen_02_pos:
                 # 记录longmen_02的坐标
@@ -246,7 +244,7 @@ class CombatModule:
                 click_y = y2
                 self.controller.click(click_x, click_y)
                 logger.info("成功点击longmen_02向右偏移425像素的位置")
-                time.sleep(2)
+                self.detector.sleep(2)
             else:
                 raise ElementNotFoundError('longmen_02.png', "未找到longmen_02模板")
 
@@ -271,6 +269,7 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("导航到龙门外环") from e
 
+    @tracer.traced()
     def navigate_to_longmen_city(self, threshold=0.8):
         """
         导航到龙门市区
@@ -286,26 +285,21 @@ class CombatModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找longmen_01模板
-            longmen_01_pos = self.detector.find_template(screenshot, self.longmen_01_template, threshold=threshold)
+            # 等待longmen_01模板出现
+            # 此时已由导航进入剿灭作战界面，不计入界面切换耗时
+            longmen_01_pos = self.detector.wait_for(self.longmen_01_template, threshold=threshold)
 
             if longmen_01_pos:
                 # 点击longmen_01
                 x1, y1, _, _ = longmen_01_pos
                 self.controller.click(x1, y1)
                 logger.info("成功点击longmen_01")
-                time.sleep(2)
             else:
                 raise ElementNotFoundError('longmen_01.png', "未找到longmen_01模板")
 
-            # 重新捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找longmen_03模板
-            longmen_03_pos = self.detector.find_template(screenshot, self.longmen_03_template, threshold=threshold)
+            # 等待longmen_03模板出现
+            longmen_03_pos = self.detector.wait_for(self.longmen_03_template, threshold=threshold,
+                                                    transition='longmen_01->longmen_03')
 
             if longmen_03_pos:
                 # 记录longmen_03的坐标
@@ -318,7 +312,7 @@ class CombatModule:
                 click_y = y2
                 self.controller.click(click_x, click_y)
                 logger.info("成功点击longmen_03向右偏移425像素的位置")
-                time.sleep(2)
+                self.detector.sleep(2)
             else:
                 raise ElementNotFoundError('longmen_03.png', "未找到longmen_03模板")
 
@@ -343,6 +337,7 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("导航到龙门市区") from e
 
+    @tracer.traced()
     def navigate_to_current_commission(self, threshold=0.8):
         """
         导航到当期委托地点
@@ -358,26 +353,21 @@ class CombatModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找longmen_01模板
-            longmen_01_pos = self.detector.find_template(screenshot, self.longmen_01_template, threshold=threshold)
+            # 等待longmen_01模板出现
+            # 此时已由导航进入剿灭作战界面，不计入界面切换耗时
+            longmen_01_pos = self.detector.wait_for(self.longmen_01_template, threshold=threshold)
 
             if longmen_01_pos:
                 # 点击longmen_01
                 x1, y1, _, _ = longmen_01_pos
                 self.controller.click(x1, y1)
                 logger.info("成功点击longmen_01")
-                time.sleep(2)
             else:
                 raise ElementNotFoundError('longmen_01.png', "未找到longmen_01模板")
 
-            # 重新捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找当期委托按钮
-            current_commission_btn_pos = self.detector.find_template(screenshot, self.current_commission_btn_template, threshold=threshold)
+            # 等待当期委托按钮出现
+            current_commission_btn_pos = self.detector.wait_for(self.current_commission_btn_template, threshold=threshold,
+                                                                transition='longmen_01->current_commission')
 
             if current_commission_btn_pos:
                 # 点击当期委托按钮
@@ -395,84 +385,108 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("导航到当期委托地点") from e
 
-    def navigate_to_longmen_city(self, threshold=0.8):
+    @tracer.traced()
+    def recognize_remaining_sanity(self, screenshot=None, threshold=0.8):
         """
-        导航到龙门市区
+        识别关卡界面右上角的剩余理智
 
         Args:
-            threshold (float): 模板匹配阈值，默认为0.8
+            screenshot (numpy.ndarray): 关卡界面截图，为None时重新截图
+            threshold (float): 剩余理智模板的匹配阈值
 
         Returns:
-            bool: 导航成功返回True，失败返回False
-
-        Raises:
-            ElementNotFoundError: 未找到相关元素时抛出
-            OperationFailedError: 点击操作失败时抛出
+            int: 剩余理智，识别失败时返回None
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-
-            # 在截图中查找longmen_01模板
-            longmen_01_pos = self.detector.find_template(screenshot, self.longmen_01_template, threshold=threshold)
-
-            if longmen_01_pos:
-                # 点击longmen_01
-                x1, y1, _, _ = longmen_01_pos
-                self.controller.click(x1, y1)
-                logger.info("成功点击longmen_01")
-                time.sleep(2)
-            else:
-                raise ElementNotFoundError('longmen_01.png', "未找到longmen_01模板")
-
-            # 重新捕获屏幕截图
-            screenshot = self.detector.capture_screen()
+            if screenshot is None:
+                screenshot = self.detector.capture_screen()
+            sanity_pos = self.detector.find_template(screenshot, self.remaining_sanity_template, threshold)
+            if not sanity_pos:
+                logger.warning("未找到剩余理智模板")
+                return None
+            # 数字区域位于模板左边缘向右偏移255至390处，与模板垂直居中对齐
+            x, y = self.detector.frame_point(screenshot, sanity_pos[0], sanity_pos[1])
+            area_x1, area_y1, area_x2, area_y2 = self.remaining_sanity_area
+            left = x - sanity_pos[2] // 2 + 255
+            top = y - area_y2 // 2
+            region = (max(0, left + area_x1), max(0, top + area_y1),
+                      min(screenshot.shape[1], left + area_x2), min(screenshot.shape[0], top + area_y2))
+            value = self.digit_recognizer.read_fraction(self.detector.crop_image(screenshot, region))
+            if value is None:
+                logger.warning("剩余理智识别失败")
+                return None
+            logger.info(f"剩余理智: {value[0]}/{value[1]}")
+            return value[0]
+        except Exception as e:
+            logger.warning(f"剩余理智识别失败: {str(e)}")
+            return None
 
-            # 在截图中查找longmen_03模板
-            longmen_03_pos = self.detector.find_template(screenshot, self.longmen_03_template, threshold=threshold)
+    @tracer.traced()
+    def recognize_consuming_sanity(self, screenshot=None):
+        """
+        识别关卡界面开始行动按钮下方的理智消耗
 
-            if longmen_03_pos:
-                # 记录longmen_03的坐标
-                x2, y2, _, _ = longmen_03_pos
-                self.longmen_03_position = (x2, y2)
-                logger.info(f"已记录longmen_03坐标: ({x2}, {y2})")
-                
-                # 点击longmen_03向右偏移425像素的位置
-                click_x = x2 + 425
-                click_y = y2
-                self.controller.click(click_x, click_y)
-                logger.info("成功点击longmen_03向右偏移425像素的位置")
-                time.sleep(2)
-            else:
-                raise ElementNotFoundError('longmen_03.png', "未找到longmen_03模板")
+        Args:
+            screenshot (numpy.ndarray): 关卡界面截图，为None时重新截图
 
-            # 使用之前记录的longmen_03坐标
-            if hasattr(self, 'longmen_03_position'):
-                # 点击longmen_03向上偏移100像素的位置
-                x3, y3 = self.longmen_03_position
-                click_x = x3
-                click_y = y3 - 100
-                self.controller.click(click_x, click_y)
-                logger.info("成功点击longmen_03向上偏移100像素的位置")
-                logger.info("成功导航到龙门市区")
-                # 清除记录的坐标
-                delattr(self, 'longmen_03_position')
-                return True
-            else:
-                raise ElementNotFoundError('longmen_03.png', "未找到longmen_03模板或未记录坐标")
-        except ElementNotFoundError:
-            raise
-        except OperationFailedError:
-            raise
+        Returns:
+            int: 每次作战消耗的理智，识别失败时返回None
+        """
+        try:
+            if screenshot is None:
+                screenshot = self.detector.capture_screen()
+            # 区域按屏幕坐标给出，截图只包含游戏窗口时需要换算
+            region = self.detector.frame_region(screenshot, self.consuming_sanity_area)
+            value = self.digit_recognizer.read_int(self.detector.crop_image(screenshot, region))
+            if not value:
+                logger.warning("理智消耗识别失败")
+                return None
+            logger.info(f"每次作战消耗理智: {value}")
+            return value
         except Exception as e:
-            raise OperationFailedError("导航到龙门市区") from e
+            logger.warning(f"理智消耗识别失败: {str(e)}")
+            return None
 
-    # OCR相关功能已删除
+    def check_auto_cycles(self):
+        """
+        检查是否可以按剩余理智自动计算作战次数
+
+        Raises:
+            ConfigurationError: 缺少数字字形图片时抛出（内置字体识别游戏中的理智不可靠）
+        """
+        missing = self.digit_recognizer.missing_glyphs()
+        if missing:
+            raise ConfigurationError('templates/digits',
+                                     f"缺少数字字形图片: {' '.join(missing)}，无法按理智自动计算作战次数，"
+                                     f"请指定作战轮次，或使用DigitRecognizer.save_glyphs采集字形")
+
+    @tracer.traced()
+    def calculate_executable_times(self, threshold=0.8):
+        """
+        根据剩余理智和每次作战的理智消耗计算可执行的作战次数
 
-    # 直接删除了recognize_remaining_sanity方法
-    # 直接删除了recognize_consuming_sanity方法
-    # 直接删除了calculate_executable_times方法
+        Args:
+            threshold (float): 剩余理智模板的匹配阈值
 
+        Returns:
+            int: 可执行的作战次数，识别失败或缺少数字字形图片时返回None
+        """
+        try:
+            self.check_auto_cycles()
+        except ConfigurationError as e:
+            logger.error(e.message)
+            return None
+        # 两处数字在同一张截图上识别
+        screenshot = self.detector.capture_screen()
+        remaining = self.recognize_remaining_sanity(screenshot, threshold)
+        consuming = self.recognize_consuming_sanity(screenshot)
+        if remaining is None or consuming is None:
+            return None
+        times = remaining // consuming
+        logger.info(f"剩余理智可执行 {times} 次作战")
+        return times
+
+    @tracer.traced()
     def check_and_enable_acting_commander(self, threshold=0.6):
         """
         检查并启用代理指挥
@@ -488,36 +502,35 @@ class CombatModule:
             OperationFailedError: 点击操作失败时抛出
         """
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
+            # 等待代理指挥的启用或未启用状态出现
+            try:
+                state, state_pos = self.detector.wait_any(
+                    [self.acting_commander_on_template, self.acting_commander_off_template], timeout=5, threshold=threshold)
+            except ElementNotFoundError:
+                state, state_pos = None, None
 
             # 检查代理指挥是否已启用
-            try:
-                acting_commander_on_pos = self.detector.find_template(screenshot, self.acting_commander_on_template, threshold=threshold)
-                if acting_commander_on_pos:
-                    logger.info("代理指挥已经启用")
-                    return True
-            except ElementNotFoundError as e:
-                logger.warning(f"未找到代理指挥已启用模板: {str(e)}，尝试检查未启用状态")
+            if state == self.acting_commander_on_template:
+                logger.info("代理指挥已经启用")
+                return True
+            logger.warning("未找到代理指挥已启用模板，尝试检查未启用状态")
 
             # 检查代理指挥是否未启用
-            try:
-                acting_commander_off_pos = self.detector.find_template(screenshot, self.acting_commander_off_template, threshold=threshold)
-                if acting_commander_off_pos:
-                    # 点击启用代理指挥
-                    x, y, _, _ = acting_commander_off_pos
-                    self.controller.click(x, y)
-                    logger.info("成功启用代理指挥")
-                    time.sleep(1)
-                    return True
-            except ElementNotFoundError as e:
-                logger.warning(f"未找到代理指挥未启用模板: {str(e)}")
+            acting_commander_off_pos = state_pos
+            if acting_commander_off_pos:
+                # 点击启用代理指挥
+                x, y, _, _ = acting_commander_off_pos
+                self.controller.click(x, y)
+                logger.info("成功启用代理指挥")
+                self.detector.sleep(1)
+                return True
+            logger.warning("未找到代理指挥未启用模板")
 
             # 如果两个模板都未找到，尝试直接点击可能的位置
             logger.info("尝试直接点击可能的代理指挥位置")
             # 假设代理指挥按钮位于屏幕右下角区域（根据游戏界面调整坐标）
             self.controller.click(1700, 950)
-            time.sleep(1)
+            self.detector.sleep(1)
             return True
 
         except OperationFailedError:
@@ -525,6 +538,7 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("检查并启用代理指挥") from e
 
+    @tracer.traced()
     def auto_eliminate(self, threshold=0.8):
         """
         自动进行已解锁的代理剿灭作战
@@ -545,7 +559,7 @@ class CombatModule:
                 raise OperationFailedError("无法导航到作战界面")
 
             # 等待作战界面加载
-            time.sleep(2)
+            self.detector.sleep(2)
 
             # 这里将实现查找和点击剿灭作战的逻辑
             # 注意：由于缺少具体的模板图片和界面信息，以下代码为框架
@@ -562,13 +576,15 @@ class CombatModule:
             raise OperationFailedError("执行自动代理剿灭作战") from e
 
 
-    def auto_combat_flow(self, cycles=1, threshold=0.8):
+    @tracer.traced()
+    def auto_combat_flow(self, cycles=1, threshold=0.8, stage=None):
         """
         执行自动化作战流程(包含导航和检测)
 
         Args:
-            cycles (int): 作战循环次数，默认为1
+            cycles (int): 作战循环次数，默认为1；为None时按剩余理智和理智消耗自动计算
             threshold (float): 模板匹配阈值，默认为0.8
+            stage (str): 关卡名称，用于分别记录各关卡的战斗时长
 
         Returns:
             bool: 操作成功返回True，失败返回False
@@ -582,14 +598,11 @@ class CombatModule:
             if not self.navigate_to_mission(threshold=threshold):
                 raise OperationFailedError("无法导航到作战界面")
 
-            # 等待作战界面加载
-            time.sleep(2)
-
-            # 启用代理指挥
+            # 启用代理指挥（内部会等待代理指挥按钮出现）
             self.check_and_enable_acting_commander(threshold=threshold)
 
             # 调用仅作战流程 (移除了基于理智的循环次数计算)
-            return self.combat_only_flow(cycles, threshold)
+            return self.combat_only_flow(cycles, threshold, stage)
 
         except ElementNotFoundError:
             raise
@@ -598,136 +611,218 @@ class CombatModule:
         except Exception as e:
             raise OperationFailedError("执行自动作战流程失败") from e
 
-    def combat_only_flow(self, cycles=1, threshold=0.8):
+    @tracer.traced()
+    def _wait_screen(self, state, timeout=None, threshold=0.8, transition=None, interval=None):
+        """
+        等待当前状态下可能出现的任意一个界面，每一帧同时检测所有候选界面
+
+        Args:
+            state (str): 作战流程状态
+            timeout (float): 最长等待时间(秒)，默认使用配置中的WAIT_TIMEOUT
+            threshold (float): 模板匹配阈值
+            transition (str): 界面切换名称，用于记录和推算等待时间
+            interval (float): 固定的检测间隔(秒)，为None时逐渐拉长检测间隔
+
+        Returns:
+            tuple: (界面名称, (x, y, width, height))
+
+        Raises:
+            ElementNotFoundError: 超时仍未出现任何候选界面时抛出
+        """
+        names = COMBAT_STATE_SCREENS[state]
+        templates = [self.combat_screens[name] for name in names]
+        template, pos = self.detector.wait_any(templates, timeout=timeout, threshold=threshold,
+                                               transition=transition, interval=interval)
+        return names[templates.index(template)], pos
+
+    @tracer.traced()
+    def combat_only_flow(self, cycles=1, threshold=0.8, stage=None):
         """
         仅执行作战流程(从点击'开始行动'字样后开始)
 
+        流程按状态机执行：每个状态同时等待所有可能出现的界面，
+        由最先出现的界面（作战简报或行动结束）决定下一个状态。
+        等级提升、行动失败和理智不足对话框没有模板，不在识别范围内：
+        点击开始行动后未进入编队界面时按Esc关闭可能的理智对话框后返回False（无法区分理智不足和界面加载过慢），
+        作战结束后超时仍未出现可识别的界面时返回False
+
         Args:
-            cycles (int): 作战循环次数，默认为1
+            cycles (int): 作战循环次数，默认为1；为None时按剩余理智和理智消耗自动计算
             threshold (float): 模板匹配阈值，默认为0.8
+            stage (str): 关卡名称，用于分别记录各关卡的战斗时长，默认不区分关卡
 
         Returns:
-            bool: 操作成功返回True，失败返回False
+            bool: 完成全部轮次并返回首页时返回True，其余情况（包括无法识别的界面）返回False
 
         Raises:
-            ElementNotFoundError: 未找到相关元素时抛出
-            OperationFailedError: 点击操作失败时抛出
+            ConfigurationError: cycles为None但缺少数字字形图片时抛出，不执行任何操作
+            OperationCancelledError: 作战过程中被取消时抛出
         """
+        if cycles is None:
+            self.check_auto_cycles()
         try:
-            # 循环执行作战
-            for cycle in range(cycles):
-                logger.info(f"开始第 {cycle+1}/{cycles} 轮作战")
-
-                # 1. 点击"开始行动"按钮模板
-                logger.info("步骤1: 尝试点击开始行动按钮模板")
-                # 检查模板文件是否存在
-                if not os.path.exists(self.mission_start_btn_template):
-                    raise FileNotFoundError(f"开始行动按钮模板不存在: {self.mission_start_btn_template}")
-                
-                screenshot = self.detector.capture_screen()
-                start_btn_result = self.detector.find_template(screenshot, self.mission_start_btn_template, threshold=threshold)
-                x, y, _, _ = start_btn_result  # 只提取x和y坐标，忽略宽度和高度
-                self.controller.click(x, y)
-                logger.info(f"成功点击开始行动按钮位置: ({x}, {y})")
-                time.sleep(1)
-
-                # 2. 点击开始行动按钮模板 OPERATION_START_btn.png
-                logger.info("步骤2: 尝试点击开始行动按钮")
-                # 检查模板文件是否存在
-                if not os.path.exists(self.operation_start_btn_template):
-                    raise FileNotFoundError(f"开始行动按钮模板不存在: {self.operation_start_btn_template}")
-                
-                screenshot = self.detector.capture_screen()
-                start_btn_pos = self.detector.find_template(screenshot, self.operation_start_btn_template, threshold=threshold)
-                if start_btn_pos:
-                    x, y, _, _ = start_btn_pos
+            # 检查作战流程模板文件是否存在
+            for name in self.combat_screens:
+                if not os.path.exists(self.combat_screens[name]):
+                    raise FileNotFoundError(f"作战流程模板不存在: {self.combat_screens[name]}")
+
+            state = STATE_STAGE
+            completed = 0
+            while state != STATE_DONE:
+                if state == STATE_STAGE:
+                    # 第二轮起记录从行动结束回到关卡界面的耗时
+                    screen, pos = self._wait_screen(state, threshold=threshold,
+                                                    transition='results->stage' if completed else None)
+                    if screen == 'stage' and cycles is None:
+                        cycles = self.calculate_executable_times(threshold)
+                        if cycles is None:
+                            logger.warning("无法识别理智，只执行1轮作战")
+                            cycles = 1
+                    if screen == 'stage' and completed >= cycles:
+                        state = STATE_DONE
+                        continue
+                    x, y, _, _ = pos
                     self.controller.click(x, y)
-                    logger.info(f"成功点击开始行动按钮位置: ({x}, {y})")
-                    time.sleep(2)
-                else:
-                    raise ElementNotFoundError('OPERATION_START_btn.png', "未找到开始行动按钮")
-
-                # 3. 等待并点击作战简报模板
-                logger.info("等待作战简报模板出现")
-                briefing_found = False
-                # 为作战简报模板设置较低的阈值，提高识别成功率
-                briefing_threshold = threshold
-                # 检查模板文件是否存在
-                if not os.path.exists(self.combat_briefing_template):
-                    raise FileNotFoundError(f"作战简报模板不存在: {self.combat_briefing_template}")
-                if not os.path.exists(self.mission_results_template):
-                    raise FileNotFoundError(f"行动结束模板不存在: {self.mission_results_template}")
-                for _ in range(600):  # 最多等待30分钟（1800秒）                    
-                    screenshot = self.detector.capture_screen()
+                    if screen == 'stage':
+                        logger.info(f"开始第 {completed+1}/{cycles} 轮作战，点击开始行动按钮位置: ({x}, {y})")
+                        state = STATE_SQUAD
+                    else:
+                        # 上一轮的结算界面还没有关闭
+                        logger.info(f"关闭残留的结算界面: {screen}")
+
+                elif state == STATE_SQUAD:
                     try:
-                        briefing_pos = self.detector.find_template(screenshot, self.combat_briefing_template, threshold=briefing_threshold)
-                    except:
-                        briefing_pos = None
-                    if briefing_pos:
-                        x, y, _, _ = briefing_pos
-                        self.controller.click(x, y)
-                        logger.info(f"成功点击作战简报模板位置: ({x}, {y})")
-                        time.sleep(1)
-                        break
-                    time.sleep(3)
-                    logger.info(f"未找到作战简报，当前匹配阈值: {briefing_threshold}")
-
-
-                # 4. 等待并点击"行动结束"字样
-                time.sleep(5)
-                # 检查模板文件是否存在
-                
-                    
-                screenshot = self.detector.capture_screen()
-                logger.info(f"正在查找行动结束")
-                try:
-                    end_pos = self.detector.find_template(screenshot, self.mission_results_template, threshold=briefing_threshold)
-                except:
-                    end_pos = None
-                if end_pos:
-                        x, y, _, _ = end_pos
-                        self.controller.click(x, y)
-                        logger.info(f"成功点击行动结束位置: ({x}, {y})")
-                        time.sleep(5)
+                        screen, pos = self._wait_screen(state, threshold=threshold, transition='stage->squad')
+                    except ElementNotFoundError:
+                        # 理智不足时会弹出恢复理智对话框而不是进入编队界面，该对话框没有模板，无法与加载过慢区分
+                        logger.error(f"点击开始行动后未进入编队界面（理智不足或界面加载过慢），"
+                                     f"已完成 {completed}/{cycles} 轮作战，停止作战")
+                        # 不点击恢复理智对话框，避免误用药剂或源石
+                        self.controller.press_key('esc')
+                        return False
+                    x, y, _, _ = pos
+                    self.controller.click(x, y)
+                    logger.info(f"成功点击开始行动按钮位置: ({x}, {y})")
+                    state = STATE_BATTLE
+
                 else:
-                    logger.debug(f"未找到行动结束，当前匹配阈值: {briefing_threshold}")
+                    if state == STATE_BATTLE:
+                        screen, pos = self._wait_battle_end(stage or DEFAULT_STAGE, threshold)
+                    else:
+                        screen, pos = self._wait_screen(state, threshold=threshold, transition='briefing->results')
+                    state = self._handle_settlement(screen, pos)
+                    if state == STATE_STAGE:
+                        completed += 1
+                        logger.info(f"第 {completed}/{cycles} 轮作战完成")
+
+            # 返回首页
+            logger.info("准备返回首页")
+            self.navigator.navigate(SCREEN_MAIN_MENU, threshold=threshold)
+            logger.info("成功返回首页")
 
+            logger.info("自动化剿灭作战流程已完成")
+            return True
 
+        except OperationCancelledError:
+            logger.warning("自动化剿灭作战流程已取消")
+            raise
+        except ElementNotFoundError as e:
+            logger.error(f"未找到相关元素: {e.message}")
+        except OperationFailedError as e:
+            logger.error(f"点击操作失败: {e.message}")
+        except Exception:
+            logger.error("执行自动化剿灭作战流程失败", exc_info=True)
+        return False
+
+    def _battle_window(self, stage):
+        """
+        按历史战斗时长推算本次战斗的预计结束时间段
 
-                logger.info(f"第 {cycle+1}/{cycles} 轮作战完成")
-            time.sleep(5)
-            
-            # 5. 返回首页
-            logger.info("准备返回首页")
+        Args:
+            stage (str): 关卡名称
 
-            # 点击top_bar.png
-            screenshot = self.detector.capture_screen()
-            top_bar_pos = self.detector.find_template(screenshot, self.top_bar_template, threshold=threshold)
-            if top_bar_pos:
-                x, y, _, _ = top_bar_pos
-                self.controller.click(x, y)
-                logger.info("成功点击顶部栏")
-                time.sleep(1)
-            else:
-                logger.error("未找到顶部栏")
+        Returns:
+            tuple: (开始检测前停止截图的时长, 预计结束时间段的终点)，单位为秒，
+                   记录不足或未启用时返回(0, 0)
+        """
+        if not settings.BATTLE_ESTIMATE_ENABLED:
+            return 0.0, 0.0
+        shortest = self.battle_durations.percentile(stage, settings.BATTLE_IDLE_PERCENTILE)
+        longest = self.battle_durations.percentile(stage, settings.BATTLE_WINDOW_PERCENTILE)
+        if shortest is None or longest is None:
+            return 0.0, 0.0
+        return max(0.0, shortest - settings.BATTLE_IDLE_MARGIN), longest
+
+    @tracer.traced()
+    def _wait_battle_end(self, stage, threshold=0.8, timeout=1800):
+        """
+        等待作战结束后出现的界面
 
-            # 点击home_btn.png
-            screenshot = self.detector.capture_screen()
-            home_btn_pos = self.detector.find_template(screenshot, self.home_btn_template, threshold=threshold)
-            if home_btn_pos:
-                x, y, _, _ = home_btn_pos
-                self.controller.click(x, y)
-                logger.info("成功点击首页按钮，返回首页")
-                time.sleep(1)
-            else:
-                logger.error("未找到首页按钮")
+        战斗时长记录足够时，在预计最短战斗时长之前完全停止截图和匹配，
+        进入预计结束时间段后以固定的短间隔密集检测；超出该时间段或记录不足时按空闲频率检测
 
-            logger.info("自动化剿灭作战流程已完成")
-            return True
+        Args:
+            stage (str): 关卡名称
+            threshold (float): 模板匹配阈值
+            timeout (float): 从开始战斗起最长等待时间(秒)，默认30分钟
 
-        except ElementNotFoundError:
-            logger.error("未找到相关元素")
-        except OperationFailedError:
-            logger.error("点击操作失败")
-        except Exception as e:
-            logger.error("执行自动化剿灭作战流程失败", exc_info=True)
\ No newline at end of file
+        Returns:
+            tuple: (界面名称, (x, y, width, height))
+
+        Raises:
+            ElementNotFoundError: 超时仍未出现作战结束的界面时抛出（包括出现等级提升或行动失败界面的情况）
+        """
+        started = self.detector.monotonic()
+        idle, window_end = self._battle_window(stage)
+        screen = pos = None
+        if idle > 0:
+            logger.info(f"作战进行中，预计 {idle:.0f} 秒后开始检测作战结束")
+            # 战斗的大部分时间内不截图也不匹配
+            with self.detector.capture_paused():
+                self.detector.sleep(min(idle, timeout))
+            remaining = window_end - (self.detector.monotonic() - started)
+            if remaining > 0:
+                try:
+                    screen, pos = self._wait_screen(STATE_BATTLE, timeout=remaining, threshold=threshold,
+                                                    interval=settings.BATTLE_POLL_INTERVAL)
+                except ElementNotFoundError:
+                    logger.info("超出预计的战斗时长，继续等待作战结束")
+        else:
+            logger.info("作战进行中，等待作战结束")
+
+        if screen is None:
+            # 战斗过程中降低后台截图频率
+            with self.detector.capture_rate(settings.CAPTURE_RATE_IDLE):
+                try:
+                    screen, pos = self._wait_screen(STATE_BATTLE, threshold=threshold,
+                                                    timeout=max(0.0, timeout - (self.detector.monotonic() - started)))
+                except ElementNotFoundError as e:
+                    # 超时的战斗时长不具代表性，不计入记录
+                    raise ElementNotFoundError(e.element_name,
+                                               f"作战开始 {timeout} 秒后仍未出现行动结束或作战简报界面，"
+                                               f"可能行动失败或出现等级提升提示（这两个界面暂不支持识别）") from e
+
+        duration = self.detector.monotonic() - started
+        self.battle_durations.record(stage, duration)
+        logger.info(f"本次战斗耗时 {duration:.1f} 秒")
+        return screen, pos
+
+    @tracer.traced()
+    def _handle_settlement(self, screen, pos):
+        """
+        处理作战结束后出现的界面
+
+        Args:
+            screen (str): 出现的界面名称
+            pos (tuple): 界面模板的位置 (x, y, width, height)
+        Returns:
+            str: 下一个状态，本轮作战结束时返回STATE_STAGE，否则返回STATE_SETTLEMENT
+        """
+        x, y, _, _ = pos
+        self.controller.click(x, y)
+        if screen == 'briefing':
+            logger.info(f"成功点击作战简报模板位置: ({x}, {y})")
+        elif screen == 'results':
+            logger.info(f"成功点击行动结束位置: ({x}, {y})")
+            return STATE_STAGE
+        return STATE_SETTLEMENT
@@ -11,6 +11,9 @@ if project_root not in sys.path:
 
 from core.detector import Detector
 from core.controller import Controller
+from core.navigation import Navigator
+from core.screens import SCREEN_RECRUIT
+from core.tracing import tracer
 from core.exceptions import ElementNotFoundError
 from utils.logger import logger
 from config.settings import settings
@@ -19,10 +22,18 @@ class RecruitModule:
     """
     公开招募模块，处理明日方舟中的公开招募功能
     """
-    def __init__(self):
+    def __init__(self, controller=None, detector=None):
+        """
+        初始化公开招募模块
+
+        Args:
+            controller (Controller): 控制器实例
+            detector (Detector): 检测器实例
+        """
         self.logger = logger
-        self.detector = Detector()
-        self.controller = Controller()
+        self.detector = detector or Detector()
+        self.controller = controller or Controller(detector=self.detector)
+        self.navigator = Navigator(self.detector, self.controller)
         self.recruit_button_template = "main_recruit_button.png"
         # 招募标签模板列表（位于templates\recruit_tag目录下）
         self.tag_templates = [
@@ -56,35 +67,17 @@ class RecruitModule:
             # 已添加所有templates/recruit_tag目录下的标签模板
         ]
         
+    @tracer.traced()
     def navigate_to_recruit(self, threshold=0.8):
         """
         导航到公开招募页面
-        步骤：点击主界面上的招募按钮
+        步骤：从当前界面沿最短路径导航到公开招募界面
         """
         self.logger.info("开始导航到公开招募页面")
-        time.sleep(1)
-
-        # 查找招募按钮
-        self.logger.debug(f"正在查找招募按钮: {self.recruit_button_template}")
         try:
-            # 捕获屏幕截图
-            screenshot = self.detector.capture_screen()
-            
-            # 在屏幕截图中查找招募按钮
-            button_position = self.detector.find_template(screenshot, self.recruit_button_template, threshold=threshold)
-            
-            if button_position:
-                self.logger.info("找到招募按钮，准备点击")
-                # 点击招募按钮（使用中心坐标）
-                self.controller.click(button_position[0], button_position[1])
-                self.logger.info("已点击招募按钮")
-                # 等待页面加载
-                time.sleep(2)
-                return True
-            else:
-                # 这里不应该到达，因为find_template在未找到时会抛出异常
-                self.logger.error(f"未找到招募按钮: {self.recruit_button_template}")
-                return False
+            self.navigator.navigate(SCREEN_RECRUIT, threshold=threshold)
+            self.logger.info("已进入公开招募页面")
+            return True
         except ElementNotFoundError as e:
             self.logger.error(f"未找到招募按钮: {str(e)}")
             return False
@@ -92,6 +85,7 @@ class RecruitModule:
             self.logger.error(f"导航到公开招募页面失败: {str(e)}")
             return False
 
+    @tracer.traced()
     def enter_recruit_slots(self, slot_number=None, target_tags=None, threshold=0.7):
         """
         进入招募位并执行pass操作
@@ -123,34 +117,29 @@ class RecruitModule:
         for slot_template in recruit_slot_templates:
             self.logger.info(f"尝试进入招募位: {slot_template}")
             try:
-                # 捕获屏幕截图
-                screenshot = self.detector.capture_screen()
                 # 保存完整屏幕截图用于调试
                 if settings.SAVE_SCREENSHOTS:
-                    import time
+                    screenshot = self.detector.capture_screen()
                     timestamp = time.strftime('%Y%m%d%H%M%S')
                     self.detector.save_image(screenshot, filename=f'recruit_full_screen_{slot_template}_{timestamp}.png')
                 
-                # 查找招募位
+                # 等待招募位出现（已锁定或不存在的招募位不会出现，因此只短暂等待）
                 self.logger.debug(f"正在查找招募位: {slot_template}")
-                slot_position = self.detector.find_template(screenshot, slot_template, threshold=threshold)
+                slot_position = self.detector.wait_for(slot_template, timeout=3, threshold=threshold)
                 
                 if slot_position:
                     self.logger.info(f"找到招募位: {slot_template}，准备点击")
                     # 点击招募位
                     self.controller.click(slot_position[0], slot_position[1])
                     self.logger.info(f"已点击招募位: {slot_template}")
-                    # 等待页面加载
-                    time.sleep(1.5)
                     
                     # 检测招募详情标题是否存在
                     detail_title_template = "recruit_detail_title.png"
                     try:
-                        # 捕获屏幕截图
-                        screenshot = self.detector.capture_screen()
-                        # 查找招募详情标题
+                        # 等待招募详情标题出现
                         self.logger.debug(f"正在查找招募详情标题: {detail_title_template}")
-                        self.detector.find_template(screenshot, detail_title_template, threshold=threshold)
+                        # 招募位可能没有详情界面，超时是正常结果，不计入界面切换耗时
+                        self.detector.wait_for(detail_title_template, timeout=5, threshold=threshold)
                         self.logger.info(f"招募详情标题存在，继续处理招募位 {slot_template}")
                         # 执行操作
                         self.logger.info(f"在招募位 {slot_template} 执行操作")
@@ -164,13 +153,11 @@ class RecruitModule:
                 self.logger.warning(f"未找到招募位: {slot_template}，可能已锁定或不存在: {str(e)}")
             except Exception as e:
                 self.logger.error(f"处理招募位 {slot_template} 时出错: {str(e)}")
-            
-            # 等待一段时间再处理下一个招募位
-            time.sleep(1)
         
         self.logger.info("所有招募位处理完成")
         return True
         
+    @tracer.traced()
     def _perform_pass_action(self, target_tags=None, threshold=0.7):
         """
         执行招募位操作
@@ -182,10 +169,9 @@ class RecruitModule:
             # 1. 点击招募时间按钮
             self.logger.info("点击招募时间按钮")
             time_btn_template = "recruit_time_btn.png"
-            screenshot = self.detector.capture_screen()
-            time_btn_position = self.detector.find_template(screenshot, time_btn_template, threshold=threshold)
+            time_btn_position = self.detector.wait_for(time_btn_template, threshold=threshold)
             self.controller.click(time_btn_position[0], time_btn_position[1])
-            time.sleep(1)
+            self.detector.sleep(1)
 
             # 2. 检查标签
             if target_tags is None:
@@ -222,31 +208,29 @@ class RecruitModule:
                     target_templates = self.tag_templates
                     self.logger.warning("未找到与目标标签匹配的模板，将使用所有模板进行匹配")
                 
-                # 只遍历用户选择的标签模板
+                # 目标标签与高级资深干员标签在同一张截图上一次性批量匹配
+                senior_tag_templates = ["recruit_tag\\资深干员.png", "recruit_tag\\高级资深干员.png"]
+                self.logger.info(f"正在批量匹配 {len(target_templates)} 个标签模板，阈值: 0.7")
+                tag_matches = self.detector.find_templates(tag_image, target_templates + senior_tag_templates, threshold=0.7)
+
                 for tag_template in target_templates:
-                    try:
-                        # 在标签区域中查找模板
-                            self.logger.info(f"正在匹配模板: {tag_template}，阈值: 0.7")
-                            tag_position = self.detector.find_template(tag_image, tag_template, threshold=0.7)
-                            
-                            if tag_position:
-                                # 获取标签名称（去掉文件扩展名）
-                                tag_name = os.path.splitext(tag_template)[0]
-                                # 计算标签中心坐标
-                                x, y, w, h = tag_position
-                                center_x = x + w // 2
-                                center_y = y + h // 2
-                                # 添加到识别结果列表
-                                recognized_tags_with_coords.append({
-                                    'text': tag_name,
-                                    'center': (center_x, center_y),
-                                    'confidence': 1.0  # 模板匹配默认为100%置信度
-                                })
-                                self.logger.info(f"找到标签: {tag_name}，位置: ({center_x}, {center_y})")
-                    except ElementNotFoundError as e:
-                        # 未找到当前模板，继续查找下一个
-                        self.logger.warning(f"未找到模板: {tag_template}，错误信息: {str(e)}")
-                        continue
+                    tag_position = tag_matches.get(tag_template)
+                    if tag_position:
+                        # 获取标签名称（去掉文件扩展名）
+                        tag_name = os.path.splitext(tag_template)[0]
+                        # 计算标签中心坐标
+                        x, y, w, h = tag_position
+                        center_x = x + w // 2
+                        center_y = y + h // 2
+                        # 添加到识别结果列表
+                        recognized_tags_with_coords.append({
+                            'text': tag_name,
+                            'center': (center_x, center_y),
+                            'confidence': 1.0  # 模板匹配默认为100%置信度
+                        })
+                        self.logger.info(f"找到标签: {tag_name}，位置: ({center_x}, {center_y})")
+                    else:
+                        self.logger.debug(f"未找到模板: {tag_template}")
                 self.logger.info(f"识别到招募标签: {[item['text'] for item in recognized_tags_with_coords]}")
                 # 如果未识别到标签，保存截图用于调试
                 if not recognized_tags_with_coords:
@@ -256,20 +240,14 @@ class RecruitModule:
 
                 # 检查是否有高级资深干员标签
                 self.logger.info("开始检查高级资深干员标签")
-                senior_tag_templates = ["recruit_tag\\资深干员.png", "recruit_tag\\高级资深干员.png"]
                 for senior_template in senior_tag_templates:
-                    try:
-                        template_name = os.path.basename(senior_template)
-                        self.logger.info(f"正在检查高级资深干员标签: {template_name}")
-                        if self.detector.find_template(tag_image, senior_template, threshold=0.7):
-                            senior_tag = os.path.splitext(template_name)[0]
-                            self.logger.warning(f"发现{senior_tag}，请人工接管")
-                            return False
-                        else:
-                            self.logger.debug(f"未找到高级资深干员标签: {template_name}")
-                    except ElementNotFoundError as e:
-                        self.logger.warning(f"未找到高级资深干员标签文件: {senior_template}. 错误: {str(e)}")
-                        continue
+                    template_name = os.path.basename(senior_template)
+                    if tag_matches.get(senior_template):
+                        senior_tag = os.path.splitext(template_name)[0]
+                        self.logger.warning(f"发现{senior_tag}，请人工接管")
+                        return False
+                    else:
+                        self.logger.debug(f"未找到高级资深干员标签: {template_name}")
 
                 # 检查是否有目标标签
                 found_target = False
@@ -290,7 +268,6 @@ class RecruitModule:
                             # 点击标签
                             self.controller.click(abs_x, abs_y)
                             self.logger.info(f"已点击目标标签: {target_tag}")
-                            time.sleep(0.5)
                             found_target = True
                             break
                     if found_target:
@@ -300,10 +277,8 @@ class RecruitModule:
                     # 3. 点击右侧按钮
                     self.logger.info("点击右侧按钮")
                     right_btn_template = "recruit_right_btn.png"
-                    screenshot = self.detector.capture_screen()
-                    right_btn_position = self.detector.find_template(screenshot, right_btn_template, threshold=threshold)
+                    right_btn_position = self.detector.wait_for(right_btn_template, threshold=threshold)
                     self.controller.click(right_btn_position[0], right_btn_position[1])
-                    time.sleep(1)
                     return True
                 else:
                     # 如果没有找到目标标签，点击第一个识别到的标签
@@ -322,15 +297,12 @@ class RecruitModule:
                         # 执行点击
                         self.logger.info(f"点击非目标标签 '{item['text']}' 位置: ({abs_x}, {abs_y})")
                         self.controller.click(abs_x, abs_y)
-                        time.sleep(0.5)
                         
                         # 点击右侧按钮
                         self.logger.info("点击右侧按钮")
                         right_btn_template = "recruit_right_btn.png"
-                        screenshot = self.detector.capture_screen()
-                        right_btn_position = self.detector.find_template(screenshot, right_btn_template, threshold=threshold)
+                        right_btn_position = self.detector.wait_for(right_btn_template, threshold=threshold)
                         self.controller.click(right_btn_position[0], right_btn_position[1])
-                        time.sleep(1)
                         return True
                     else:
                         # 检查是否与上一次识别结果相同
@@ -345,27 +317,23 @@ class RecruitModule:
                         # 4. 刷新标签
                         self.logger.info(f"刷新标签 (第{refresh_count}次)")
                         refresh_btn_template = "recruit_refresh_tags.png"
-                        screenshot = self.detector.capture_screen()
-                        refresh_btn_position = self.detector.find_template(screenshot, refresh_btn_template, threshold=threshold)
+                        refresh_btn_position = self.detector.wait_for(refresh_btn_template, threshold=threshold)
                         self.controller.click(refresh_btn_position[0], refresh_btn_position[1])
-                        time.sleep(1)
 
-                        # 点击确认按钮
+                        # 等待并点击确认按钮
                         true_btn_template = "true_btn.png"
-                        screenshot = self.detector.capture_screen()
-                        true_btn_position = self.detector.find_template(screenshot, true_btn_template, threshold=threshold)
+                        true_btn_position = self.detector.wait_for(true_btn_template, threshold=threshold,
+                                                                   transition='recruit_refresh->confirm')
                         self.controller.click(true_btn_position[0], true_btn_position[1])
-                        time.sleep(1.5)
+                        self.detector.sleep(1.5)
 
             # 达到最大刷新次数仍未找到目标标签
             self.logger.warning(f"达到最大刷新次数({max_refresh_count})，未找到目标标签")
             # 点击右侧按钮
             self.logger.info("点击右侧按钮")
             right_btn_template = "recruit_right_btn.png"
-            screenshot = self.detector.capture_screen()
-            right_btn_position = self.detector.find_template(screenshot, right_btn_template, threshold=0.7)
+            right_btn_position = self.detector.wait_for(right_btn_template, threshold=0.7)
             self.controller.click(right_btn_position[0], right_btn_position[1])
-            time.sleep(1)
             return True
 
         except ElementNotFoundError as e:
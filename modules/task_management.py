@@ -1,14 +1,25 @@
-import time
 from core.controller import Controller
 from core.detector import Detector
+from core.navigation import Navigator
+from core.screens import SCREEN_TASK, SCREEN_MAIN_MENU
+from core.tracing import tracer
 from core.exceptions import ElementNotFoundError, OperationFailedError
 from utils.logger import logger
 
 class TaskManagementModule:
-    def __init__(self):
-        self.controller = Controller()
-        self.detector = Detector()
+    def __init__(self, controller=None, detector=None):
+        """
+        初始化任务管理模块
+
+        Args:
+            controller (Controller): 控制器实例
+            detector (Detector): 检测器实例
+        """
+        self.detector = detector or Detector()
+        self.controller = controller or Controller(detector=self.detector)
+        self.navigator = Navigator(self.detector, self.controller)
         
+    @tracer.traced()
     def claim_all_rewards(self, threshold=0.6):
         """
         领取所有任务奖励（日常和每周）
@@ -17,39 +28,31 @@ class TaskManagementModule:
             threshold (float): 模板匹配阈值，默认为0.6
         """
         try:
-            # 点击主任务按钮
+            # 从当前界面导航到任务界面
             logger.info("开始领取任务奖励流程")
-            screenshot = self.detector.capture_screen()
-            task_btn_pos = self.detector.find_template(screenshot, "main_task_btn.png", threshold)
-            if not task_btn_pos:
-                raise ElementNotFoundError("main_task_btn.png", "未找到主任务按钮")
-            x, y, _, _ = task_btn_pos
-            self.controller.click(x, y)
-            logger.info("成功点击主任务按钮")
-            time.sleep(2)
+            self.navigator.navigate(SCREEN_TASK, threshold=threshold)
+            logger.info("成功进入任务界面")
             
             # 领取日常奖励
             logger.info("开始领取日常任务奖励")
             try:
-                screenshot = self.detector.capture_screen()
-                daily_btn_pos = self.detector.find_template(screenshot, "daily_btn.png", threshold)
+                # 导航时已确认进入任务界面，这里的等待几乎不耗时，不计入界面切换耗时
+                daily_btn_pos = self.detector.wait_for("daily_btn.png", threshold=threshold)
                 x, y, _, _ = daily_btn_pos
-                self.controller.click(x, y)
+                self.controller.click(x, y, retry=True)
                 logger.info("成功点击日常任务按钮")
-                time.sleep(4)
                 
                 try:
-                    screenshot = self.detector.capture_screen()
-                    get_all_btn_pos = self.detector.find_template(screenshot, "get_all_btn.png", threshold)
+                    # 没有可领取的奖励时不会出现全部领取按钮，因此只短暂等待，超时是正常结果，不计入界面切换耗时
+                    get_all_btn_pos = self.detector.wait_for("get_all_btn.png", timeout=5, threshold=threshold)
                     x, y, _, _ = get_all_btn_pos
                     self.controller.click(x, y)
                     logger.info("成功点击日常任务全部领取按钮")
-                    time.sleep(3)
+                    self.detector.sleep(3)
                     
                     # 原地点击
                     self.controller.click(x, y)
                     logger.info("原地点击确认")
-                    time.sleep(2)
                 except ElementNotFoundError as e:
                     logger.warning(f"未找到日常任务全部领取按钮，跳过: {str(e)}")
             except ElementNotFoundError as e:
@@ -58,25 +61,22 @@ class TaskManagementModule:
             # 领取每周奖励
             logger.info("开始领取每周任务奖励")
             try:
-                screenshot = self.detector.capture_screen()
-                weekly_btn_pos = self.detector.find_template(screenshot, "weekly_btn.png", threshold)
+                weekly_btn_pos = self.detector.wait_for("weekly_btn.png", threshold=threshold)
                 x, y, _, _ = weekly_btn_pos
-                self.controller.click(x, y)
+                self.controller.click(x, y, retry=True)
                 logger.info("成功点击每周任务按钮")
-                time.sleep(4)
                 
                 try:
-                    screenshot = self.detector.capture_screen()
-                    get_all_btn_pos = self.detector.find_template(screenshot, "get_all_btn.png", threshold)
+                    # 没有可领取的奖励时不会出现全部领取按钮，因此只短暂等待，超时是正常结果，不计入界面切换耗时
+                    get_all_btn_pos = self.detector.wait_for("get_all_btn.png", timeout=5, threshold=threshold)
                     x, y, _, _ = get_all_btn_pos
                     self.controller.click(x, y)
                     logger.info("成功点击每周任务全部领取按钮")
-                    time.sleep(3)
+                    self.detector.sleep(3)
                     
                     # 原地点击
                     self.controller.click(x, y)
                     logger.info("原地点击确认")
-                    time.sleep(2)
                 except ElementNotFoundError as e:
                     logger.warning(f"未找到每周任务全部领取按钮，跳过: {str(e)}")
             except ElementNotFoundError as e:
@@ -85,25 +85,8 @@ class TaskManagementModule:
             # 返回主页
             logger.info("准备返回主页")
             try:
-                screenshot = self.detector.capture_screen()
-                top_bar_pos = self.detector.find_template(screenshot, "top_bar.png", threshold)
-                if top_bar_pos:
-                    x, y, _, _ = top_bar_pos
-                    self.controller.click(x, y)
-                    logger.info("成功点击顶部栏")
-                    time.sleep(1)
-                    
-                    screenshot = self.detector.capture_screen()
-                    home_btn_pos = self.detector.find_template(screenshot, "home_btn.png", threshold)
-                    if home_btn_pos:
-                        x, y, _, _ = home_btn_pos
-                        self.controller.click(x, y)
-                        logger.info("成功点击首页按钮，返回主页")
-                        time.sleep(2)
-                    else:
-                        logger.warning("未找到首页按钮，跳过返回主页")
-                else:
-                    logger.warning("未找到顶部栏，跳过返回主页")
+                self.navigator.navigate(SCREEN_MAIN_MENU, threshold=threshold, source=SCREEN_TASK)
+                logger.info("成功返回主页")
             except Exception as e:
                 logger.error(f"返回主页过程中发生错误: {str(e)}")
             
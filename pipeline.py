@@ -0,0 +1,197 @@
+"""
+ZOOT代理指挥日常流程
+不启动图形界面，依次执行基建、公开招募、任务奖励和剿灭作战，所有步骤共享同一个检测器和控制器，
+模板缓存、位置索引和截图会话在步骤之间保持有效
+
+用法:
+    python pipeline.py [--stages base recruit tasks combat] [--level 龙门市区] [--cycles 0] [--tags 重装干员 新手]
+                       [--trace logs/trace.json]
+"""
+import argparse
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core import Controller, Detector
+from core.exceptions import OperationFailedError
+from core.tracing import tracer
+from modules import BaseManagementModule, CombatModule, TaskManagementModule, RecruitModule
+from utils.logger import logger
+
+# 支持的步骤，默认按此顺序执行
+STAGES = ('base', 'recruit', 'tasks', 'combat')
+# 步骤名称
+STAGE_NAMES = {
+    'base': '基建事项',
+    'recruit': '公开招募',
+    'tasks': '任务奖励',
+    'combat': '剿灭作战',
+}
+# 支持的剿灭关卡
+COMBAT_LEVELS = ('龙门外环', '龙门市区', '当期委托地点')
+# 未指定标签时公开招募使用的默认标签
+DEFAULT_RECRUIT_TAGS = ["重装干员", "新手", "医疗干员"]
+
+
+class DailyPipeline:
+    """日常流程类，在同一个检测器和控制器上依次执行各步骤，并统计每个步骤的耗时"""
+
+    def __init__(self, detector=None, controller=None, threshold=0.8, recruit_tags=None,
+                 combat_level='龙门市区', combat_cycles=None):
+        """
+        初始化日常流程
+
+        Args:
+            detector (Detector): 所有步骤共享的检测器实例
+            controller (Controller): 所有步骤共享的控制器实例
+            threshold (float): 基建和作战步骤的模板匹配阈值
+            recruit_tags (list): 公开招募的目标标签，默认使用DEFAULT_RECRUIT_TAGS
+            combat_level (str): 剿灭作战关卡，取值见COMBAT_LEVELS
+            combat_cycles (int): 剿灭作战轮次，为None时按剩余理智自动计算
+        """
+        if combat_level not in COMBAT_LEVELS:
+            raise ValueError(f"不支持的剿灭关卡: {combat_level}")
+        self.detector = detector or Detector()
+        self.controller = controller or Controller(detector=self.detector)
+        self.threshold = threshold
+        self.recruit_tags = recruit_tags or DEFAULT_RECRUIT_TAGS
+        self.combat_level = combat_level
+        self.combat_cycles = combat_cycles
+        # 各功能模块共享同一个检测器和控制器
+        self.base = BaseManagementModule(controller=self.controller, detector=self.detector)
+        self.recruit = RecruitModule(controller=self.controller, detector=self.detector)
+        self.tasks = TaskManagementModule(controller=self.controller, detector=self.detector)
+        self.combat = CombatModule(controller=self.controller, detector=self.detector)
+        # 每个步骤的执行结果 [(步骤, 是否成功, 耗时秒数)]
+        self.timings = []
+
+    def run_base(self):
+        """完成基建事项后退出基建"""
+        if not self.base.navigate_to_base(threshold=self.threshold):
+            return False
+        if not self.base.complete_tasks(threshold=self.threshold):
+            return False
+        return self.base.exit_from_base(threshold=self.threshold)
+
+    def run_recruit(self):
+        """处理所有招募位"""
+        if not self.recruit.navigate_to_recruit():
+            return False
+        return self.recruit.enter_recruit_slots(target_tags=self.recruit_tags)
+
+    def run_tasks(self):
+        """领取日常和每周任务奖励"""
+        return self.tasks.claim_all_rewards()
+
+    def run_combat(self):
+        """导航到剿灭关卡并执行代理作战"""
+        if self.combat_cycles is None:
+            # 无法按理智计算轮次时不进入关卡
+            self.combat.check_auto_cycles()
+        threshold = self.threshold
+        if not self.combat.navigate_to_eliminate(threshold=threshold):
+            return False
+        if self.combat_level == '龙门外环':
+            navigated = self.combat.navigate_to_longmen(threshold=threshold)
+        elif self.combat_level == '龙门市区':
+            navigated = self.combat.navigate_to_longmen_city(threshold=threshold)
+        else:
+            navigated = self.combat.navigate_to_current_commission(threshold=threshold)
+        if not navigated:
+            return False
+        if not self.combat.check_and_enable_acting_commander(threshold=threshold):
+            raise OperationFailedError("启用代理指挥", "无法启用代理指挥")
+        return bool(self.combat.combat_only_flow(cycles=self.combat_cycles, threshold=threshold,
+                                                 stage=self.combat_level))
+
+    def run(self, stages=STAGES, stop_on_error=False):
+        """
+        依次执行指定的步骤
+
+        Args:
+            stages (list): 要执行的步骤，取值见STAGES
+            stop_on_error (bool): 某个步骤失败时是否停止执行之后的步骤
+
+        Returns:
+            bool: 所有步骤都成功时返回True
+        """
+        runners = {
+            'base': self.run_base,
+            'recruit': self.run_recruit,
+            'tasks': self.run_tasks,
+            'combat': self.run_combat,
+        }
+        self.timings = []
+        for stage in stages:
+            name = STAGE_NAMES[stage]
+            logger.info(f"开始执行: {name}")
+            started = time.perf_counter()
+            # 失败时只保存本步骤的画面和操作记录
+            self.detector.flight_recorder.clear()
+            try:
+                with tracer.span(name, 'pipeline'):
+                    success = bool(runners[stage]())
+            except Exception as e:
+                logger.error(f"{name}执行失败: {str(e)}", exc_info=True)
+                success = False
+            elapsed = time.perf_counter() - started
+            if not success:
+                self.detector.flight_recorder.dump(stage)
+            self.timings.append((stage, success, elapsed))
+            logger.info(f"{name}{'完成' if success else '失败'}，耗时: {elapsed:.1f}秒")
+            if not success and stop_on_error:
+                logger.warning("已设置失败时停止，跳过之后的步骤")
+                break
+        self.report()
+        return len(self.timings) == len(stages) and all(success for _, success, _ in self.timings)
+
+    def report(self):
+        """输出各步骤的耗时统计"""
+        total = sum(elapsed for _, _, elapsed in self.timings)
+        logger.info("日常流程耗时统计:")
+        for stage, success, elapsed in self.timings:
+            logger.info(f"  {STAGE_NAMES[stage]}: {elapsed:.1f}秒 ({'成功' if success else '失败'})")
+        logger.info(f"  合计: {total:.1f}秒")
+        cache = self.detector.template_cache
+        logger.info(f"模板缓存命中/未命中: {cache.hits}/{cache.misses}，匹配结果复用次数: {self.detector.reuse_hits}")
+
+    def close(self):
+        """释放检测器占用的屏幕捕获资源"""
+        self.detector.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ZOOT代理指挥日常流程（无图形界面）")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES), help="要执行的步骤，按给定顺序执行")
+    parser.add_argument('--threshold', type=float, default=0.8, help="基建和作战步骤的模板匹配阈值")
+    parser.add_argument('--tags', nargs='+', help="公开招募的目标标签")
+    parser.add_argument('--level', choices=COMBAT_LEVELS, default='龙门市区', help="剿灭作战关卡")
+    parser.add_argument('--cycles', type=int, default=0, help="剿灭作战轮次，0为按剩余理智自动计算")
+    parser.add_argument('--delay', type=float, default=3.0, help="开始执行前的等待时间(秒)，用于切换到游戏窗口")
+    parser.add_argument('--stop-on-error', action='store_true', help="某个步骤失败时停止执行之后的步骤")
+    parser.add_argument('--trace', metavar='PATH', help="记录各步骤耗时并导出为Chrome trace格式，可在chrome://tracing或Perfetto中查看")
+    args = parser.parse_args()
+    if args.trace:
+        tracer.enabled = True
+
+    pipeline = DailyPipeline(threshold=args.threshold, recruit_tags=args.tags, combat_level=args.level,
+                             combat_cycles=args.cycles or None)
+    logger.info(f"日常流程将在 {args.delay} 秒后开始，步骤: {' -> '.join(STAGE_NAMES[s] for s in args.stages)}")
+    time.sleep(args.delay)
+    try:
+        success = pipeline.run(args.stages, stop_on_error=args.stop_on_error)
+    finally:
+        pipeline.close()
+        if tracer.enabled:
+            tracer.log_summary()
+            tracer.export(args.trace or os.path.join(project_root, 'logs', f"trace_{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -35,10 +35,14 @@ a = Analysis(
     datas=datas,
     hiddenimports=[
         'core', 'core.controller', 'core.detector', 'core.exceptions',
+        'core.template_cache', 'core.roi_index', 'core.frame_diff', 'core.latency',
+        'core.capture', 'core.window', 'core.replay', 'core.digits', 'core.screens',
+        'core.navigation', 'core.screenshot_writer', 'core.flight_recorder', 'core.tracing',
         'modules', 'modules.base_management', 'modules.combat', 
         'modules.mission', 'modules.recruit', 'modules.task_management',
         'utils', 'utils.logger',
         'config.settings',
+        'pygetwindow',
         'scipy._cyutility',
         'scipy.linalg._cythonized_array_utils'
     ],
@@ -1,31 +1,216 @@
+import atexit
+import copy
+import glob
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import sys
 from datetime import datetime
+from config.settings import settings
+
+# 日志格式
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# 后台写日志的监听线程
+_listener = None
+
+
+class RotatingCompressedFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    按日期和大小轮转的日志文件处理器
+
+    当前日志写入"日期.log"（JSON日志为"日期.jsonl"），跨天或超过大小上限时轮转为"日期.序号.log"，
+    并按设置压缩为gzip，只保留最近的若干个轮转文件
+    """
+
+    def __init__(self, log_dir, suffix='.log', max_bytes=0, backup_count=0, compress=True, encoding='utf-8'):
+        """
+        初始化日志文件处理器
+
+        Args:
+            log_dir (str): 日志目录
+            suffix (str): 日志文件扩展名
+            max_bytes (int): 单个日志文件的大小上限(字节)，为0时只按日期轮转
+            backup_count (int): 保留的轮转文件数量，为0时不删除旧文件
+            compress (bool): 是否将轮转后的文件压缩为gzip
+            encoding (str): 文件编码
+        """
+        self.log_dir = log_dir
+        self.suffix = suffix
+        self.compress = compress
+        self._day = self._today()
+        super().__init__(self._current_path(), maxBytes=max_bytes, backupCount=backup_count,
+                         encoding=encoding, delay=True)
+
+    @staticmethod
+    def _today():
+        return datetime.now().strftime('%Y%m%d')
+
+    def _current_path(self):
+        return os.path.abspath(os.path.join(self.log_dir, f'{self._day}{self.suffix}'))
+
+    def shouldRollover(self, record):
+        """跨天或写入后超过大小上限时需要轮转"""
+        if self._today() != self._day:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def _next_segment(self):
+        """当前日期下一个可用的轮转文件路径（不含压缩扩展名）"""
+        # 序号取已有轮转文件的最大序号加1，旧文件被删除后序号也不会重复使用
+        prefix = f'{self._day}.'
+        index = 0
+        for name in os.listdir(self.log_dir):
+            if name.startswith(prefix) and (name.endswith(self.suffix) or name.endswith(self.suffix + '.gz')):
+                number = name[len(prefix):].split('.', 1)[0]
+                if number.isdigit():
+                    index = max(index, int(number))
+        return os.path.join(self.log_dir, f'{self._day}.{index + 1}{self.suffix}')
+
+    def doRollover(self):
+        """关闭当前文件，将其改名为轮转文件并压缩，然后打开新一天或新的日志文件"""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            segment = self._next_segment()
+            os.replace(self.baseFilename, segment)
+            if self.compress:
+                try:
+                    with open(segment, 'rb') as source, gzip.open(segment + '.gz', 'wb') as target:
+                        shutil.copyfileobj(source, target)
+                    os.remove(segment)
+                except OSError as e:
+                    # 压缩失败时保留未压缩的文件；日志系统自身出错，只能直接写到标准错误
+                    sys.stderr.write(f"日志文件压缩失败: {segment}, {e}\n")
+            self._remove_old_segments()
+        self._day = self._today()
+        self.baseFilename = self._current_path()
+        self.stream = self._open()
+
+    def _remove_old_segments(self):
+        """只保留最近的backup_count个轮转文件"""
+        if self.backupCount <= 0:
+            return
+        pattern = os.path.join(self.log_dir, f'*.*{self.suffix}')
+        segments = glob.glob(pattern) + glob.glob(pattern + '.gz')
+        segments.sort(key=os.path.getmtime)
+        for path in segments[:-self.backupCount]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class JsonFormatter(logging.Formatter):
+    """将日志记录格式化为单行JSON，便于程序分析"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'module': record.module,
+            'line': record.lineno,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    放入队列前保留结构化异常信息的队列处理器
+
+    默认的QueueHandler会把异常堆栈拼接进消息并清空exc_info和exc_text，
+    这里只合并消息参数，异常堆栈保存在exc_text中，文本日志照常附加堆栈，JSON日志可单独输出exception字段
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # 异常对象可能无法跨线程安全使用，只保留格式化后的堆栈
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _create_handlers(log_dir):
+    """创建在后台线程中实际输出日志的处理器"""
+    formatter = logging.Formatter(LOG_FORMAT)
+    max_bytes = int(settings.LOG_FILE_MAX_MB * 1024 * 1024)
+
+    file_handler = RotatingCompressedFileHandler(log_dir, '.log', max_bytes, settings.LOG_FILE_BACKUP_COUNT,
+                                                 settings.LOG_FILE_COMPRESS)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers = [file_handler, console_handler]
+
+    if settings.LOG_JSON_ENABLED:
+        json_handler = RotatingCompressedFileHandler(log_dir, '.jsonl', max_bytes, settings.LOG_FILE_BACKUP_COUNT,
+                                                     settings.LOG_FILE_COMPRESS)
+        json_handler.setFormatter(JsonFormatter())
+        handlers.append(json_handler)
+    return handlers
+
+
+def stop_logger():
+    """停止后台写日志的线程，并写完队列中剩余的日志"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
 
 # 初始化日志记录器
 def setup_logger(log_level="INFO"):
-    """设置日志系统"""
+    """
+    设置日志系统
+
+    调用日志的线程只把记录放入队列，由后台监听线程写入文件和控制台，写日志不会阻塞识别和操作流程
+
+    Args:
+        log_level (str): 日志级别
+
+    Returns:
+        logging.Logger: ZOOT日志器
+    """
+    global _listener
     # 创建日志目录
     log_dir = "logs"
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
-    
-    # 日志文件名
-    log_filename = f"{datetime.now().strftime('%Y%m%d')}.log"
-    log_path = os.path.join(log_dir, log_filename)
-    
-    # 配置日志
-    logging.basicConfig(
-        level=getattr(logging, log_level.upper(), logging.INFO),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_path, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
-    
+
+    if _listener is None:
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *_create_handlers(log_dir),
+                                                   respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logger)
+
+        # 根日志器只保留队列处理器
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(StructuredQueueHandler(log_queue))
+    logging.getLogger().setLevel(getattr(logging, log_level.upper(), logging.INFO))
+
     return logging.getLogger("ZOOT")
 
 # 创建默认日志器
 logger = setup_logger()
-    
\ No newline at end of file